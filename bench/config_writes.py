@@ -0,0 +1,37 @@
+"""
+Counts config file writes with write-behind persistence for a simulated session: scrolling the quick connect
+combobox, resizing the window and a few connections. Runs against a temporary HOME.
+
+Usage: python -m bench.config_writes
+"""
+import os
+import sys
+import time
+import tempfile
+
+
+def main():
+    os.environ['HOME'] = tempfile.mkdtemp()
+    from nvt import Config
+
+    countries = ['Germany', 'France', 'Italy', 'Spain', 'Poland', 'Sweden']
+    start = time.perf_counter()
+    for burst in range(5):
+        # scrolling through the combobox, one index change every ~20 ms
+        for country in countries * 5:
+            Config.save_quick_connect(country)
+            time.sleep(0.02)
+        Config.save_dimension(640 + burst, 480)
+        Config.add_last_connected(countries[burst], None, None)
+        time.sleep(Config.SAVE_DELAY * 1.5)
+    mutation_time = time.perf_counter() - start
+    Config.flush()
+
+    stats = Config.save_stats
+    print(f"mutations {stats['requested']}, file writes {stats['written']}, "
+          f"removed {stats['requested'] - stats['written']} ({mutation_time:.1f} s session)")
+    sys.exit(0 if stats['written'] < stats['requested'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Cold start time and RSS of creating flag icons for the country list, from individual png files (legacy)
+and from the memory mapped atlas decoded in the thread pool. Each mode runs in a fresh interpreter.
+Build the atlas first with `python -m nvt.FlagAtlas`.
+
+Usage: QT_QPA_PLATFORM=offscreen python -m bench.flags
+"""
+import os
+import sys
+import time
+import resource
+import subprocess
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+FLAGS_DIR = os.path.join(ROOT_DIR, 'icons', 'flags')
+
+
+def run_mode(mode: str):
+    from PySide6.QtCore import QThreadPool
+    from PySide6.QtGui import QIcon
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([])
+    codes = sorted(os.path.splitext(name)[0] for name in os.listdir(FLAGS_DIR))
+    start = time.perf_counter()
+    if mode == 'legacy':
+        icons = [QIcon(os.path.join(FLAGS_DIR, f"{code}.png")) for code in codes]
+        for icon in icons:
+            icon.pixmap(64, 48)
+    else:
+        sys.argv[0] = os.path.join(ROOT_DIR, 'main.py')
+        from nvt.FlagAtlas import flag_icons
+        icons = flag_icons()
+        for code in codes:
+            icons.icon(code)
+        ready = time.perf_counter()
+        QThreadPool.globalInstance().waitForDone()
+        app.processEvents()
+        print(f"  first paint ready {(ready - start) * 1000:.1f} ms")
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"  all {len(codes)} icons {elapsed * 1000:.1f} ms, max RSS {rss / 1024:.1f} MiB")
+
+
+def main():
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+        return
+    for mode in ('legacy', 'atlas'):
+        print(mode)
+        subprocess.run([sys.executable, '-m', 'bench.flags', mode], cwd=ROOT_DIR, check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Compares single-pass OptionsParser with the previous per-line, per-label regex search
+on recorded `nordvpn status`, `settings` and `account` outputs.
+
+Usage: python -m bench.parse [iterations]
+"""
+import os
+import re
+import sys
+import timeit
+from nvt.bindings import StatusProcess, SettingsProcess, AccountProcess
+from nvt.bindings.Connection import NVStatus
+from nvt.bindings.Settings import NVSettings
+from nvt.bindings.Account import Account
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def legacy_parse_options_list(lines_str: str, attr_map: dict[str, str], obj):
+    lines = lines_str.splitlines(False)
+    for line in lines:
+        for attr, label in attr_map.items():
+            result = re.search(label + r":\s*(?P<value>.*)", line, re.IGNORECASE)
+            if result is not None:
+                value = result.groupdict()["value"].strip()
+                if value:
+                    setattr(obj, attr, value)
+                break
+    return obj
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), newline='') as f:
+        return f.read()
+
+
+def main():
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cases = [
+        ('status', StatusProcess, NVStatus),
+        ('settings', SettingsProcess, NVSettings),
+        ('account', AccountProcess, Account),
+    ]
+    for name, process_cls, data_cls in cases:
+        data = read_fixture(f"{name}.txt")
+        parser = process_cls.parser
+        legacy_map = {attr: label for label, attr in parser.attrs.items()}
+
+        assert parser.parse(data, data_cls()) == legacy_parse_options_list(data, legacy_map, data_cls())
+
+        legacy = timeit.timeit(lambda: legacy_parse_options_list(data, legacy_map, data_cls()), number=number)
+        compiled = timeit.timeit(lambda: parser.parse(data, data_cls()), number=number)
+        print(f"{name:10} legacy {legacy / number * 1e6:8.2f} us  compiled {compiled / number * 1e6:8.2f} us  "
+              f"speedup {legacy / compiled:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Probe wall-clock time against candidate count. Candidates are local TCP listeners, per-host latency
+is injected before the handshake.
+
+Usage: python -m bench.probe
+"""
+import time
+import random
+import asyncio
+from nvt.Probe import fastest
+from tests.probe_stand_in import DelayedProbe
+
+
+async def main():
+    server = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    rnd = random.Random(1)
+
+    print(f"{'candidates':>10} {'concurrency':>11} {'wall ms':>8} {'max delay ms':>12}  fastest")
+    for count in (1, 4, 8, 16, 32, 64, 128):
+        delays = {f"host{i}": rnd.uniform(0.01, 0.2) for i in range(count)}
+        # a few candidates never answer and hit the timeout
+        for host in list(delays)[::10][1:]:
+            delays[host] = 10
+        probe = DelayedProbe(port, delays, timeout=0.5, concurrency=16)
+        start = time.perf_counter()
+        results = await probe.probe_many(list(delays))
+        elapsed = time.perf_counter() - start
+        print(f"{count:>10} {probe.concurrency:>11} {elapsed * 1000:>8.0f} "
+              f"{min(max(delays.values()), probe.timeout) * 1000:>12.0f}  {fastest(results)}")
+
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""
+Auto reconnect against the fake nordvpn CLI with a flapping tunnel: the tunnel drops `--flap` seconds after every
+connect. Prints downtime and time to recover of every incident, then lets every connect fail to show the retry cap.
+
+Usage: python -m bench.reconnect [--incidents N] [--flap SECONDS] [--check SECONDS]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from bench.run import setup_environment, wait
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--incidents', type=int, default=5)
+    parser.add_argument('--flap', type=float, default=2)
+    parser.add_argument('--check', type=float, default=0.5)
+    args = parser.parse_args()
+
+    setup_environment(0.05, 0)
+    state_path = os.path.join(tempfile.mkdtemp(prefix='nvt-reconnect-'), 'state')
+    # a missing state file counts as a stable connection, the tunnel only flaps after a connect was recorded
+    with open(state_path, 'w') as f:
+        f.write('connected')
+    os.environ['FAKE_NORDVPN_STATE'] = state_path
+    os.environ['FAKE_NORDVPN_FLAP'] = str(args.flap)
+
+    from PySide6.QtCore import QCoreApplication
+    from nvt.Supervisor import ConnectionSupervisor
+    from nvt.bindings import StatusProcess
+    from nvt.bindings.Circuit import breaker
+
+    app = QCoreApplication(sys.argv)
+    breaker.threshold = 1000
+    processes = []
+
+    def poll():
+        processes[:] = [StatusProcess(on_finish=lambda s: supervisor.report(s.status),
+                                      on_error=lambda e: supervisor.report(None)).run()]
+
+    supervisor = ConnectionSupervisor(poll)
+    supervisor.enabled = True
+    supervisor.base_delay = 0.1
+    supervisor.max_delay = 1
+    supervisor.check_timer.setInterval(int(args.check * 1000))
+    supervisor.recovered.connect(lambda i: print(f"  incident {len(supervisor.incidents):3}  attempts {i.attempts}  "
+                                                 f"downtime {i.downtime:6.2f} s  time to recover {i.time_to_recover:6.2f} s"))
+    supervisor.gave_up.connect(lambda i: print(f"  gave up after {i.attempts} attempts"))
+
+    print(f"flapping every {args.flap:g} s, status checked every {args.check:g} s")
+    poll()
+    timeout = args.incidents * (args.flap + args.check + 5)
+    wait(lambda: len(supervisor.incidents) >= args.incidents, timeout=timeout)
+    print(supervisor.summary())
+
+    print("dead connect")
+    os.environ['FAKE_NORDVPN_FAIL'] = 'connect=1'
+    given_up = []
+    supervisor.gave_up.connect(given_up.append)
+    wait(lambda: given_up, timeout=args.flap + args.check + supervisor.max_attempts * (supervisor.max_delay + 1))
+    print(supervisor.summary())
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
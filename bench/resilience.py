@@ -0,0 +1,61 @@
+"""
+Deadlines, retries and the circuit breaker against the fake nordvpn CLI: a hanging daemon, a flaky one and
+a dead one. Prints the outcome and time to callback of every status call.
+
+Usage: python -m bench.resilience
+"""
+import os
+import sys
+import time
+from bench.run import FAKE_DIR, wait
+
+
+def status_call(timeout: float) -> tuple[str, float]:
+    from nvt.bindings import StatusProcess
+
+    result = []
+    process = StatusProcess(on_finish=lambda s: result.append(f"ok {s.status}"),
+                            on_error=lambda e: result.append(f"error {e.strip()}"))
+    process.timeout = timeout
+    start = time.perf_counter()
+    process.run()
+    wait(lambda: result, timeout=60)
+    return result[0] if result else 'no callback', time.perf_counter() - start
+
+
+def scenario(name: str, latency: str, fail: str, calls: int, timeout: float = 1, reset: bool = True):
+    from nvt.bindings.Circuit import breaker
+
+    # every scenario starts with a closed circuit, otherwise an earlier one hides its deadlines and retries
+    if reset:
+        breaker.reset()
+    os.environ['FAKE_NORDVPN_LATENCY'] = latency
+    os.environ['FAKE_NORDVPN_FAIL'] = fail
+    print(f"\n{name}: latency {latency or 0}, fail {fail or 0}, timeout {timeout:g}s")
+    for _ in range(calls):
+        outcome, elapsed = status_call(timeout)
+        print(f"  {elapsed * 1000:8.0f} ms  breaker {'open' if breaker.is_open else 'closed':6}  {outcome}")
+
+
+def main():
+    os.environ['PATH'] = FAKE_DIR + os.pathsep + os.environ.get('PATH', '')
+    os.environ['FAKE_NORDVPN_SEED'] = '1'
+
+    from PySide6.QtCore import QCoreApplication
+    from nvt.bindings.Circuit import breaker
+
+    app = QCoreApplication(sys.argv)
+    breaker.cooldown = 2
+
+    scenario('healthy', '', '', 2)
+    scenario('flaky', '', '0.5', 4)
+    scenario('hanging', 'status=30', '', 2)
+    scenario('dead', '', '1', 3)
+    time.sleep(breaker.cooldown)
+    # the circuit opened by the dead daemon is half open now, its trial call closes it
+    scenario('recovered', '', '', 2, reset=False)
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
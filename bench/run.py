@@ -0,0 +1,213 @@
+"""
+Benchmark suite running the app against the fake nordvpn CLI from bench/fake under the offscreen Qt platform.
+
+Measures parse cost of every binding, Process spawn-to-callback latency, SystemTray status refresh and
+SettingsWindow open time. Results are written as json so runs of different commits can be compared.
+
+Usage: python -m bench.run [--runs N] [--latency SECONDS] [--output FILE] [--compare FILE]
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+import configparser
+from typing import Callable, Optional
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+FAKE_DIR = os.path.join(ROOT_DIR, 'bench', 'fake')
+FIXTURES_DIR = os.path.join(ROOT_DIR, 'bench', 'fixtures')
+
+
+def setup_environment(latency: float, fail: float):
+    os.environ['PATH'] = FAKE_DIR + os.pathsep + os.environ.get('PATH', '')
+    os.environ['HOME'] = tempfile.mkdtemp(prefix='nvt-bench-')
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ['FAKE_NORDVPN_LATENCY'] = str(latency)
+    os.environ['FAKE_NORDVPN_FAIL'] = str(fail)
+    # icons are resolved relative to the started script
+    sys.argv[0] = os.path.join(ROOT_DIR, 'main.py')
+
+    # the server list is read from the recorded fixture instead of api.nordvpn.com
+    config = configparser.ConfigParser(default_section='app')
+    config.set(config.default_section, 'servers_url', 'file://' + os.path.join(FIXTURES_DIR, 'servers.json'))
+    data_dir = os.path.join(os.environ['HOME'], '.local', 'share', 'nordvpn-tray')
+    os.makedirs(data_dir)
+    with open(os.path.join(data_dir, 'config.ini'), 'w') as f:
+        config.write(f)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return {
+        'n': len(samples),
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'p90': samples[min(len(samples) - 1, int(len(samples) * 0.9))],
+        'mean': statistics.fmean(samples),
+        'max': samples[-1],
+    }
+
+
+def wait(condition: Callable[[], bool], timeout: float = 30) -> bool:
+    from PySide6.QtCore import QCoreApplication, QEventLoop
+
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        QCoreApplication.processEvents(QEventLoop.ProcessEventsFlag.AllEvents, 5)
+    return True
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, f"{name}.txt"), newline='') as f:
+        return f.read()
+
+
+def bench_parse(runs: int) -> dict[str, dict]:
+    from nvt.bindings import StatusProcess, SettingsProcess, AccountProcess, CountriesProcess, CitiesProcess
+
+    results = dict()
+    cases = [
+        ('status', StatusProcess),
+        ('settings', SettingsProcess),
+        ('account', AccountProcess),
+        ('countries', CountriesProcess),
+        ('cities', CitiesProcess),
+    ]
+    number = 200
+    for name, process_cls in cases:
+        data = read_fixture(name)
+        process = process_cls()
+        samples = timeit.repeat(lambda: process._parse_output(data), number=number, repeat=runs)
+        results[f"parse_{name}"] = summarize([s / number for s in samples])
+    return results
+
+
+def bench_spawn(runs: int) -> dict[str, dict]:
+    from nvt.bindings import StatusProcess
+
+    samples = []
+    failures = 0
+    for _ in range(runs):
+        finished = []
+        start = time.perf_counter()
+        process = StatusProcess(on_finish=lambda s: finished.append(True), on_error=lambda e: finished.append(False))
+        process.run()
+        wait(lambda: finished)
+        if finished and finished[0]:
+            samples.append(time.perf_counter() - start)
+        else:
+            failures += 1
+    result = summarize(samples) if samples else {'n': 0}
+    result['failures'] = failures
+    return {'spawn_status': result}
+
+
+def bench_tray(runs: int) -> dict[str, dict]:
+    from nvt.gui import SystemTray
+
+    tray = SystemTray(None)
+    wait(lambda: not tray.loading)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        tray._load_status()
+        wait(lambda: not tray.loading)
+        samples.append(time.perf_counter() - start)
+    tray.net_watcher.stop()
+    return {'tray_load_status': summarize(samples)}
+
+
+def bench_settings_window(runs: int) -> dict[str, dict]:
+    from nvt.gui.SettingsWindow import SettingsWindow
+
+    cold: Optional[float] = None
+    samples = []
+    for _ in range(runs + 1):
+        start = time.perf_counter()
+        window = SettingsWindow(lambda: None, lambda *args: None, lambda: None, lambda: None)
+        window.show()
+        wait(lambda: window.connect_tab.countries_model.rowCount() > 0 and bool(window.account_label.text()))
+        elapsed = time.perf_counter() - start
+        window.prefetch.stop()
+        window.close()
+        window.deleteLater()
+        if cold is None:
+            cold = elapsed
+        else:
+            samples.append(elapsed)
+    return {
+        'settings_window_open_cold': summarize([cold]),
+        'settings_window_open_warm': summarize(samples),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path: str, results: dict[str, dict]):
+    with open(base_path) as f:
+        base = json.load(f)['results']
+    print(f"\n{'benchmark':32} {'base':>12} {'current':>12} {'ratio':>7}")
+    for name, result in results.items():
+        if name in base and 'median' in base[name] and 'median' in result:
+            ratio = result['median'] / base[name]['median'] if base[name]['median'] else float('inf')
+            print(f"{name:32} {base[name]['median'] * 1000:10.3f}ms {result['median'] * 1000:10.3f}ms {ratio:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0, help='fake CLI latency in seconds')
+    parser.add_argument('--fail', type=float, default=0, help='fake CLI failure probability')
+    parser.add_argument('--output', default=os.path.join(ROOT_DIR, 'bench_output.json'))
+    parser.add_argument('--compare', help='previous json output to compare with')
+    args = parser.parse_args()
+
+    setup_environment(args.latency, args.fail)
+
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication([sys.argv[0]])
+    app.setQuitOnLastWindowClosed(False)
+
+    results = dict()
+    results.update(bench_parse(args.runs))
+    results.update(bench_spawn(args.runs))
+    results.update(bench_tray(args.runs))
+    results.update(bench_settings_window(max(1, args.runs // 4)))
+
+    output = {
+        'commit': git_commit(),
+        'time': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    for name, result in results.items():
+        if 'median' in result:
+            print(f"{name:32} median {result['median'] * 1000:10.3f} ms  p90 {result['p90'] * 1000:10.3f} ms")
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Speed test client against a local HTTP server standing in for the speed test endpoint: GET streams zeros,
+POST reads a chunked body. Compares stream counts to show the client is not the bottleneck.
+
+Usage: python -m bench.speedtest [--duration SECONDS] [--size BYTES]
+"""
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK = bytes(1 << 18)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    size = 1 << 30
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(self.size))
+        self.end_headers()
+        view = memoryview(CHUNK)
+        left = self.size
+        try:
+            while left > 0:
+                sent = min(left, len(CHUNK))
+                self.wfile.write(view[:sent])
+                left -= sent
+        except OSError:
+            pass
+
+    def do_POST(self):
+        try:
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if not size:
+                    self.rfile.readline()
+                    break
+                while size > 0:
+                    data = self.rfile.read(min(size, len(CHUNK)))
+                    if not data:
+                        return
+                    size -= len(data)
+                self.rfile.readline()
+        except (OSError, ValueError):
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--size', type=int, default=1 << 30, help="bytes served per download request")
+    args = parser.parse_args()
+
+    from nvt.SpeedTest import SpeedTest
+    from nvt.Metrics import format_rate
+
+    Handler.size = args.size
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    for streams in (1, 2, 4, 8):
+        result = SpeedTest(url, url, streams=streams, duration=args.duration).run()
+        print(f"{streams} streams  download {format_rate(result.download):>14}  "
+              f"upload {format_rate(result.upload):>14}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
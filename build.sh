@@ -1 +1,2 @@
+python -m nvt.FlagAtlas icons/flags.atlas
 pyinstaller --name nordvpn-tray --add-data icons:icons main.py
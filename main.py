@@ -1,33 +1,99 @@
+import os
 import sys
+import time
 import signal
-import qdarktheme
-from PySide6.QtWidgets import QApplication
-from nvt.gui import SystemTray
-from nvt import log_config
+
+started = time.perf_counter()
+
+# imported after the start time is taken, --profile-startup reports their import time
+from nvt.bindings import Stats, Tasks  # noqa: E402
+from nvt.utils import user_data_dir  # noqa: E402
+from nvt import log_config, Config  # noqa: E402
 
 log_config.config()
 
-if __name__ == "__main__":
-    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+def handle_signals(app):
+    """
+    Quits the app on SIGINT and SIGTERM, pending config writes are flushed before exit. Python signal handlers run
+    only once the interpreter gets control, the wakeup pipe wakes the Qt event loop for them.
+    """
+    from PySide6.QtCore import QSocketNotifier
+
+    wakeup_read, wakeup_write = os.pipe()
+    for fd in (wakeup_read, wakeup_write):
+        os.set_blocking(fd, False)
+    signal.set_wakeup_fd(wakeup_write)
+    notifier = QSocketNotifier(wakeup_read, QSocketNotifier.Type.Read, app)
+    notifier.activated.connect(lambda: os.read(wakeup_read, 64))
+
+    def quit_app(signum, frame):
+        # exit code of the default disposition
+        app.exit(128 + signum)
+
+    signal.signal(signal.SIGINT, quit_app)
+    signal.signal(signal.SIGTERM, quit_app)
+    app.aboutToQuit.connect(Config.flush)
+
+
+def run_daemon() -> int:
+    from PySide6.QtCore import QCoreApplication
+    from nvt.Daemon import Daemon
+
+    app = QCoreApplication(sys.argv)
+    handle_signals(app)
+    daemon = Daemon(parent=app)
+    if not daemon.start():
+        return 1
+    app.aboutToQuit.connect(daemon.stop)
+    return app.exec()
+
+
+def run_tray() -> int:
+    from PySide6.QtWidgets import QApplication
+    from nvt.gui import SystemTray
+    from nvt.Startup import profile, apply_theme
+    from nvt.bindings import SharedTransport, set_transport
+
+    profile.start(started, '--profile-startup' in sys.argv)
+    profile.mark('imports')
 
     app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    handle_signals(app)
+
+    transport = SharedTransport(parent=app)
+    set_transport(transport)
+
+    trayIcon = SystemTray(None)
+    transport.changed.connect(trayIcon.on_shared_changed)
+    trayIcon.show()
+    profile.mark('tray show')
+
     qss = """
     QPushButton {
         padding: 8px;
     }
-    QListWidget::item {
+    QListView::item {
         padding-top: 4px;
         padding-bottom: 4px;
     }
-    QListWidget::item:hover {
+    QListView::item:hover {
         padding-top: 4px;
         padding-bottom: 4px;
     }
     """
-    qdarktheme.setup_theme('dark', corner_shape="sharp", custom_colors={"primary": "#67e8f9"}, additional_qss=qss)
-    app.setQuitOnLastWindowClosed(False)
+    apply_theme(app, 'dark', "sharp", {"primary": "#67e8f9"}, qss)
+    profile.mark('theme')
 
-    trayIcon = SystemTray(None)
-    trayIcon.show()
+    return app.exec()
+
+
+if __name__ == "__main__":
+    if Config.get_prometheus_textfile():
+        Stats.set_textfile(os.path.join(user_data_dir(), 'nordvpn_tray.prom'))
+    Tasks.set_concurrency(Config.get_max_processes())
 
-    sys.exit(app.exec())
+    if '--headless' in sys.argv:
+        sys.exit(run_daemon())
+    sys.exit(run_tray())
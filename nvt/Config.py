@@ -1,21 +1,41 @@
+import io
 import os
+import time
+import atexit
+import logging
+import threading
 import configparser
 from typing import Optional
 from .utils import user_data_dir
+from .Recents import Recents
+
+log = logging.getLogger(__name__)
 
 config_path = os.path.join(user_data_dir(), 'config.ini')
 config = configparser.ConfigParser(default_section="app")
 config.read(config_path)
 
 LAST_CONNECTED_SECTION = 'last_connected'
+SAVE_DELAY = 1.0
+
+# mutations hold the lock, the file is written behind by a single writer thread once no mutation came
+# for SAVE_DELAY seconds. Snapshots are taken and written under write_lock so they land in order.
+lock = threading.RLock()
+changed = threading.Condition(lock)
+write_lock = threading.Lock()
+writer: Optional[threading.Thread] = None
+save_at = 0.0
+dirty = False
+save_stats = {'requested': 0, 'written': 0}
 
 
 def save_quick_connect(country: Optional[str]):
-    if country:
-        config.set(config.default_section, 'quick_connect', country)
-    else:
-        config.remove_option(config.default_section, 'quick_connect')
-    _save()
+    with lock:
+        if country:
+            config.set(config.default_section, 'quick_connect', country)
+        else:
+            config.remove_option(config.default_section, 'quick_connect')
+        _save()
 
 
 def get_quick_connect() -> Optional[str]:
@@ -23,9 +43,10 @@ def get_quick_connect() -> Optional[str]:
 
 
 def save_dimension(w: int, h: int):
-    config.set(config.default_section, 'width', str(w))
-    config.set(config.default_section, 'height', str(h))
-    _save()
+    with lock:
+        config.set(config.default_section, 'width', str(w))
+        config.set(config.default_section, 'height', str(h))
+        _save()
 
 
 def get_dimension() -> tuple[Optional[int], Optional[int]]:
@@ -34,28 +55,122 @@ def get_dimension() -> tuple[Optional[int], Optional[int]]:
     return w, h
 
 
-def get_last_connected() -> list[list[str]]:
-    items: list[list[str]] = []
+def get_prefetch_concurrency() -> int:
+    return config.getint(config.default_section, 'prefetch_concurrency', fallback=2)
 
-    for i in _get_last_connected():
-        items.append(i.split(':'))
-    return items
 
+def get_max_processes() -> int:
+    """
+    Returns: Max number of nordvpn commands run at once through the awaitable bindings API
+    """
+    return config.getint(config.default_section, 'max_processes', fallback=4)
 
-def add_last_connected(country: str, city: Optional[str], server_number: Optional[str]):
-    items = _get_last_connected()
-    v = ':'.join([country, city or '', server_number or ''])
-    if v in items:
-        items.remove(v)
 
-    items.insert(0, v)
+def get_status_interval() -> tuple[int, int]:
+    """
+    Returns: Min and max status polling interval in seconds
+    """
+    min_interval = config.getint(config.default_section, 'status_min_interval', fallback=5)
+    max_interval = config.getint(config.default_section, 'status_max_interval', fallback=300)
+    return min_interval, max_interval
+
+
+def get_servers_url() -> Optional[str]:
+    return config.get(config.default_section, 'servers_url', fallback=None)
+
+
+def get_probe_candidates() -> int:
+    return config.getint(config.default_section, 'probe_candidates', fallback=8)
+
+
+def get_prometheus_textfile() -> bool:
+    """
+    Returns: Whether command stats are exported as Prometheus textfile in user data dir
+    """
+    return config.getboolean(config.default_section, 'prometheus_textfile', fallback=False)
+
+
+def get_auto_reconnect() -> bool:
+    return config.getboolean(config.default_section, 'auto_reconnect', fallback=True)
+
+
+def get_reconnect_backoff() -> tuple[int, float, float]:
+    """
+    Returns: Max reconnect attempts, first and max delay between them in seconds
+    """
+    attempts = config.getint(config.default_section, 'reconnect_max_attempts', fallback=5)
+    base_delay = config.getfloat(config.default_section, 'reconnect_base_delay', fallback=2)
+    max_delay = config.getfloat(config.default_section, 'reconnect_max_delay', fallback=60)
+    return attempts, base_delay, max_delay
+
+
+def get_reconnect_check_interval() -> int:
+    """
+    Returns: Max seconds between status polls while the tunnel should be up
+    """
+    return config.getint(config.default_section, 'reconnect_check_interval', fallback=30)
+
 
-    if config.has_section(LAST_CONNECTED_SECTION):
-        config.remove_section(LAST_CONNECTED_SECTION)
-    config.add_section(LAST_CONNECTED_SECTION)
-    for idx, item in enumerate(items):
-        config.set(LAST_CONNECTED_SECTION, str(idx), item)
-    _save()
+def get_speedtest_urls() -> tuple[str, Optional[str]]:
+    """
+    Returns: Download and upload url of the speed test, upload is skipped when its url is empty
+    """
+    download = config.get(config.default_section, 'speedtest_download_url',
+                          fallback='https://speed.cloudflare.com/__down?bytes=100000000')
+    upload = config.get(config.default_section, 'speedtest_upload_url', fallback='https://speed.cloudflare.com/__up')
+    return download, upload or None
+
+
+def get_speedtest_options() -> tuple[int, float]:
+    """
+    Returns: Number of parallel streams and seconds measured per direction
+    """
+    streams = config.getint(config.default_section, 'speedtest_streams', fallback=4)
+    duration = config.getfloat(config.default_section, 'speedtest_duration', fallback=8)
+    return streams, duration
+
+
+def save_last_target(quick: bool, country: Optional[str], city: Optional[str] = None,
+                     server_number: Optional[str] = None):
+    """
+    Stores the target of the last successful connect, quick connects included, auto reconnect goes back to it.
+    """
+    with lock:
+        kind = 'quick' if quick else 'connect'
+        config.set(config.default_section, 'last_target',
+                   ':'.join([kind, country or '', city or '', server_number or '']))
+        _save()
+
+
+def get_last_target() -> Optional[tuple[bool, Optional[str], Optional[str], Optional[str]]]:
+    """
+    Returns: (quick, country, city, server_number) of the last successful connect
+    """
+    value = config.get(config.default_section, 'last_target', fallback=None)
+    parts = value.split(':') if value else []
+    if len(parts) != 4 or parts[0] not in ('quick', 'connect'):
+        return None
+    kind, country, city, server_number = parts
+    return kind == 'quick', country or None, city or None, server_number or None
+
+
+def get_last_connected() -> list[list[str]]:
+    """
+    Returns: [country, city, server_number] ranked by frecency
+    """
+    return [key.split(':') for key in recents.ranked()]
+
+
+def add_last_connected(country: str, city: Optional[str], server_number: Optional[str]):
+    with lock:
+        recents.add(':'.join([country, city or '', server_number or '']))
+
+        if config.has_section(LAST_CONNECTED_SECTION):
+            config.remove_section(LAST_CONNECTED_SECTION)
+        config.add_section(LAST_CONNECTED_SECTION)
+        for idx, item in enumerate(recents.dump()):
+            config.set(LAST_CONNECTED_SECTION, str(idx), item)
+        _save()
 
 
 def _get_last_connected() -> list[str]:
@@ -71,6 +186,58 @@ def _get_last_connected() -> list[str]:
     return items
 
 
+def flush():
+    """
+    Writes pending changes immediately, called on exit and by the writer thread.
+    """
+    global dirty, save_at
+    with write_lock:
+        with lock:
+            if not dirty:
+                return
+            dirty = False
+            data = io.StringIO()
+            config.write(data)
+
+        try:
+            tmp_path = config_path + '.tmp'
+            with open(tmp_path, 'w') as configfile:
+                configfile.write(data.getvalue())
+            os.replace(tmp_path, config_path)
+            save_stats['written'] += 1
+        except OSError as e:
+            log.warning(f"Cannot write config {config_path}: {e}")
+            with lock:
+                # keep the changes for the next try
+                dirty = True
+                save_at = time.monotonic() + SAVE_DELAY
+
+
+def _write_behind():
+    while True:
+        with lock:
+            while not dirty:
+                changed.wait()
+            delay = save_at - time.monotonic()
+            if delay > 0:
+                changed.wait(delay)
+                continue
+        flush()
+
+
 def _save():
-    with open(config_path, 'w') as configfile:
-        config.write(configfile)
+    global writer, dirty, save_at
+    with lock:
+        dirty = True
+        save_at = time.monotonic() + SAVE_DELAY
+        save_stats['requested'] += 1
+        if writer is None:
+            writer = threading.Thread(target=_write_behind, name='config-writer', daemon=True)
+            writer.start()
+        changed.notify()
+
+
+recents = Recents()
+recents.load(_get_last_connected())
+
+atexit.register(flush)
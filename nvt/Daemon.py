@@ -0,0 +1,246 @@
+import time
+import logging
+from dataclasses import asdict
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+from nvt import Config
+from nvt.StatusScheduler import StatusScheduler
+from nvt.NetWatcher import NetWatcher
+from nvt.bindings import StatusProcess, SettingsProcess, NVStatus, NVSettings
+from nvt.bindings.Cache import DAY
+from nvt.bindings.Process import Process, CliTransport
+from nvt.bindings.Shared import LineReader, encode, socket_path
+from nvt.bindings.utils import parse_string_list
+
+log = logging.getLogger(__name__)
+
+SETTINGS_TTL = 60
+
+
+class RawProcess(Process[None]):
+    """
+    Runs a command with the nordvpn cli and hands over its unparsed output.
+    """
+    transport = CliTransport()
+
+    on_result: Callable[[int, str, str], None]
+
+    def __init__(self, on_result: Callable[[int, str, str], None]):
+        super().__init__()
+        self.on_result = on_result
+
+    def run(self, params: list[str]):
+        return super()._start_process(params)
+
+    def _handle_result(self, code: int, stdout: str, stderr: str):
+        if not self.active:
+            return
+        super()._handle_result(code, stdout, stderr)
+        # still active while a retry is scheduled
+        if not self.active:
+            self.on_result(code, stdout, stderr)
+
+
+class SharedCommand(QObject):
+    """
+    Cached result of one nordvpn command. Concurrent requests share a single run, requests for a fresh result
+    made while a run is in progress wait for the next one.
+    """
+    updated = Signal(str)
+
+    key: str
+    ttl: float
+    parse: Callable[[str], object]
+    result: Optional[dict]
+    updated_at: float
+    process: Optional[RawProcess]
+    waiters: list[Callable[[dict], None]]
+    fresh_waiters: list[Callable[[dict], None]]
+
+    def __init__(self, key: str, ttl: float, parse: Callable[[str], object], parent=None):
+        super().__init__(parent)
+        self.key = key
+        self.ttl = ttl
+        self.parse = parse
+        self.result = None
+        self.updated_at = 0
+        self.process = None
+        self.waiters = []
+        self.fresh_waiters = []
+
+    def get(self, callback: Callable[[dict], None], fresh: bool = False):
+        if not fresh and self.result is not None and time.monotonic() - self.updated_at < self.ttl:
+            callback(self.result)
+        elif self.process and fresh:
+            self.fresh_waiters.append(callback)
+        else:
+            self.waiters.append(callback)
+            self._run()
+
+    def _run(self):
+        if not self.process:
+            self.process = RawProcess(self._finished).run([self.key])
+
+    def _finished(self, code: int, stdout: str, stderr: str):
+        self.process = None
+        changed = self.result is None or (self.result['code'], self.result['stdout']) != (code, stdout)
+        data = None
+        if code == 0 and stdout.strip():
+            try:
+                data = self.parse(stdout)
+            except Exception as e:
+                # waiters are answered with the raw output anyway
+                log.warning(f"Cannot parse nordvpn {self.key} output: {e!r}")
+        self.result = {
+            'code': code,
+            'stdout': stdout,
+            'stderr': stderr,
+            'data': data,
+            'time': time.time(),
+        }
+        self.updated_at = time.monotonic()
+
+        waiters = self.waiters
+        self.waiters = self.fresh_waiters
+        self.fresh_waiters = []
+        for callback in waiters:
+            callback(self.result)
+        if self.waiters:
+            self._run()
+        if changed:
+            self.updated.emit(self.key)
+
+
+class Daemon(QObject):
+    """
+    Headless owner of the status poller. Serves cached status, settings and countries over a unix socket
+    as newline delimited json:
+
+    - `{"id": 1, "method": "get", "key": "status", "fresh": false}` answers `{"id": 1, "result": {...}}`
+      with exit `code`, raw `stdout` and `stderr`, parsed `data` and `time` of the run
+    - `{"id": 2, "method": "subscribe", "keys": ["status"]}` pushes `{"event": "status", "result": {...}}`
+      whenever the output of a command changes, `unsubscribe` stops it
+    """
+    path: str
+    server: QLocalServer
+    commands: dict[str, SharedCommand]
+    readers: dict[QLocalSocket, LineReader]
+    subscriptions: dict[QLocalSocket, set[str]]
+    scheduler: StatusScheduler
+    net_watcher: NetWatcher
+
+    def __init__(self, path: Optional[str] = None, parent=None):
+        super().__init__(parent)
+        self.path = path or socket_path()
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self._accept)
+        self.readers = dict()
+        self.subscriptions = dict()
+
+        min_interval, max_interval = Config.get_status_interval()
+        self.commands = {
+            'status': SharedCommand('status', min_interval,
+                                    lambda data: asdict(StatusProcess.parser.parse(data, NVStatus())), self),
+            'settings': SharedCommand('settings', SETTINGS_TTL,
+                                      lambda data: asdict(SettingsProcess.parser.parse(data, NVSettings())), self),
+            'countries': SharedCommand('countries', DAY, parse_string_list, self),
+        }
+        for command in self.commands.values():
+            command.updated.connect(self._push)
+
+        self.scheduler = StatusScheduler(self._poll, min_interval, max_interval, self)
+        self.net_watcher = NetWatcher(self)
+        self.net_watcher.changed.connect(self._poll)
+
+    def start(self) -> bool:
+        probe = QLocalSocket()
+        probe.connectToServer(self.path)
+        if probe.waitForConnected(100):
+            probe.abort()
+            log.error(f"Daemon already running on {self.path}")
+            return False
+
+        QLocalServer.removeServer(self.path)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        if not self.server.listen(self.path):
+            log.error(f"Cannot listen on {self.path}: {self.server.errorString()}")
+            return False
+
+        log.info(f"Daemon listening on {self.path}")
+        self.net_watcher.start()
+        self._poll()
+        return True
+
+    def stop(self):
+        self.net_watcher.stop()
+        self.server.close()
+        QLocalServer.removeServer(self.path)
+
+    def _poll(self):
+        self.commands['status'].get(self._report, fresh=True)
+
+    def _report(self, result: dict):
+        self.scheduler.report(result['data']['status'] if result['data'] else None)
+        # clients are served from the cache as long as the scheduler waits for its next poll, changes are pushed
+        self.commands['status'].ttl = self.scheduler.interval
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self.readers[socket] = LineReader()
+            self.subscriptions[socket] = set()
+            socket.readyRead.connect(lambda s=socket: self._read(s))
+            socket.disconnected.connect(lambda s=socket: self._disconnected(s))
+
+    def _disconnected(self, socket: QLocalSocket):
+        self.readers.pop(socket, None)
+        self.subscriptions.pop(socket, None)
+        socket.deleteLater()
+
+    def _read(self, socket: QLocalSocket):
+        reader = self.readers.get(socket)
+        if reader is None:
+            return
+        for message in reader.feed(bytes(socket.readAll())):
+            self._handle(socket, message)
+
+    def _handle(self, socket: QLocalSocket, message):
+        # any json value arrives here, only objects are requests
+        if not isinstance(message, dict):
+            self._send(socket, {'id': None, 'error': "Invalid request, expected a json object"})
+            return
+        request_id = message.get('id')
+        method = message.get('method')
+        if method == 'get':
+            key = message.get('key')
+            command = self.commands.get(key) if isinstance(key, str) else None
+            if command is None:
+                self._send(socket, {'id': request_id, 'error': f"Unknown key {key}"})
+                return
+            command.get(lambda result: self._send(socket, {'id': request_id, 'result': result}),
+                        bool(message.get('fresh')))
+        elif method in ('subscribe', 'unsubscribe'):
+            keys = message.get('keys', [])
+            if not isinstance(keys, list):
+                self._send(socket, {'id': request_id, 'error': "Invalid keys, expected a list"})
+                return
+            keys = [key for key in keys if isinstance(key, str) and key in self.commands]
+            if method == 'subscribe':
+                self.subscriptions[socket].update(keys)
+            else:
+                self.subscriptions[socket].difference_update(keys)
+            self._send(socket, {'id': request_id, 'result': sorted(self.subscriptions[socket])})
+        else:
+            self._send(socket, {'id': request_id, 'error': f"Unknown method {method}"})
+
+    def _push(self, key: str):
+        message = {'event': key, 'result': self.commands[key].result}
+        for socket, keys in self.subscriptions.items():
+            if key in keys:
+                self._send(socket, message)
+
+    def _send(self, socket: QLocalSocket, message: dict):
+        # the client may have gone away while the command was running
+        if socket in self.readers:
+            socket.write(encode(message))
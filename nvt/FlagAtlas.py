@@ -0,0 +1,170 @@
+import os
+import sys
+import mmap
+import json
+import struct
+import logging
+from typing import Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Qt
+from PySide6.QtGui import QIcon, QImage, QPixmap
+from .utils import icons_dir
+
+log = logging.getLogger(__name__)
+
+MAGIC = b'NVTFLAGS'
+HEADER = struct.Struct('=8sI')
+ATLAS_NAME = 'flags.atlas'
+
+
+def build(flags_dir: str, path: str):
+    """
+    Packs all png flags into one file: header, json index {code: [offset, length]} and concatenated png data.
+    """
+    index = dict()
+    blobs = []
+    offset = 0
+    for name in sorted(os.listdir(flags_dir)):
+        code, ext = os.path.splitext(name)
+        if ext != '.png':
+            continue
+        with open(os.path.join(flags_dir, name), 'rb') as f:
+            blob = f.read()
+        index[code] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+
+    index_data = json.dumps(index, separators=(',', ':')).encode()
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(index_data)))
+        f.write(index_data)
+        for blob in blobs:
+            f.write(blob)
+
+
+class FlagAtlas:
+    """
+    Read only access to png data of flags. Uses memory mapped atlas file when present, otherwise reads
+    individual files from icons/flags.
+    """
+    flags_dir: str
+    index: Optional[dict[str, list[int]]]
+    data: Optional[mmap.mmap]
+    data_offset: int
+
+    def __init__(self, path: str, flags_dir: str):
+        self.flags_dir = flags_dir
+        self.index = None
+        self.data = None
+        self.data_offset = 0
+
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, index_length = HEADER.unpack_from(self.data)
+            if magic != MAGIC:
+                raise ValueError('invalid header')
+            self.index = json.loads(self.data[HEADER.size:HEADER.size + index_length])
+            self.data_offset = HEADER.size + index_length
+        except (OSError, ValueError, struct.error) as e:
+            log.warning(f"Cannot read flag atlas {path}: {e}")
+            self.index = None
+            self.data = None
+
+    def get(self, code: str) -> Optional[bytes]:
+        code = code.lower()
+        if self.index is not None:
+            entry = self.index.get(code)
+            if entry is None:
+                return None
+            start = self.data_offset + entry[0]
+            return self.data[start:start + entry[1]]
+
+        path = os.path.join(self.flags_dir, f"{code}.png")
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+class _DecodeTask(QRunnable):
+    def __init__(self, icons: 'FlagIcons', code: str):
+        super().__init__()
+        self.icons = icons
+        self.code = code
+
+    def run(self):
+        data = self.icons.atlas.get(self.code)
+        image = QImage.fromData(data, 'PNG') if data else QImage()
+        self.icons.decoded.emit(self.code, image)
+
+
+class FlagIcons(QObject):
+    """
+    Lazily created flag icons. `icon` returns the placeholder and decodes the flag in the global thread pool,
+    `loaded` is emitted on GUI thread once the icon is available.
+    """
+    decoded = Signal(str, QImage)
+    loaded = Signal(str)
+
+    atlas: FlagAtlas
+    icons: dict[str, Optional[QIcon]]
+    pending: set[str]
+    placeholder: QIcon
+
+    def __init__(self, atlas: FlagAtlas, parent=None):
+        super().__init__(parent)
+        self.atlas = atlas
+        self.icons = dict()
+        self.pending = set()
+        self.decoded.connect(self._on_decoded)
+
+        pixmap = QPixmap(64, 48)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        self.placeholder = QIcon(pixmap)
+
+    def icon(self, code: Optional[str]) -> Optional[QIcon]:
+        if not code:
+            return None
+        code = code.lower()
+        if code in self.icons:
+            return self.icons[code]
+        if code not in self.pending:
+            self.pending.add(code)
+            QThreadPool.globalInstance().start(_DecodeTask(self, code))
+        return self.placeholder
+
+    def load(self, code: Optional[str]) -> Optional[QIcon]:
+        """
+        Returns: Icon decoded synchronously on the calling thread
+        """
+        if not code:
+            return None
+        code = code.lower()
+        if code not in self.icons:
+            data = self.atlas.get(code)
+            self.icons[code] = QIcon(QPixmap.fromImage(QImage.fromData(data, 'PNG'))) if data else None
+        return self.icons[code]
+
+    def _on_decoded(self, code: str, image: QImage):
+        self.pending.discard(code)
+        if code not in self.icons:
+            self.icons[code] = None if image.isNull() else QIcon(QPixmap.fromImage(image))
+        self.loaded.emit(code)
+
+
+atlas = FlagAtlas(os.path.join(icons_dir(), ATLAS_NAME), os.path.join(icons_dir(), 'flags'))
+_flag_icons: Optional[FlagIcons] = None
+
+
+def flag_icons() -> FlagIcons:
+    global _flag_icons
+    if _flag_icons is None:
+        _flag_icons = FlagIcons(atlas)
+    return _flag_icons
+
+
+if __name__ == '__main__':
+    flags_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'icons', 'flags')
+    build(flags_path, sys.argv[1] if len(sys.argv) > 1 else os.path.join(flags_path, '..', ATLAS_NAME))
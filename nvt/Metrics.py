@@ -0,0 +1,187 @@
+import os
+import re
+import time
+import struct
+import logging
+from array import array
+from typing import Optional
+from .utils import user_data_dir
+from .NetWatcher import is_vpn_interface
+
+log = logging.getLogger(__name__)
+
+UNITS = {'b': 1, 'kib': 1 << 10, 'mib': 1 << 20, 'gib': 1 << 30, 'tib': 1 << 40,
+         'kb': 10 ** 3, 'mb': 10 ** 6, 'gb': 10 ** 9, 'tb': 10 ** 12}
+TRANSFER_RE = re.compile(r"(?P<value>[\d.]+)\s*(?P<unit>[a-z]+)\s+(?P<direction>received|sent)", re.IGNORECASE)
+UPTIME_RE = re.compile(r"(?P<value>\d+)\s*(?P<unit>day|hour|minute|second)s?", re.IGNORECASE)
+UPTIME_UNITS = {'day': 86400, 'hour': 3600, 'minute': 60, 'second': 1}
+SPARKS = '▁▂▃▄▅▆▇█'
+RECORD = struct.Struct('=dddd')
+SYS_NET = '/sys/class/net'
+
+
+def parse_transfer(transfer: Optional[str]) -> Optional[tuple[float, float]]:
+    """
+    Returns: (received, sent) bytes from `1.42 GiB received, 86.21 MiB sent`
+    """
+    if not transfer:
+        return None
+    values = dict()
+    for result in TRANSFER_RE.finditer(transfer):
+        unit = UNITS.get(result.group('unit').lower())
+        if unit is not None:
+            values[result.group('direction').lower()] = float(result.group('value')) * unit
+    if len(values) != 2:
+        return None
+    return values['received'], values['sent']
+
+
+def read_counters(sys_net: str = SYS_NET) -> Optional[tuple[float, float]]:
+    """
+    Returns: (received, sent) bytes of the VPN interface from its kernel statistics, None when there is none
+    """
+    try:
+        names = sorted(name for name in os.listdir(sys_net) if is_vpn_interface(name))
+        for name in names:
+            statistics = os.path.join(sys_net, name, 'statistics')
+            with open(os.path.join(statistics, 'rx_bytes')) as rx, open(os.path.join(statistics, 'tx_bytes')) as tx:
+                return float(rx.read()), float(tx.read())
+    except (OSError, ValueError) as e:
+        log.debug(f"Cannot read interface counters: {e}")
+    return None
+
+
+def parse_uptime(uptime: Optional[str]) -> Optional[int]:
+    """
+    Returns: Seconds from `2 hours 17 minutes 41 seconds`
+    """
+    if not uptime:
+        return None
+    seconds = 0
+    found = False
+    for result in UPTIME_RE.finditer(uptime):
+        seconds += int(result.group('value')) * UPTIME_UNITS[result.group('unit').lower()]
+        found = True
+    return seconds if found else None
+
+
+def format_rate(rate: float) -> str:
+    for unit in ('B', 'KiB', 'MiB'):
+        if rate < 1024:
+            return f"{rate:.0f} {unit}/s" if unit == 'B' else f"{rate:.1f} {unit}/s"
+        rate /= 1024
+    return f"{rate:.1f} GiB/s"
+
+
+def sparkline(values: list[float]) -> str:
+    if not values:
+        return ''
+    top = max(values) or 1
+    return ''.join(SPARKS[min(len(SPARKS) - 1, int(v / top * len(SPARKS)))] for v in values)
+
+
+class RingBuffer:
+    """
+    Fixed size buffer of (time, received, sent, uptime) samples in typed arrays.
+    `push` returns the overwritten sample once the buffer is full.
+    """
+    capacity: int
+    columns: tuple[array, array, array, array]
+    start: int
+    size: int
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = tuple(array('d', bytes(8 * capacity)) for _ in range(4))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def push(self, sample: tuple[float, float, float, float]) -> Optional[tuple[float, float, float, float]]:
+        evicted = None
+        if self.size == self.capacity:
+            evicted = self[0]
+            idx = self.start
+            self.start = (self.start + 1) % self.capacity
+        else:
+            idx = (self.start + self.size) % self.capacity
+            self.size += 1
+        for column, value in zip(self.columns, sample):
+            column[idx] = value
+        return evicted
+
+    def __getitem__(self, i: int) -> tuple[float, float, float, float]:
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError(i)
+        idx = (self.start + i) % self.capacity
+        return tuple(column[idx] for column in self.columns)
+
+    def clear(self):
+        self.start = 0
+        self.size = 0
+
+
+class MetricsRecorder:
+    """
+    Keeps throughput and uptime samples of the current and past connections in a ring buffer,
+    older samples are appended to a fixed size binary file in user data dir.
+
+    Byte counts are read from the kernel statistics of the VPN interface, the rounded transfer of the CLI
+    status is only used when the interface counters cannot be read.
+    """
+    buffer: RingBuffer
+    spill_path: str
+    spill_limit: int
+    sys_net: str
+
+    def __init__(self, capacity: int = 720, spill_limit: int = 1 << 20, spill_path: Optional[str] = None,
+                 sys_net: str = SYS_NET):
+        self.buffer = RingBuffer(capacity)
+        self.spill_path = spill_path or os.path.join(user_data_dir(), 'metrics.bin')
+        self.spill_limit = spill_limit
+        self.sys_net = sys_net
+
+    def record(self, transfer: Optional[str], uptime: Optional[str], now: Optional[float] = None) -> bool:
+        parsed = read_counters(self.sys_net) or parse_transfer(transfer)
+        if parsed is None:
+            return False
+        seconds = parse_uptime(uptime) or 0
+        evicted = self.buffer.push((now or time.time(), parsed[0], parsed[1], seconds))
+        if evicted:
+            self._spill(evicted)
+        return True
+
+    def rates(self, count: int = 20) -> list[tuple[float, float]]:
+        """
+        Returns: (received, sent) bytes per second between the last `count` + 1 samples,
+        counter resets of a new connection are skipped
+        """
+        rates = []
+        first = max(1, len(self.buffer) - count)
+        for i in range(first, len(self.buffer)):
+            t0, rx0, tx0, _ = self.buffer[i - 1]
+            t1, rx1, tx1, _ = self.buffer[i]
+            if t1 <= t0 or rx1 < rx0 or tx1 < tx0:
+                continue
+            rates.append(((rx1 - rx0) / (t1 - t0), (tx1 - tx0) / (t1 - t0)))
+        return rates
+
+    def summary(self) -> str:
+        rates = self.rates()
+        if not rates:
+            return ''
+        rx, tx = rates[-1]
+        return f"↓ {format_rate(rx)}  ↑ {format_rate(tx)}  {sparkline([r[0] + r[1] for r in rates])}"
+
+    def _spill(self, sample: tuple[float, float, float, float]):
+        try:
+            if os.path.isfile(self.spill_path) and os.path.getsize(self.spill_path) >= self.spill_limit:
+                os.replace(self.spill_path, self.spill_path + '.1')
+            with open(self.spill_path, 'ab') as f:
+                f.write(RECORD.pack(*sample))
+        except OSError as e:
+            log.warning(f"Cannot write metrics {self.spill_path}: {e}")
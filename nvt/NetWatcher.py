@@ -0,0 +1,179 @@
+import os
+import errno
+import select
+import socket
+import struct
+import logging
+from typing import Optional
+from PySide6.QtCore import QCoreApplication, QObject, QThread, QTimer, Signal
+
+log = logging.getLogger(__name__)
+
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+
+IFLA_IFNAME = 3
+IFA_LABEL = 3
+
+NLMSG_HEADER = struct.Struct('=IHHII')
+IFINFOMSG = struct.Struct('=BxHiII')
+IFADDRMSG = struct.Struct('=BBBBi')
+RTATTR = struct.Struct('=HH')
+
+
+def is_vpn_interface(name: Optional[str]) -> bool:
+    return bool(name) and (name == 'nordlynx' or name.startswith('tun'))
+
+
+def _align(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def _attributes(data: bytes, offset: int, end: int) -> dict[int, bytes]:
+    attrs = dict()
+    while offset + RTATTR.size <= end:
+        length, kind = RTATTR.unpack_from(data, offset)
+        if length < RTATTR.size:
+            break
+        attrs[kind] = data[offset + RTATTR.size:offset + length]
+        offset += _align(length)
+    return attrs
+
+
+def _name(value: Optional[bytes]) -> Optional[str]:
+    if value is None:
+        return None
+    return value.split(b'\0', 1)[0].decode(errors='replace')
+
+
+def parse_events(data: bytes, names: dict[int, str]) -> list[str]:
+    """
+    Parses a buffer of rtnetlink messages. `names` maps interface index to name and is kept up to date
+    by link messages, address messages of IPv6 have no label and are resolved through it.
+    Returns: Names of interfaces touched by link and address messages
+    """
+    touched = []
+    offset = 0
+    while offset + NLMSG_HEADER.size <= len(data):
+        length, kind, _, _, _ = NLMSG_HEADER.unpack_from(data, offset)
+        if length < NLMSG_HEADER.size or offset + length > len(data):
+            break
+        body = offset + NLMSG_HEADER.size
+        end = offset + length
+
+        if kind in (RTM_NEWLINK, RTM_DELLINK) and body + IFINFOMSG.size <= end:
+            index = IFINFOMSG.unpack_from(data, body)[2]
+            name = _name(_attributes(data, body + IFINFOMSG.size, end).get(IFLA_IFNAME)) or names.get(index)
+            if kind == RTM_NEWLINK and name:
+                names[index] = name
+            else:
+                names.pop(index, None)
+            if name:
+                touched.append(name)
+        elif kind in (RTM_NEWADDR, RTM_DELADDR) and body + IFADDRMSG.size <= end:
+            index = IFADDRMSG.unpack_from(data, body)[4]
+            name = _name(_attributes(data, body + IFADDRMSG.size, end).get(IFA_LABEL)) or names.get(index)
+            if not name:
+                try:
+                    name = socket.if_indextoname(index)
+                except OSError:
+                    name = None
+            if name:
+                touched.append(name)
+
+        offset += _align(length)
+    return touched
+
+
+class NetlinkReader(QThread):
+    changed = Signal()
+
+    sock: socket.socket
+    stop_read: int
+    stop_write: int
+
+    def __init__(self, sock: socket.socket, parent=None):
+        super().__init__(parent)
+        self.sock = sock
+        self.stop_read, self.stop_write = os.pipe()
+
+    def run(self):
+        names = {index: name for index, name in socket.if_nameindex()}
+        while True:
+            readable, _, _ = select.select([self.sock, self.stop_read], [], [])
+            if self.stop_read in readable:
+                break
+            try:
+                data = self.sock.recv(65536)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # the kernel dropped events of a burst, names are read again and status is reloaded to resync
+                    log.info("Netlink receive buffer overrun, resyncing")
+                    names = {index: name for index, name in socket.if_nameindex()}
+                    self.changed.emit()
+                    continue
+                log.error(f"Netlink read failed: {e}")
+                break
+            if any(is_vpn_interface(name) for name in parse_events(data, names)):
+                self.changed.emit()
+
+        self.sock.close()
+
+    def stop(self):
+        # the pipe stays open until the thread is joined, even when it ended on a read error
+        os.write(self.stop_write, b'\0')
+        self.wait()
+        os.close(self.stop_read)
+        os.close(self.stop_write)
+
+
+class NetWatcher(QObject):
+    """
+    Watches rtnetlink link and address events of VPN interfaces (nordlynx, tun*) off the GUI thread
+    and emits debounced `changed`.
+    """
+    DEBOUNCE = 500
+
+    changed = Signal()
+
+    reader: Optional[NetlinkReader]
+    debounce_timer: QTimer
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.reader = None
+
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.changed)
+
+    def start(self) -> bool:
+        if self.reader:
+            return True
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        except (AttributeError, OSError) as e:
+            log.warning(f"Cannot watch network interfaces: {e}")
+            return False
+
+        self.reader = NetlinkReader(sock, self)
+        self.reader.changed.connect(self._on_change)
+        self.reader.start()
+        QCoreApplication.instance().aboutToQuit.connect(self.stop)
+        return True
+
+    def stop(self):
+        self.debounce_timer.stop()
+        if self.reader:
+            self.reader.stop()
+            self.reader = None
+
+    def _on_change(self):
+        self.debounce_timer.start(self.DEBOUNCE)
@@ -0,0 +1,132 @@
+import time
+import socket
+import asyncio
+import logging
+import threading
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+log = logging.getLogger(__name__)
+
+
+class LatencyProbe:
+    """
+    Measures TCP handshake latency to many hosts concurrently. Hosts are resolved before the handshake is timed,
+    so a cold DNS cache does not count as latency. Results (None for unreachable hosts)
+    are cached until they expire. The cache is shared by runs in thread pool workers and guarded by a lock.
+    """
+    port: int
+    timeout: float
+    concurrency: int
+    ttl: float
+    cache: dict[str, tuple[float, Optional[float]]]
+    lock: threading.Lock
+
+    def __init__(self, port: int = 443, timeout: float = 1.5, concurrency: int = 16, ttl: float = 300):
+        self.port = port
+        self.timeout = timeout
+        self.concurrency = max(1, concurrency)
+        self.ttl = ttl
+        self.cache = dict()
+        self.lock = threading.Lock()
+
+    def run(self, hosts: list[str]) -> dict[str, Optional[float]]:
+        return asyncio.run(self.probe_many(hosts))
+
+    async def probe_many(self, hosts: list[str]) -> dict[str, Optional[float]]:
+        """
+        Returns: Latency in seconds for every host
+        """
+        now = time.monotonic()
+        results = dict()
+        missing = []
+        with self.lock:
+            for host in hosts:
+                cached = self.cache.get(host)
+                if cached and cached[0] > now:
+                    results[host] = cached[1]
+                else:
+                    missing.append(host)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies = await asyncio.gather(*(self._probe(semaphore, host) for host in missing))
+        expires = time.monotonic() + self.ttl
+        with self.lock:
+            for host, latency in zip(missing, latencies):
+                self.cache[host] = (expires, latency)
+                results[host] = latency
+        return results
+
+    async def _probe(self, semaphore: asyncio.Semaphore, host: str) -> Optional[float]:
+        async with semaphore:
+            try:
+                address = await asyncio.wait_for(self._resolve(host), self.timeout)
+                start = time.perf_counter()
+                writer = await asyncio.wait_for(self._connect(address), self.timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                log.debug(f"Probe {host} failed: {e!r}")
+                return None
+            latency = time.perf_counter() - start
+            writer.close()
+            return latency
+
+    async def _resolve(self, host: str) -> str:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, self.port, type=socket.SOCK_STREAM)
+        return infos[0][4][0]
+
+    async def _connect(self, address: str) -> asyncio.StreamWriter:
+        _, writer = await asyncio.open_connection(address, self.port)
+        return writer
+
+
+def fastest(results: dict[str, Optional[float]]) -> Optional[str]:
+    reachable = [(latency, host) for host, latency in results.items() if latency is not None]
+    return min(reachable)[1] if reachable else None
+
+
+class _ProbeTask(QRunnable):
+    def __init__(self, search: 'FastestServer', hosts: list[str]):
+        super().__init__()
+        self.search = search
+        self.hosts = hosts
+
+    def run(self):
+        self.search.probed.emit(self.search.probe.run(self.hosts))
+
+
+class FastestServer(QObject):
+    """
+    Probes candidate hosts in the thread pool and reports the fastest one. Deletes itself after reporting.
+    """
+    probed = Signal(object)
+
+    probe: LatencyProbe
+    on_finish: Optional[Callable[[str], None]]
+    on_error: Optional[Callable[[str], None]]
+
+    def __init__(self, probe: LatencyProbe, on_finish: Optional[Callable[[str], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None, parent=None):
+        super().__init__(parent)
+        self.probe = probe
+        self.on_finish = on_finish
+        self.on_error = on_error
+        self.probed.connect(self._probed)
+
+    def run(self, hosts: list[str]):
+        QThreadPool.globalInstance().start(_ProbeTask(self, hosts))
+        return self
+
+    def _probed(self, results: dict[str, Optional[float]]):
+        host = fastest(results)
+        if host:
+            log.debug(f"Fastest of {len(results)} servers: {host} {results[host] * 1000:.0f} ms")
+            if self.on_finish:
+                self.on_finish(host)
+        elif self.on_error:
+            self.on_error("No server responded")
+        self.on_finish = None
+        self.on_error = None
+        self.deleteLater()
+
+
+latency_probe = LatencyProbe()
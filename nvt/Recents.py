@@ -0,0 +1,57 @@
+import time
+from typing import Optional
+
+DAY = 60 * 60 * 24
+
+
+class Recents:
+    """
+    Capped store of recently used keys ranked by frecency: use count decayed by the time since the last use.
+    Updates are O(1), eviction and ranking are bounded by the cap.
+    """
+    max_items: int
+    half_life: float
+    entries: dict[str, tuple[int, float]]
+
+    def __init__(self, max_items: int = 10, half_life: float = 7 * DAY):
+        self.max_items = max_items
+        self.half_life = half_life
+        self.entries = dict()
+
+    def add(self, key: str, now: Optional[float] = None):
+        now = now or time.time()
+        count, _ = self.entries.get(key, (0, now))
+        self.entries[key] = (count + 1, now)
+        if len(self.entries) > self.max_items:
+            # the key just used is never the one evicted, even when its decayed score is the lowest
+            del self.entries[min((k for k in self.entries if k != key), key=lambda k: self.score(k, now))]
+
+    def score(self, key: str, now: Optional[float] = None) -> float:
+        count, last_used = self.entries[key]
+        return count * 0.5 ** (((now or time.time()) - last_used) / self.half_life)
+
+    def ranked(self) -> list[str]:
+        now = time.time()
+        return sorted(self.entries, key=lambda k: self.score(k, now), reverse=True)
+
+    def dump(self) -> list[str]:
+        """
+        Returns: Ranked entries as `key|count|timestamp`
+        """
+        return [f"{key}|{self.entries[key][0]}|{int(self.entries[key][1])}" for key in self.ranked()]
+
+    def load(self, lines: list[str]):
+        """
+        Loads entries written by dump, bare keys (old format) count as one use, older the later they are listed.
+        """
+        now = time.time()
+        self.entries.clear()
+        for idx, line in enumerate(lines):
+            parts = line.rsplit('|', 2)
+            if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+                self.entries[parts[0]] = (int(parts[1]), float(parts[2]))
+            else:
+                self.entries[line] = (1, now - idx)
+        if len(self.entries) > self.max_items:
+            kept = sorted(self.entries, key=lambda k: self.score(k, now), reverse=True)[:self.max_items]
+            self.entries = {key: self.entries[key] for key in kept}
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import logging
+import statistics
+from typing import Iterable, Optional
+from nvt.bindings import NVStatus
+from .SpeedTest import SpeedResult
+from .utils import user_data_dir
+
+log = logging.getLogger(__name__)
+
+MAX_SAMPLES = 5
+
+
+def result_key(host: str, technology: Optional[str], protocol: Optional[str]) -> str:
+    return '|'.join([host.lower(), (technology or '').lower(), (protocol or '').lower()])
+
+
+class SpeedResults:
+    """
+    Last speed test results per (host, technology, protocol), at most MAX_SAMPLES each. Servers are ranked by
+    the median download of their samples so a single lucky or unlucky run does not decide.
+    """
+    path: str
+    samples: dict[str, list[tuple[float, Optional[float], Optional[float]]]]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.samples = dict()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            log.warning(f"Cannot read speed results {self.path}: {e}")
+            return
+        self.samples = {key: [tuple(sample) for sample in samples] for key, samples in data.items()}
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.samples, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+
+    def add(self, status: NVStatus, result: SpeedResult, now: Optional[float] = None):
+        """
+        Stores result of a test run through the tunnel described by status.
+        """
+        if not status.host:
+            return
+        samples = self.samples.setdefault(result_key(status.host, status.technology, status.protocol), [])
+        samples.append((now or time.time(), result.download, result.upload))
+        del samples[:-MAX_SAMPLES]
+        self.save()
+
+    def score(self, host: str, technology: Optional[str] = None, protocol: Optional[str] = None) -> Optional[float]:
+        """
+        Returns: Median download in bytes per second of host, the best one of all technologies and protocols
+        which are not given
+        """
+        return self._scores({host.lower()}, technology, protocol).get(host.lower())
+
+    def ranked(self, hosts: Iterable[str], technology: Optional[str] = None,
+               protocol: Optional[str] = None) -> list[tuple[str, float]]:
+        """
+        Returns: (host, score) of the tested hosts, fastest first
+        """
+        scores = self._scores({host.lower() for host in hosts}, technology, protocol)
+        return sorted(scores.items(), key=lambda s: s[1], reverse=True)
+
+    def _scores(self, hosts: set[str], technology: Optional[str], protocol: Optional[str]) -> dict[str, float]:
+        # one pass over the results, there are far fewer of them than servers in a country
+        scores = dict()
+        for key, samples in self.samples.items():
+            host, key_technology, key_protocol = key.split('|')
+            if host not in hosts or (technology and key_technology != technology.lower()) or \
+                    (protocol and key_protocol != protocol.lower()):
+                continue
+            downloads = [download for _, download, _ in samples if download is not None]
+            if downloads:
+                scores[host] = max(scores.get(host, 0), statistics.median(downloads))
+        return scores
+
+
+_speed_results: Optional[SpeedResults] = None
+
+
+def speed_results() -> SpeedResults:
+    global _speed_results
+    if _speed_results is None:
+        _speed_results = SpeedResults(os.path.join(user_data_dir(), 'speed_results.json'))
+        _speed_results.load()
+    return _speed_results
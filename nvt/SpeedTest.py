@@ -0,0 +1,215 @@
+import ssl
+import time
+import socket
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+log = logging.getLogger(__name__)
+
+HEADER_END = b'\r\n\r\n'
+MAX_HEADER = 16384
+
+
+class SpeedTestError(Exception):
+    pass
+
+
+@dataclass
+class SpeedResult:
+    """
+    Throughput in bytes per second, None when the direction was not measured.
+    """
+    download: Optional[float]
+    upload: Optional[float]
+
+
+class SpeedTest:
+    """
+    Measures HTTP throughput with parallel streams, each one a thread with its own connection. Download reads
+    with `recv_into` a buffer allocated once per stream, upload sends a prepared buffer as chunked body, so no
+    bytes are copied per read or write. Bytes moved in the `warmup` seconds of TCP slow start are not counted.
+    """
+    download_url: str
+    upload_url: Optional[str]
+    streams: int
+    duration: float
+    warmup: float
+    buffer_size: int
+    timeout: float
+
+    def __init__(self, download_url: str, upload_url: Optional[str] = None, streams: int = 4, duration: float = 8,
+                 warmup: float = 1, buffer_size: int = 1 << 18, timeout: float = 5):
+        self.download_url = download_url
+        self.upload_url = upload_url
+        self.streams = max(1, streams)
+        self.duration = duration
+        self.warmup = min(warmup, duration / 2)
+        self.buffer_size = buffer_size
+        self.timeout = timeout
+
+    def run(self) -> SpeedResult:
+        download = self.measure(self._download, self.download_url)
+        upload = self.measure(self._upload, self.upload_url) if self.upload_url else None
+        return SpeedResult(download, upload)
+
+    def measure(self, stream: Callable[[str, float, float, list, int], None], url: str) -> float:
+        """
+        Returns: Bytes per second of all streams together
+        """
+        counted = [0] * self.streams
+        errors: list[Exception] = []
+        start = time.monotonic()
+        count_from = start + self.warmup
+        deadline = start + self.duration
+
+        def run_stream(idx: int):
+            try:
+                stream(url, count_from, deadline, counted, idx)
+            except (OSError, SpeedTestError) as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run_stream, args=(idx,), daemon=True) for idx in range(self.streams)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = min(time.monotonic(), deadline) - count_from
+        total = sum(counted)
+        if not total:
+            raise SpeedTestError(f"No data transferred: {errors[0] if errors else 'empty response'}")
+        if errors:
+            log.warning(f"{len(errors)} of {self.streams} streams failed: {errors[0]}")
+        return total / elapsed
+
+    def _connect(self, url: str) -> tuple[socket.socket, str]:
+        """
+        Returns: Connected socket and the request target of url
+        """
+        parts = urlsplit(url)
+        secure = parts.scheme == 'https'
+        host = parts.hostname or ''
+        sock = socket.create_connection((host, parts.port or (443 if secure else 80)), self.timeout)
+        if secure:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        target = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        return sock, target
+
+    def _download(self, url: str, count_from: float, deadline: float, counted: list, idx: int):
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        # a finished response is requested again until the deadline
+        while time.monotonic() < deadline:
+            sock, target = self._connect(url)
+            try:
+                sock.sendall(self._request('GET', url, target))
+                body = self._read_header(sock, view)
+                if time.monotonic() >= count_from:
+                    counted[idx] += body
+                while True:
+                    received = sock.recv_into(view)
+                    now = time.monotonic()
+                    if not received or now >= deadline:
+                        break
+                    if now >= count_from:
+                        counted[idx] += received
+            finally:
+                sock.close()
+
+    def _upload(self, url: str, count_from: float, deadline: float, counted: list, idx: int):
+        chunk = b'%x\r\n' % self.buffer_size + bytes(self.buffer_size) + b'\r\n'
+        view = memoryview(chunk)
+        sock, target = self._connect(url)
+        try:
+            sock.sendall(self._request('POST', url, target, b'Transfer-Encoding: chunked\r\n'))
+            while True:
+                sock.sendall(view)
+                now = time.monotonic()
+                if now >= count_from:
+                    counted[idx] += self.buffer_size
+                if now >= deadline:
+                    break
+            sock.sendall(b'0\r\n\r\n')
+            self._read_header(sock, memoryview(bytearray(MAX_HEADER)))
+        finally:
+            sock.close()
+
+    @staticmethod
+    def _request(method: str, url: str, target: str, headers: bytes = b'') -> bytes:
+        host = urlsplit(url).netloc
+        return (f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nUser-Agent: nordvpn-tray\r\nAccept-Encoding: identity\r\n"
+                f"Connection: close\r\n").encode() + headers + b'\r\n'
+
+    @staticmethod
+    def _read_header(sock: socket.socket, view: memoryview) -> int:
+        """
+        Reads the response header into view and checks the status.
+        Returns: Number of body bytes received with the header
+        """
+        size = 0
+        while True:
+            received = sock.recv_into(view[size:])
+            if not received:
+                raise SpeedTestError("Connection closed before response header")
+            size += received
+            end = view[:size].tobytes().find(HEADER_END)
+            if end >= 0:
+                break
+            if size == len(view):
+                raise SpeedTestError("Response header too long")
+        status_line = view[:view[:size].tobytes().find(b'\r\n')].tobytes().decode(errors='replace')
+        parts = status_line.split(' ', 2)
+        if len(parts) < 2 or not parts[1].startswith('2'):
+            raise SpeedTestError(f"Unexpected response: {status_line}")
+        return size - end - len(HEADER_END)
+
+
+class _SpeedTestTask(QRunnable):
+    def __init__(self, run: 'SpeedTestRun'):
+        super().__init__()
+        self.speed_test_run = run
+
+    def run(self):
+        try:
+            self.speed_test_run.measured.emit(self.speed_test_run.test.run())
+        except (OSError, SpeedTestError) as e:
+            self.speed_test_run.failed.emit(str(e))
+
+
+class SpeedTestRun(QObject):
+    """
+    Runs a speed test in the thread pool and reports the result on the GUI thread.
+    """
+    measured = Signal(object)
+    failed = Signal(str)
+
+    test: SpeedTest
+    on_finish: Optional[Callable[[SpeedResult], None]]
+    on_error: Optional[Callable[[str], None]]
+
+    def __init__(self, test: SpeedTest, on_finish: Optional[Callable[[SpeedResult], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None, parent=None):
+        super().__init__(parent)
+        self.test = test
+        self.on_finish = on_finish
+        self.on_error = on_error
+        self.measured.connect(self._measured)
+        self.failed.connect(self._failed)
+
+    def run(self):
+        QThreadPool.globalInstance().start(_SpeedTestTask(self))
+        return self
+
+    def _measured(self, result: SpeedResult):
+        log.info(f"Speed test: download {result.download or 0:.0f} B/s, upload {result.upload or 0:.0f} B/s")
+        if self.on_finish:
+            self.on_finish(result)
+
+    def _failed(self, msg: str):
+        log.warning(f"Speed test failed: {msg}")
+        if self.on_error:
+            self.on_error(msg)
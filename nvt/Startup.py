@@ -0,0 +1,113 @@
+import os
+import re
+import time
+import logging
+from typing import Optional
+from PySide6 import __version__ as pyside_version
+from PySide6.QtWidgets import QApplication
+from .utils import user_data_dir
+
+log = logging.getLogger(__name__)
+
+SVG_URL_RE = re.compile(r"url\((?P<path>[^)]+)\)")
+
+# kept alive for the application like qdarktheme does
+_proxy_style = None
+
+
+class StartupProfile:
+    """
+    Per-phase startup timing, printed once the first status is loaded when enabled with --profile-startup.
+    """
+    enabled: bool
+    started: float
+    last: float
+    phases: list[tuple[str, float]]
+
+    def __init__(self):
+        self.enabled = False
+        self.started = self.last = time.perf_counter()
+        self.phases = []
+
+    def start(self, started: float, enabled: bool):
+        self.enabled = enabled
+        self.started = self.last = started
+
+    def mark(self, phase: str):
+        if not self.enabled or any(name == phase for name, _ in self.phases):
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for phase, duration in self.phases:
+            print(f"{phase:>16}: {duration * 1000:8.1f} ms")
+        print(f"{'total':>16}: {(self.last - self.started) * 1000:8.1f} ms")
+
+
+def load_stylesheet(path: str, key: str) -> Optional[str]:
+    """
+    Returns: Stylesheet cached in path when it was generated for key and all svg files it uses still exist
+    """
+    try:
+        with open(path) as f:
+            header = f.readline()
+            stylesheet = f.read()
+    except OSError:
+        return None
+    if header.rstrip('\n') != f"/* {key} */":
+        return None
+    if not all(os.path.isfile(match.group('path')) for match in SVG_URL_RE.finditer(stylesheet)):
+        return None
+    return stylesheet
+
+
+def save_stylesheet(path: str, key: str, stylesheet: str):
+    try:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(f"/* {key} */\n")
+            f.write(stylesheet)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning(f"Cannot cache stylesheet {path}: {e}")
+
+
+def apply_theme(app: QApplication, theme: str, corner_shape: str, custom_colors: Optional[dict[str, str]],
+                additional_qss: str):
+    """
+    Applies qdarktheme like `qdarktheme.setup_theme` does: stylesheet, palette and proxy style. The generated
+    stylesheet is cached in user data dir and generated again when the theme options, qdarktheme or Qt version
+    change, or when svg files it refers to were removed from the qdarktheme cache. The `auto` theme follows
+    the system theme and is not cached.
+    """
+    global _proxy_style
+    import qdarktheme
+
+    if theme == 'auto':
+        qdarktheme.setup_theme(theme, corner_shape=corner_shape, custom_colors=custom_colors,
+                               additional_qss=additional_qss)
+        return
+
+    from qdarktheme._proxy_style import QDarkThemeStyle
+
+    # changes the generated stylesheet, standard icons are then drawn by the proxy style
+    app.setProperty('_qdarktheme_use_setup_style', True)
+    key = repr((qdarktheme.__version__, pyside_version, theme, corner_shape, sorted((custom_colors or {}).items())))
+    path = os.path.join(user_data_dir(), 'theme.qss')
+    stylesheet = load_stylesheet(path, key)
+    if stylesheet is None:
+        stylesheet = qdarktheme.load_stylesheet(theme, corner_shape, custom_colors)
+        save_stylesheet(path, key, stylesheet)
+
+    app.setStyleSheet(stylesheet + additional_qss)
+    app.setPalette(qdarktheme.load_palette(theme, custom_colors, for_stylesheet=True))
+    if _proxy_style is None:
+        _proxy_style = QDarkThemeStyle()
+        app.setStyle(_proxy_style)
+
+profile = StartupProfile()
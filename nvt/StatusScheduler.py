@@ -0,0 +1,105 @@
+import time
+import logging
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QTimer, Slot, SLOT
+from PySide6.QtDBus import QDBusConnection
+from nvt.bindings import Stats
+
+log = logging.getLogger(__name__)
+
+TRANSITIONAL_STATUSES = ('connecting', 'disconnecting', 'reconnecting')
+BASELINE_INTERVAL = 60
+REPORT_INTERVAL = 60 * 60
+
+
+class StatusScheduler(QObject):
+    """
+    Schedules status polls. Polls with the min interval while the status changes or is transitional and backs off
+    exponentially up to the max interval while it is stable. Polling is paused while the screensaver is active.
+    """
+    poll: Callable[[], None]
+    min_interval: int
+    max_interval: int
+    interval: int
+    last_status: Optional[str]
+    paused: bool
+    spawns_at_start: int
+    started_at: float
+    reported_at: float
+    timer: QTimer
+
+    def __init__(self, poll: Callable[[], None], min_interval: int, max_interval: int, parent=None):
+        super().__init__(parent)
+        self.poll = poll
+        self.min_interval = max(1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.interval = self.min_interval
+        self.last_status = None
+        self.paused = False
+        self.spawns_at_start = self._spawns()
+        self.started_at = time.monotonic()
+        self.reported_at = self.started_at
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._tick)
+
+        bus = QDBusConnection.sessionBus()
+        if bus.isConnected():
+            bus.connect('', '/org/freedesktop/ScreenSaver', 'org.freedesktop.ScreenSaver', 'ActiveChanged', self,
+                        SLOT('set_paused(bool)'))
+
+    def report(self, status: Optional[str]):
+        """
+        Called after every status load with the loaded status or None when load failed.
+        """
+        status = status.lower() if status else None
+        if status is not None and (status in TRANSITIONAL_STATUSES or status != self.last_status):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self.last_status = status
+        self._schedule()
+        self._log_savings()
+
+    def reset(self):
+        self.interval = self.min_interval
+        self._schedule()
+
+    @Slot(bool)
+    def set_paused(self, paused: bool):
+        self.paused = paused
+        if paused:
+            self.timer.stop()
+        else:
+            self.reset()
+
+    def saved_per_hour(self) -> float:
+        """
+        Returns: Number of status spawns saved per hour compared to polling with the fixed 60 seconds interval,
+        counting every status spawn, not only the scheduled polls
+        """
+        elapsed = time.monotonic() - self.started_at
+        if elapsed <= 0:
+            return 0
+        spawns = self._spawns() - self.spawns_at_start
+        return (elapsed / BASELINE_INTERVAL - spawns) * REPORT_INTERVAL / elapsed
+
+    @staticmethod
+    def _spawns() -> int:
+        return Stats.command_stats('status').spawn.count
+
+    def _schedule(self):
+        if not self.paused:
+            self.timer.start(self.interval * 1000)
+
+    def _tick(self):
+        if self.paused:
+            return
+        self.poll()
+
+    def _log_savings(self):
+        now = time.monotonic()
+        if now - self.reported_at >= REPORT_INTERVAL:
+            self.reported_at = now
+            log.info(f"Status polling saves {self.saved_per_hour():.1f} spawns per hour, interval {self.interval}s")
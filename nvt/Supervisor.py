@@ -0,0 +1,189 @@
+import time
+import random
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional, Union
+from PySide6.QtCore import QObject, QTimer, Signal
+from nvt import Config
+from nvt.bindings import ConnectProcess, QuickConnectProcess
+from nvt.bindings.Stats import Histogram
+
+log = logging.getLogger(__name__)
+
+INCIDENT_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+TRANSITIONAL_STATUSES = ('connecting', 'disconnecting', 'reconnecting')
+MAX_INCIDENTS = 100
+
+
+@dataclass
+class Incident:
+    """
+    Unexpected drop of the tunnel. Times are monotonic, `last_seen` is the last status poll which saw it connected.
+    """
+    last_seen: float
+    detected_at: float
+    attempts: int = 0
+    recovered_at: Optional[float] = None
+
+    @property
+    def downtime(self) -> Optional[float]:
+        return None if self.recovered_at is None else self.recovered_at - self.last_seen
+
+    @property
+    def time_to_recover(self) -> Optional[float]:
+        return None if self.recovered_at is None else self.recovered_at - self.detected_at
+
+
+class ConnectionSupervisor(QObject):
+    """
+    Reconnects when the tunnel drops without the user asking for it. Fed with every loaded status by `report`,
+    a transition from connected to disconnected opens an incident and reconnects to the target of the last
+    successful connect or quick connect with exponential backoff up to `max_attempts`. While the tunnel should be
+    up, status is polled at least every `check_interval` seconds.
+    """
+    reconnecting = Signal(int, int)
+    attempt_finished = Signal()
+    recovered = Signal(object)
+    gave_up = Signal(object)
+
+    poll: Callable[[], None]
+    enabled: bool
+    max_attempts: int
+    base_delay: float
+    max_delay: float
+    expected: bool
+    last_seen: Optional[float]
+    incident: Optional[Incident]
+    incidents: deque[Incident]
+    downtime: Histogram
+    time_to_recover: Histogram
+    process: Optional[Union[ConnectProcess, QuickConnectProcess]]
+    retry_timer: QTimer
+    check_timer: QTimer
+
+    def __init__(self, poll: Callable[[], None], parent=None):
+        super().__init__(parent)
+        self.poll = poll
+        self.enabled = Config.get_auto_reconnect()
+        self.max_attempts, self.base_delay, self.max_delay = Config.get_reconnect_backoff()
+        self.expected = False
+        self.last_seen = None
+        self.incident = None
+        self.incidents = deque(maxlen=MAX_INCIDENTS)
+        self.downtime = Histogram(INCIDENT_BUCKETS)
+        self.time_to_recover = Histogram(INCIDENT_BUCKETS)
+        self.process = None
+
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self._reconnect)
+
+        self.check_timer = QTimer(self)
+        self.check_timer.setSingleShot(True)
+        self.check_timer.setInterval(Config.get_reconnect_check_interval() * 1000)
+        self.check_timer.timeout.connect(self.poll)
+
+    def report(self, status: Optional[str]):
+        """
+        Called after every status load with the loaded status or None when load failed.
+        """
+        status = status.lower() if status else None
+        now = time.monotonic()
+        if status == 'connected':
+            self.expected = True
+            self.last_seen = now
+            if self.incident:
+                self._recovered(now)
+        elif status == 'disconnected' and self.expected and self.enabled and not self.incident:
+            self.incident = Incident(self.last_seen or now, now)
+            log.warning("Tunnel dropped unexpectedly, reconnecting")
+            self._schedule()
+        elif status == 'disconnected' and self.incident and not self.process and not self.retry_timer.isActive():
+            # reconnect succeeded but the tunnel dropped again before the status load
+            self._retry(self.incident)
+        elif status == 'disconnected' and not self.incident:
+            self.expected = False
+
+        if self.expected and status not in TRANSITIONAL_STATUSES:
+            self.check_timer.start()
+        else:
+            self.check_timer.stop()
+
+    def user_action(self):
+        """
+        Called when the user connects or disconnects, an open incident is abandoned. The tunnel is expected up again
+        once a status load sees it connected.
+        """
+        if self.incident:
+            log.info(f"Reconnect abandoned by user after {self.incident.attempts} attempts")
+            self._close()
+        self.expected = False
+        self.check_timer.stop()
+
+    def summary(self) -> str:
+        recovered = self.time_to_recover.count
+        if not self.incidents:
+            return "No incidents"
+        text = f"{len(self.incidents)} incidents, {recovered} recovered"
+        if recovered:
+            text += (f", time to recover mean {self.time_to_recover.mean():.1f} s, "
+                     f"downtime mean {self.downtime.mean():.1f} s")
+        return text
+
+    def _schedule(self):
+        delay = min(self.base_delay * 2 ** self.incident.attempts, self.max_delay)
+        # jitter keeps several clients from retrying in lockstep after a server outage
+        self.retry_timer.start(int(delay * random.uniform(0.8, 1.2) * 1000))
+
+    def _reconnect(self):
+        incident = self.incident
+        if not incident:
+            return
+        incident.attempts += 1
+        self.reconnecting.emit(incident.attempts, self.max_attempts)
+
+        def error(e: str):
+            self.process = None
+            self.attempt_finished.emit()
+            if self.incident is not incident:
+                return
+            log.warning(f"Reconnect attempt {incident.attempts}/{self.max_attempts} failed: {e.strip()}")
+            self._retry(incident)
+
+        def done():
+            self.process = None
+            self.attempt_finished.emit()
+            self.poll()
+
+        target = Config.get_last_target()
+        if target and not target[0] and target[1]:
+            _, country, city, server_number = target
+            self.process = ConnectProcess(on_finish=done, on_error=error).run(country, city, server_number)
+        else:
+            country = target[1] if target else Config.get_quick_connect()
+            self.process = QuickConnectProcess(on_finish=done, on_error=error).run(country)
+
+    def _retry(self, incident: Incident):
+        if incident.attempts >= self.max_attempts:
+            self._close()
+            self.expected = False
+            self.gave_up.emit(incident)
+        else:
+            self._schedule()
+
+    def _recovered(self, now: float):
+        incident = self.incident
+        incident.recovered_at = now
+        self.downtime.observe(incident.downtime)
+        self.time_to_recover.observe(incident.time_to_recover)
+        log.info(f"Tunnel recovered after {incident.attempts} attempts, downtime {incident.downtime:.1f} s, "
+                 f"time to recover {incident.time_to_recover:.1f} s")
+        self._close()
+        self.recovered.emit(incident)
+
+    def _close(self):
+        self.retry_timer.stop()
+        self.incidents.append(self.incident)
+        self.incident = None
+        log.info(f"Reconnect incidents: {self.summary()}")
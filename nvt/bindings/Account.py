@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from typing import Optional
 from .Process import Process
-from .utils import parse_options_list
+from .utils import OptionsParser
 
 
 @dataclass
@@ -11,13 +11,15 @@ class Account:
 
 
 class AccountProcess(Process[Account]):
+    timeout = 20
+    retries = 2
+    parser = OptionsParser({
+        "email": "Email Address",
+        "status": "VPN Service",
+    })
+
     def run(self):
         return super()._start_process(['account'])
 
     def _parse_output(self, data: str) -> Account:
-        attr_map = {
-            "email": "Email Address",
-            "status": "VPN Service",
-        }
-
-        return parse_options_list(data, attr_map, Account())
+        return self.parser.parse(data, Account())
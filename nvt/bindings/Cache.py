@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import logging
+from typing import Optional
+from nvt.utils import user_data_dir
+
+log = logging.getLogger(__name__)
+
+
+class ListCache:
+    """
+    Persistent cache of string lists (countries, cities) stored as json in user data dir.
+    Entries are served even when expired, `is_fresh` tells the caller whether to revalidate.
+    """
+    path: str
+    ttl: int
+    dirty: bool
+    _entries: Optional[dict[str, dict]]
+
+    def __init__(self, name: str, ttl: int):
+        self.path = os.path.join(user_data_dir(), f"{name}.cache.json")
+        self.ttl = ttl
+        self.dirty = False
+        self._entries = None
+
+    def get(self, key: str = '') -> Optional[list[str]]:
+        entry = self._load().get(key)
+        if entry is None:
+            return None
+        return entry['items']
+
+    def is_fresh(self, key: str = '') -> bool:
+        entry = self._load().get(key)
+        if entry is None:
+            return False
+        return time.time() - entry['time'] < self.ttl
+
+    def put(self, key: str, items: list[str], save: bool = True) -> bool:
+        """
+        Stores items, the file is written later by `flush` when `save` is False.
+        Returns: True when stored items differ from the previous ones
+        """
+        entries = self._load()
+        previous = entries.get(key)
+        changed = previous is None or previous['items'] != items
+        entries[key] = {'time': time.time(), 'items': items}
+        if save:
+            self._save()
+        else:
+            self.dirty = True
+        return changed
+
+    def flush(self):
+        if self.dirty:
+            self._save()
+
+    def invalidate(self, key: str = ''):
+        """
+        Marks the entry as expired, it is still served until replaced.
+        """
+        entry = self._load().get(key)
+        if entry is not None and entry['time']:
+            entry['time'] = 0
+            self._save()
+
+    def _load(self) -> dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            if os.path.isfile(self.path):
+                try:
+                    with open(self.path) as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    log.warning(f"Cannot read cache {self.path}: {e}")
+        return self._entries
+
+    def _save(self):
+        self.dirty = False
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.dirty = True
+            log.warning(f"Cannot write cache {self.path}: {e}")
+
+
+DAY = 60 * 60 * 24
+
+countries_cache = ListCache('countries', DAY)
+cities_cache = ListCache('cities', DAY)
+settings_cache = ListCache('settings', 10 * 60)
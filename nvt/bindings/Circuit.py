@@ -0,0 +1,70 @@
+import time
+import logging
+from PySide6.QtCore import QObject, Signal
+
+log = logging.getLogger(__name__)
+
+
+class CircuitBreaker(QObject):
+    """
+    Stops starting nordvpn commands after `threshold` consecutive daemon failures (timeouts, unreachable daemon).
+    While open, one command is let through every `cooldown` seconds, its success closes the circuit.
+    `state_changed` is emitted with True when the circuit opens and False when it closes.
+    """
+    state_changed = Signal(bool)
+
+    threshold: int
+    cooldown: float
+    failures: int
+    is_open: bool
+    opened_at: float
+
+    def __init__(self, threshold: int = 3, cooldown: float = 30, parent=None):
+        super().__init__(parent)
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.is_open = False
+        self.opened_at = 0
+
+    def allow(self) -> bool:
+        if not self.is_open:
+            return True
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        # half open, the next trial waits for another cooldown
+        self.opened_at = time.monotonic()
+        return True
+
+    def retry_in(self) -> int:
+        """
+        Returns: Seconds until the next command is let through
+        """
+        return max(0, round(self.opened_at + self.cooldown - time.monotonic()))
+
+    def reset(self):
+        """
+        Closes the circuit and forgets past failures without notifying.
+        """
+        self.failures = 0
+        self.is_open = False
+        self.opened_at = 0
+
+    def record(self, success: bool):
+        if success:
+            self.failures = 0
+            if self.is_open:
+                self.is_open = False
+                log.info("NordVPN daemon is responding again")
+                self.state_changed.emit(False)
+            return
+
+        self.failures += 1
+        if not self.is_open and self.failures >= self.threshold:
+            self.is_open = True
+            self.opened_at = time.monotonic()
+            log.warning(f"NordVPN daemon failed {self.failures} times, pausing commands for {self.cooldown:g}s")
+            self.state_changed.emit(True)
+
+
+breaker = CircuitBreaker()
@@ -1,23 +1,31 @@
+from typing import Optional
 from .Process import Process
+from .Cache import cities_cache
 from .utils import parse_string_list
 
-COUNTRIES = {
-    'Albania': 'AL', 'Argentina': 'AR', 'Australia': 'AU', 'Austria': 'AT', 'Belgium': 'BE',
-    'Bosnia_And_Herzegovina': 'BA', 'Brazil': 'BR', 'Bulgaria': 'BG', 'Canada': 'CA', 'Chile': 'CL', 'Colombia': 'CO',
-    'Costa_Rica': 'CR', 'Croatia': 'HR', 'Cyprus': 'CY', 'Czech_Republic': 'CZ', 'Denmark': 'DK', 'Estonia': 'EE',
-    'Finland': 'FI', 'France': 'FR', 'Georgia': 'GE', 'Germany': 'DE', 'Greece': 'GR', 'Hong_Kong': 'HK',
-    'Hungary': 'HU', 'Iceland': 'IS', 'Indonesia': 'ID', 'Ireland': 'IE', 'Israel': 'IL', 'Italy': 'IT', 'Japan': 'JP',
-    'Latvia': 'LV', 'Lithuania': 'LT', 'Luxembourg': 'LU', 'Malaysia': 'MY', 'Mexico': 'MX', 'Moldova': 'MD',
-    'Netherlands': 'NL', 'New_Zealand': 'NZ', 'North_Macedonia': 'MK', 'Norway': 'NO', 'Poland': 'PL', 'Portugal': 'PT',
-    'Romania': 'RO', 'Serbia': 'RS', 'Singapore': 'SG', 'Slovakia': 'SK', 'Slovenia': 'SI', 'South_Africa': 'ZA',
-    'South_Korea': 'KR', 'Spain': 'ES', 'Sweden': 'SE', 'Switzerland': 'CH', 'Taiwan': 'TW', 'Thailand': 'TH',
-    'Turkey': 'TR', 'Ukraine': 'UA', 'United_Kingdom': 'GB', 'United_States': 'US', 'Vietnam': 'VN',
-}
-
 
 class CitiesProcess(Process[list[str]]):
+    timeout = 20
+    retries = 2
+    country: Optional[str] = None
+    # cache file is written by the caller with `cities_cache.flush` when False
+    persist: bool = True
+
     def run(self, country: str):
+        self.country = country
         return super()._start_process(['cities', country])
 
+    @staticmethod
+    def cached(country: str) -> Optional[list[str]]:
+        return cities_cache.get(country)
+
+    @staticmethod
+    def is_fresh(country: str) -> bool:
+        return cities_cache.is_fresh(country)
+
     def _parse_output(self, data: str) -> list[str]:
         return parse_string_list(data)
+
+    def _store_result(self, data: str, result: list[str]):
+        if self.country:
+            cities_cache.put(self.country, result, save=self.persist)
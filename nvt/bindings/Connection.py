@@ -1,8 +1,13 @@
+import re
 from typing import Optional
 from dataclasses import dataclass
-from .utils import parse_options_list
+from .utils import OptionsParser
 from .Process import Process
-from .Countries import NV_COUNTRIES
+from .CountryRegistry import countries
+from .Servers import server_catalog
+
+CONNECTED_RE = re.compile(r"you are connected to", re.IGNORECASE)
+DISCONNECTED_RE = re.compile(r"you are disconnected from", re.IGNORECASE)
 
 
 @dataclass
@@ -19,41 +24,53 @@ class NVStatus:
 
 
 class StatusProcess(Process[NVStatus]):
+    timeout = 10
+    retries = 2
+    parser = OptionsParser({
+        "status": "Status",
+        "country": "Country",
+        "city": "City",
+        "host": "Hostname",
+        "ip": "IP",
+        "technology": "Current technology",
+        "protocol": "Current protocol",
+        "transfer": "Transfer",
+        "uptime": "Uptime",
+    })
+
     def run(self):
         return super()._start_process(['status'])
 
     def _parse_output(self, data: str) -> NVStatus:
-        attr_map = {
-            "status": "Status",
-            "country": "Country",
-            "city": "City",
-            "host": "Hostname",
-            "ip": "IP",
-            "technology": "Current technology",
-            "protocol": "Current protocol",
-            "transfer": "Transfer",
-            "uptime": "Uptime",
-        }
-
-        return parse_options_list(data, attr_map, NVStatus())
+        return self.parser.parse(data, NVStatus())
 
 
 class QuickConnectProcess(Process[None]):
-    def run(self, country: Optional[str]):
+    timeout = 90
+    success_re = CONNECTED_RE
+
+    def run(self, country: Optional[str], server: Optional[str] = None):
         params = ['connect']
-        if country:
+        if server:
+            params.append(server)
+        elif country:
             params.append(country)
         return super()._start_process(params)
 
 
 class ConnectProcess(Process[None]):
+    timeout = 90
+    success_re = CONNECTED_RE
+
     def run(self, country: str, city: Optional[str], server_number: Optional[str]):
         params = ["connect"]
-        if server_number:
-            country_code = NV_COUNTRIES.get(country)
-            if not country_code:
-                return
-            params.append(f"{country_code}{server_number}")
+        country_code = countries.code(country)
+        if server_number and country_code:
+            server = server_catalog().find(country_code, server_number)
+            if server:
+                params.append(server.host.split('.')[0])
+            else:
+                params.append(f"{country_code}{server_number}")
         else:
             params.append(country)
             if city:
@@ -63,5 +80,8 @@ class ConnectProcess(Process[None]):
 
 
 class DisconnectProcess(Process[None]):
+    timeout = 30
+    success_re = DISCONNECTED_RE
+
     def run(self):
         return super()._start_process(["disconnect"])
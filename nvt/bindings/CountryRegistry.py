@@ -0,0 +1,335 @@
+import os
+import sys
+from typing import Optional
+
+# code|display name|aliases..., one entry for every flag in icons/flags, names as used by the nordvpn cli
+# (spaces as underscores) are matched with the display name or an alias
+DATA = """\
+AC|Ascension Island
+AD|Andorra
+AE|United Arab Emirates|UAE
+AF|Afghanistan
+AG|Antigua and Barbuda
+AI|Anguilla
+AL|Albania
+AM|Armenia
+AO|Angola
+AQ|Antarctica
+AR|Argentina
+AS|American Samoa
+AT|Austria
+AU|Australia
+AW|Aruba
+AX|Aland Islands|Åland Islands
+AZ|Azerbaijan
+BA|Bosnia and Herzegovina|Bosnia
+BB|Barbados
+BD|Bangladesh
+BE|Belgium
+BF|Burkina Faso
+BG|Bulgaria
+BH|Bahrain
+BI|Burundi
+BJ|Benin
+BL|Saint Barthelemy|Saint Barthélemy
+BM|Bermuda
+BN|Brunei|Brunei Darussalam
+BO|Bolivia|Bolivia, Plurinational State of
+BQ|Caribbean Netherlands|Bonaire, Sint Eustatius and Saba
+BR|Brazil
+BS|Bahamas|The Bahamas
+BT|Bhutan
+BV|Bouvet Island
+BW|Botswana
+BY|Belarus
+BZ|Belize
+CA|Canada
+CC|Cocos Islands|Cocos (Keeling) Islands
+CD|DR Congo|Democratic Republic of the Congo|Congo, The Democratic Republic of the
+CEFTA|Central European Free Trade Agreement|CEFTA
+CF|Central African Republic
+CG|Republic of the Congo|Congo
+CH|Switzerland
+CI|Ivory Coast|Cote d'Ivoire|Côte d'Ivoire
+CK|Cook Islands
+CL|Chile
+CM|Cameroon
+CN|China
+CO|Colombia
+CP|Clipperton Island
+CR|Costa Rica
+CU|Cuba
+CV|Cape Verde|Cabo Verde
+CW|Curacao|Curaçao
+CX|Christmas Island
+CY|Cyprus
+CZ|Czech Republic|Czechia
+DE|Germany
+DG|Diego Garcia
+DJ|Djibouti
+DK|Denmark
+DM|Dominica
+DO|Dominican Republic
+DZ|Algeria
+EA|Ceuta and Melilla
+EC|Ecuador
+EE|Estonia
+EG|Egypt
+EH|Western Sahara
+ER|Eritrea
+ES|Spain
+ES-CT|Catalonia
+ES-GA|Galicia
+ES-PV|Basque Country
+ET|Ethiopia
+EU|European Union
+FI|Finland
+FJ|Fiji
+FK|Falkland Islands|Falkland Islands (Malvinas)
+FM|Micronesia|Micronesia, Federated States of
+FO|Faroe Islands
+FR|France
+GA|Gabon
+GB|United Kingdom|UK|Great Britain
+GB-ENG|England
+GB-NIR|Northern Ireland
+GB-SCT|Scotland
+GB-WLS|Wales
+GD|Grenada
+GE|Georgia
+GF|French Guiana
+GG|Guernsey
+GH|Ghana
+GI|Gibraltar
+GL|Greenland
+GM|Gambia|The Gambia
+GN|Guinea
+GP|Guadeloupe
+GQ|Equatorial Guinea
+GR|Greece
+GS|South Georgia and the South Sandwich Islands
+GT|Guatemala
+GU|Guam
+GW|Guinea-Bissau|Guinea Bissau
+GY|Guyana
+HK|Hong Kong
+HM|Heard Island and McDonald Islands
+HN|Honduras
+HR|Croatia
+HT|Haiti
+HU|Hungary
+IC|Canary Islands
+ID|Indonesia
+IE|Ireland
+IL|Israel
+IM|Isle of Man
+IN|India
+IO|British Indian Ocean Territory
+IQ|Iraq
+IR|Iran|Iran, Islamic Republic of
+IS|Iceland
+IT|Italy
+JE|Jersey
+JM|Jamaica
+JO|Jordan
+JP|Japan
+KE|Kenya
+KG|Kyrgyzstan
+KH|Cambodia
+KI|Kiribati
+KM|Comoros
+KN|Saint Kitts and Nevis
+KP|North Korea|Korea, Democratic People's Republic of
+KR|South Korea|Korea|Korea, Republic of
+KW|Kuwait
+KY|Cayman Islands
+KZ|Kazakhstan
+LA|Laos|Lao People's Democratic Republic
+LB|Lebanon
+LC|Saint Lucia
+LI|Liechtenstein
+LK|Sri Lanka
+LR|Liberia
+LS|Lesotho
+LT|Lithuania
+LU|Luxembourg
+LV|Latvia
+LY|Libya
+MA|Morocco
+MC|Monaco
+MD|Moldova|Moldova, Republic of
+ME|Montenegro
+MF|Saint Martin
+MG|Madagascar
+MH|Marshall Islands
+MK|North Macedonia|Macedonia
+ML|Mali
+MM|Myanmar|Burma
+MN|Mongolia
+MO|Macao|Macau
+MP|Northern Mariana Islands
+MQ|Martinique
+MR|Mauritania
+MS|Montserrat
+MT|Malta
+MU|Mauritius
+MV|Maldives
+MW|Malawi
+MX|Mexico
+MY|Malaysia
+MZ|Mozambique
+NA|Namibia
+NC|New Caledonia
+NE|Niger
+NF|Norfolk Island
+NG|Nigeria
+NI|Nicaragua
+NL|Netherlands|The Netherlands|Holland
+NO|Norway
+NP|Nepal
+NR|Nauru
+NU|Niue
+NZ|New Zealand
+OM|Oman
+PA|Panama
+PE|Peru
+PF|French Polynesia
+PG|Papua New Guinea
+PH|Philippines
+PK|Pakistan
+PL|Poland
+PM|Saint Pierre and Miquelon
+PN|Pitcairn Islands|Pitcairn
+PR|Puerto Rico
+PS|Palestine|Palestine, State of
+PT|Portugal
+PW|Palau
+PY|Paraguay
+QA|Qatar
+RE|Reunion|Réunion
+RO|Romania
+RS|Serbia
+RU|Russia|Russian Federation
+RW|Rwanda
+SA|Saudi Arabia
+SB|Solomon Islands
+SC|Seychelles
+SD|Sudan
+SE|Sweden
+SG|Singapore
+SH|Saint Helena|Saint Helena, Ascension and Tristan da Cunha
+SI|Slovenia
+SJ|Svalbard and Jan Mayen
+SK|Slovakia
+SL|Sierra Leone
+SM|San Marino
+SN|Senegal
+SO|Somalia
+SR|Suriname
+SS|South Sudan
+ST|Sao Tome and Principe|São Tomé and Príncipe
+SV|El Salvador
+SX|Sint Maarten
+SY|Syria|Syrian Arab Republic
+SZ|Eswatini|Swaziland
+TA|Tristan da Cunha
+TC|Turks and Caicos Islands
+TD|Chad
+TF|French Southern Territories
+TG|Togo
+TH|Thailand
+TJ|Tajikistan
+TK|Tokelau
+TL|Timor-Leste|East Timor
+TM|Turkmenistan
+TN|Tunisia
+TO|Tonga
+TR|Turkey|Turkiye|Türkiye
+TT|Trinidad and Tobago
+TV|Tuvalu
+TW|Taiwan
+TZ|Tanzania|Tanzania, United Republic of
+UA|Ukraine
+UG|Uganda
+UM|United States Minor Outlying Islands
+UN|United Nations
+US|United States|USA|United States of America
+UY|Uruguay
+UZ|Uzbekistan
+VA|Vatican City|Holy See
+VC|Saint Vincent and the Grenadines
+VE|Venezuela|Venezuela, Bolivarian Republic of
+VG|British Virgin Islands|Virgin Islands, British
+VI|United States Virgin Islands|Virgin Islands, U.S.
+VN|Vietnam|Viet Nam
+VU|Vanuatu
+WF|Wallis and Futuna
+WS|Samoa
+XK|Kosovo
+XX|Unknown
+YE|Yemen
+YT|Mayotte
+ZA|South Africa
+ZM|Zambia
+ZW|Zimbabwe
+"""
+
+
+def normalize(name: str) -> str:
+    """
+    Returns: Lookup key of a cli name (`Bosnia_And_Herzegovina`) or display name (`Bosnia and Herzegovina`)
+    """
+    return name.replace('_', ' ').replace('&', 'and').casefold().strip()
+
+
+class CountryRegistry:
+    """
+    Country codes and names in parallel tuples with dict indexes for O(1) lookup by code, cli name, display name
+    or alias. Built once on import and shared by all users.
+    """
+    codes: tuple[str, ...]
+    names: tuple[str, ...]
+    by_code: dict[str, int]
+    by_name: dict[str, int]
+
+    def __init__(self, data: str):
+        rows = [line.split('|') for line in data.splitlines() if line]
+        self.codes = tuple(row[0] for row in rows)
+        self.names = tuple(row[1] for row in rows)
+        self.by_code = {code.lower(): idx for idx, code in enumerate(self.codes)}
+        self.by_name = dict()
+        for idx, row in enumerate(rows):
+            for name in row[1:]:
+                self.by_name.setdefault(normalize(name), idx)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def code(self, name: Optional[str]) -> Optional[str]:
+        """
+        Returns: Code of a country given by cli name, display name or alias
+        """
+        idx = self.by_name.get(normalize(name)) if name else None
+        return None if idx is None else self.codes[idx]
+
+    def name(self, code: Optional[str]) -> Optional[str]:
+        """
+        Returns: Display name of a country code
+        """
+        idx = self.by_code.get(code.lower()) if code else None
+        return None if idx is None else self.names[idx]
+
+    def cli_name(self, code: Optional[str]) -> Optional[str]:
+        name = self.name(code)
+        return None if name is None else name.replace(' ', '_')
+
+
+countries = CountryRegistry(DATA)
+
+if __name__ == '__main__':
+    # checks that every flag has a registry entry
+    flags_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join('icons', 'flags')
+    missing = sorted(os.path.splitext(f)[0] for f in os.listdir(flags_dir)
+                     if os.path.splitext(f)[0].lower() not in countries.by_code)
+    print(f"{len(countries)} countries, missing flags: {', '.join(missing) or 'none'}")
+    sys.exit(1 if missing else 0)
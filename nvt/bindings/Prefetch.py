@@ -0,0 +1,90 @@
+import logging
+from collections import deque
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QTimer
+from .Cities import CitiesProcess
+from .Cache import cities_cache
+
+log = logging.getLogger(__name__)
+
+
+class CitiesPrefetch(QObject):
+    """
+    Fills cities cache for all countries in the background with a bounded number of `nordvpn cities` processes.
+    Starting of new processes is paused for a while after every user action. The cache file is written once
+    when the prefetch ends instead of after every country.
+    """
+    IDLE_DELAY = 3000
+
+    concurrency: int
+    on_loaded: Optional[Callable[[str, list[str]], None]]
+    queue: deque[str]
+    running: dict[str, CitiesProcess]
+    paused: bool
+    idle_timer: QTimer
+
+    def __init__(self, concurrency: int, on_loaded: Optional[Callable[[str, list[str]], None]] = None, parent=None):
+        super().__init__(parent)
+        self.concurrency = max(1, concurrency)
+        self.on_loaded = on_loaded
+        self.queue = deque()
+        self.running = dict()
+        self.paused = False
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self._resume)
+
+    def start(self, countries: list[str]):
+        self.queue = deque(c for c in countries if c not in self.running and not CitiesProcess.is_fresh(c))
+        self._fill()
+
+    def prioritize(self, country: str) -> bool:
+        """
+        Starts prefetch of the country immediately, regardless of pause and concurrency.
+        Returns: False when the country is not waiting for prefetch
+        """
+        if country in self.running:
+            return True
+        if country not in self.queue:
+            return False
+        self.queue.remove(country)
+        self._run(country)
+        return True
+
+    def user_active(self):
+        self.paused = True
+        self.idle_timer.start(self.IDLE_DELAY)
+
+    def stop(self):
+        self.queue.clear()
+        for process in self.running.values():
+            process.close()
+        self.running.clear()
+        cities_cache.flush()
+
+    def _resume(self):
+        self.paused = False
+        self._fill()
+
+    def _fill(self):
+        while not self.paused and self.queue and len(self.running) < self.concurrency:
+            self._run(self.queue.popleft())
+        if not self.queue and not self.running:
+            cities_cache.flush()
+
+    def _run(self, country: str):
+        def done(cities):
+            self.running.pop(country, None)
+            if self.on_loaded:
+                self.on_loaded(country, cities)
+            self._fill()
+
+        def error(e):
+            self.running.pop(country, None)
+            log.debug(f"Prefetch cities of {country} failed: {e}")
+            self._fill()
+
+        process = CitiesProcess(on_finish=done, on_error=error)
+        process.persist = False
+        self.running[country] = process.run(country)
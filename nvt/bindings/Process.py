@@ -1,35 +1,212 @@
+import re
+import time
+import random
+import logging
+from abc import ABC, abstractmethod
 from typing import Callable, Optional, TypeVar, Generic
-from PySide6.QtCore import QProcess
+from PySide6.QtCore import QProcess, QTimer
+from . import Stats
+from .Circuit import breaker
+from .utils import LineSplitter
+
+log = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# exit codes of results which did not come from nordvpn
+UNAVAILABLE_CODE = -1
+REJECTED_CODE = -2
+RETRY_DELAY = 0.5
+DAEMON_DOWN_RE = re.compile(r"cannot reach system daemon", re.IGNORECASE)
+
+
+class Transport(ABC):
+    """
+    Executes nordvpn commands on behalf of a Process. Implementations either start the process itself
+    or deliver the command result with `Process._handle_result`.
+
+    There are two: `CliTransport` runs the nordvpn CLI and `SharedTransport` asks the headless daemon of this app.
+    A transport calling the gRPC API of nordvpnd directly, as defined by the protobuf files of nordvpn-linux,
+    is not implemented.
+    """
+
+    @abstractmethod
+    def start(self, process: 'Process', params: list[str]):
+        pass
+
+    def cancel(self, process: 'Process'):
+        """
+        Forgets the running command of a process which gave up waiting for its result.
+        """
+        pass
+
+
+class CliTransport(Transport):
+    program: str
+
+    def __init__(self, program: str = 'nordvpn'):
+        self.program = program
+
+    def start(self, process: 'Process', params: list[str]):
+        QProcess.start(process, self.program, params)
+
 
 class Process(QProcess, Generic[T]):
+    """
+    Runs a nordvpn command with a deadline of `timeout` seconds, failed commands are tried again `retries` times
+    with jittered exponential backoff. Commands are not started while the circuit breaker is open.
+
+    Stdout is streamed line by line to `on_progress` when given. A line matching `success_re` finishes
+    the command successfully without waiting for the exit of the child.
+    """
+    transport: Transport = CliTransport()
+    timeout: float = 30
+    retries: int = 0
+    success_re: Optional[re.Pattern] = None
+    # processes finished early, kept until their child exits
+    lingering: set['Process'] = set()
+
     on_finish: Optional[Callable[[T], None]]
     on_error: Optional[Callable[[str], None]]
+    on_progress: Optional[Callable[[str], None]]
+    params: list[str]
+    streaming: bool
+    stdout_chunks: list[bytes]
+    splitter: LineSplitter
+    started_at: float
+    attempt: int
+    active: bool
+    killed: bool
+    deadline: QTimer
 
     def __init__(self, on_finish: Optional[Callable[[T], None]] = None,
-                 on_error: Optional[Callable[[str], None]] = None):
+                 on_error: Optional[Callable[[str], None]] = None,
+                 on_progress: Optional[Callable[[str], None]] = None):
         super().__init__()
         self.on_finish = on_finish
         self.on_error = on_error
+        self.on_progress = on_progress
+        self.params = []
+        self.stdout_chunks = []
+        self.splitter = LineSplitter()
+        self.started_at = 0
+        self.attempt = 0
+        self.active = False
+        self.killed = False
+        self.deadline = QTimer(self)
+        self.deadline.setSingleShot(True)
+        self.deadline.timeout.connect(self._deadline_exceeded)
+        self.started.connect(self._process_started)
         self.finished.connect(self._process_finished)
+        self.errorOccurred.connect(self._process_error)
+        self.streaming = bool(on_progress or self.success_re)
+        if self.streaming:
+            self.readyReadStandardOutput.connect(self._read_stdout)
 
     def close(self) -> None:
         self.on_finish = None
         self.on_error = None
+        self.on_progress = None
+        self.active = False
+        self.deadline.stop()
+        self.transport.cancel(self)
         super().close()
 
     def _start_process(self, params: list[str]):
-        super().start('nordvpn', params)
+        self.params = params
+        self.attempt = 0
+        self.active = True
+        self._attempt()
         return self
 
+    def _attempt(self):
+        if not self.active:
+            return
+        if not breaker.allow():
+            # callbacks are never called before run() returns
+            QTimer.singleShot(0, lambda: self._handle_result(
+                REJECTED_CODE, '', f"NordVPN daemon is not responding, next try in {breaker.retry_in()}s"))
+            return
+        self.started_at = time.perf_counter()
+        self.stdout_chunks = []
+        self.splitter = LineSplitter()
+        self.deadline.start(int(self.timeout * 1000))
+        self.transport.start(self, self.params)
+
+    def _command(self) -> str:
+        return self.params[0] if self.params else ''
+
+    def _process_started(self):
+        Stats.record_spawn(self._command(), time.perf_counter() - self.started_at)
+
+    def _read_stdout(self):
+        data = bytes(self.readAllStandardOutput())
+        self.stdout_chunks.append(data)
+        for line in self.splitter.feed(data):
+            self._handle_line(line)
+
+    def _handle_line(self, line: str):
+        if not self.active:
+            return
+        if self.on_progress:
+            self.on_progress(line)
+        if self.success_re and self.success_re.search(line):
+            self._finish_early()
+
+    def _finish_early(self):
+        if self.state() != QProcess.ProcessState.NotRunning:
+            Process.lingering.add(self)
+        self._handle_result(0, b''.join(self.stdout_chunks).decode('utf8', errors='replace'), '')
+
     def _process_finished(self, code):
-        stdout = bytes(self.readAllStandardOutput()).decode("utf8")
+        Process.lingering.discard(self)
+        if self.streaming:
+            self._read_stdout()
+            for line in self.splitter.flush():
+                self._handle_line(line)
+            stdout = b''.join(self.stdout_chunks).decode('utf8', errors='replace')
+        else:
+            stdout = bytes(self.readAllStandardOutput()).decode("utf8")
         stderr = bytes(self.readAllStandardError()).decode("utf8")
+        if self.killed:
+            # already handled as timeout
+            self.killed = False
+            return
+        self._handle_result(code, stdout, stderr)
+
+    def _process_error(self, error: QProcess.ProcessError):
+        if error == QProcess.ProcessError.FailedToStart:
+            self._handle_result(UNAVAILABLE_CODE, '', f"Cannot start nordvpn: {self.errorString()}")
+
+    def _deadline_exceeded(self):
+        self.transport.cancel(self)
+        if self.state() != QProcess.ProcessState.NotRunning:
+            self.killed = True
+            self.kill()
+        self._handle_result(UNAVAILABLE_CODE, '', f"nordvpn {self._command()} timed out after {self.timeout:g}s")
+
+    def _handle_result(self, code: int, stdout: str, stderr: str):
+        if not self.active:
+            return
+        self.deadline.stop()
+        command = self._command()
+        if code != REJECTED_CODE:
+            Stats.record_exit(command, code, time.perf_counter() - self.started_at, len(stdout) + len(stderr))
+            breaker.record(not self._daemon_failure(code, stdout, stderr))
+            if code != 0 and self.attempt < self.retries:
+                delay = RETRY_DELAY * 2 ** self.attempt * random.uniform(0.5, 1.5)
+                self.attempt += 1
+                log.info(f"nordvpn {command} failed, retry {self.attempt}/{self.retries} in {delay:.1f}s")
+                QTimer.singleShot(int(delay * 1000), self._attempt)
+                return
+
+        self.active = False
         if code == 0:
             if self.on_finish:
+                parse_start = time.perf_counter()
                 out = self._parse_output(stdout)
+                Stats.record_parse(command, time.perf_counter() - parse_start)
+                self._store_result(stdout, out)
                 if out is None:
                     self.on_finish()
                 else:
@@ -43,6 +220,21 @@ class Process(QProcess, Generic[T]):
 
         self.on_finish = None
         self.on_error = None
+        self.on_progress = None
 
     def _parse_output(self, data: str) -> T:
         pass
+
+    def _store_result(self, data: str, result: T):
+        """
+        Called with the output and its parsed result before `on_finish`, persists it outside of the parse step.
+        """
+        pass
+
+    @staticmethod
+    def _daemon_failure(code: int, stdout: str, stderr: str) -> bool:
+        return code == UNAVAILABLE_CODE or (code != 0 and bool(DAEMON_DOWN_RE.search(stderr or stdout)))
+
+
+def set_transport(transport: Transport):
+    Process.transport = transport
@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import time
+import logging
+from dataclasses import dataclass
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QUrl, Signal
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
+from nvt.utils import user_data_dir
+
+log = logging.getLogger(__name__)
+
+SERVERS_URL = 'https://api.nordvpn.com/v1/servers?limit=100000'
+HOST_RE = re.compile(r'^(?P<prefix>[a-z-]+?)(?P<number>\d+)\.')
+
+
+@dataclass
+class Server:
+    host: str
+    country_code: str
+    city: str
+    number: str
+    load: int
+    groups: list[str]
+
+
+class ServerCatalog:
+    """
+    Compact columnar catalog of NordVPN servers with indexes by country code, (country code, city), group
+    and host prefix with number. Index lists are ordered by load.
+
+    Server numbers entered for a country resolve to its plain hosts (us3, uk12), regional hosts (us-ca3) have
+    their own prefix and are not reachable by number.
+    """
+    hosts: list[str]
+    country_codes: list[str]
+    cities: list[str]
+    numbers: list[str]
+    loads: list[int]
+    groups: list[list[int]]
+    group_names: list[str]
+    by_country: dict[str, list[int]]
+    by_city: dict[str, list[int]]
+    by_group: dict[str, list[int]]
+    by_number: dict[str, int]
+    prefixes: dict[str, str]
+    updated: float
+
+    def __init__(self, columns: Optional[dict] = None, updated: float = 0):
+        columns = columns or {}
+        self.hosts = columns.get('hosts', [])
+        self.country_codes = columns.get('country_codes', [])
+        self.cities = columns.get('cities', [])
+        self.numbers = columns.get('numbers', [])
+        self.loads = columns.get('loads', [])
+        self.groups = columns.get('groups', [])
+        self.group_names = columns.get('group_names', [])
+        self.updated = updated
+        self._build_indexes()
+
+    @staticmethod
+    def from_api(servers: list[dict]) -> 'ServerCatalog':
+        """
+        Creates catalog from the NordVPN servers API response, servers without a number in hostname are skipped.
+        """
+        columns = {k: [] for k in ('hosts', 'country_codes', 'cities', 'numbers', 'loads', 'groups', 'group_names')}
+        group_ids = dict()
+        for server in servers:
+            host = server.get('hostname') or ''
+            match = HOST_RE.match(host)
+            locations = server.get('locations') or [{}]
+            country = locations[0].get('country') or {}
+            if not match or not country.get('code'):
+                continue
+
+            group_list = []
+            for group in server.get('groups') or []:
+                title = group.get('title')
+                if title not in group_ids:
+                    group_ids[title] = len(columns['group_names'])
+                    columns['group_names'].append(title)
+                group_list.append(group_ids[title])
+
+            columns['hosts'].append(host)
+            columns['country_codes'].append(country['code'].upper())
+            columns['cities'].append(((country.get('city') or {}).get('name') or '').replace(' ', '_'))
+            columns['numbers'].append(match.group('number'))
+            columns['loads'].append(int(server.get('load') or 0))
+            columns['groups'].append(group_list)
+
+        return ServerCatalog(columns, time.time())
+
+    @staticmethod
+    def load(path: str) -> 'ServerCatalog':
+        if os.path.isfile(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                return ServerCatalog(data['columns'], data['updated'])
+            except (OSError, ValueError, KeyError) as e:
+                log.warning(f"Cannot read server catalog {path}: {e}")
+        return ServerCatalog()
+
+    def save(self, path: str):
+        columns = {
+            'hosts': self.hosts,
+            'country_codes': self.country_codes,
+            'cities': self.cities,
+            'numbers': self.numbers,
+            'loads': self.loads,
+            'groups': self.groups,
+            'group_names': self.group_names,
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'updated': self.updated, 'columns': columns}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def __len__(self) -> int:
+        return len(self.hosts)
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.updated < ttl
+
+    def server(self, idx: int) -> Server:
+        return Server(self.hosts[idx], self.country_codes[idx], self.cities[idx], self.numbers[idx], self.loads[idx],
+                      [self.group_names[g] for g in self.groups[idx]])
+
+    def find(self, country_code: str, number: str) -> Optional[Server]:
+        idx = self.by_number.get(self._number_key(country_code, number))
+        return None if idx is None else self.server(idx)
+
+    def server_numbers(self, country_code: str) -> list[str]:
+        return sorted((self.numbers[i] for i in self._numbered(country_code.upper())), key=int)
+
+    def numbers_by_host(self, country_code: str) -> dict[str, str]:
+        return {self.hosts[i]: self.numbers[i] for i in self._numbered(country_code.upper())}
+
+    def least_loaded(self, country_code: str, city: Optional[str] = None) -> Optional[Server]:
+        """
+        Returns: Least loaded server which is reachable by its number
+        """
+        if city:
+            indexes = self.by_city.get(f"{country_code.upper()}/{city}", [])
+        else:
+            indexes = self.by_country.get(country_code.upper(), [])
+        idx = next((i for i in indexes if self._is_numbered(i)), None)
+        return None if idx is None else self.server(idx)
+
+    def servers(self, country_code: Optional[str] = None, group: Optional[str] = None) -> list[Server]:
+        """
+        Returns: Servers of the country and/or group ordered by load
+        """
+        if country_code:
+            indexes = self.by_country.get(country_code.upper(), [])
+            if group:
+                group_set = set(self.by_group.get(group, []))
+                indexes = [i for i in indexes if i in group_set]
+        elif group:
+            indexes = self.by_group.get(group, [])
+        else:
+            indexes = sorted(range(len(self.hosts)), key=self.loads.__getitem__)
+        return [self.server(i) for i in indexes]
+
+    def _build_indexes(self):
+        self.by_country = dict()
+        self.by_city = dict()
+        self.by_group = dict()
+        self.by_number = dict()
+        self.prefixes = dict()
+        for idx in sorted(range(len(self.hosts)), key=self.loads.__getitem__):
+            code = self.country_codes[idx]
+            self.by_country.setdefault(code, []).append(idx)
+            self.by_city.setdefault(f"{code}/{self.cities[idx]}", []).append(idx)
+            for group in self.groups[idx]:
+                self.by_group.setdefault(self.group_names[group], []).append(idx)
+            match = HOST_RE.match(self.hosts[idx])
+            prefix = match.group('prefix') if match else code.lower()
+            if '-' not in prefix:
+                self.prefixes.setdefault(code, prefix)
+            self.by_number[f"{prefix}{self.numbers[idx].lstrip('0')}"] = idx
+
+    def _number_key(self, country_code: str, number: str) -> str:
+        # plain prefix is not always the country code (uk for GB)
+        return f"{self.prefixes.get(country_code.upper(), country_code.lower())}{number.lstrip('0')}"
+
+    def _is_numbered(self, idx: int) -> bool:
+        return self.by_number.get(self._number_key(self.country_codes[idx], self.numbers[idx])) == idx
+
+    def _numbered(self, country_code: str) -> list[int]:
+        return [i for i in self.by_country.get(country_code, []) if self._is_numbered(i)]
+
+
+class _ParseTask(QRunnable):
+    def __init__(self, update: 'CatalogUpdate', data: bytes):
+        super().__init__()
+        self.update = update
+        self.data = data
+
+    def run(self):
+        try:
+            catalog = ServerCatalog.from_api(json.loads(self.data))
+        except Exception as e:
+            # any failure has to be reported, the update waits for parsed or failed
+            log.warning("Parse server list failed", exc_info=e)
+            self.update.failed.emit(f"Invalid server list: {e!r}")
+            return
+        try:
+            catalog.save(catalog_path())
+        except OSError as e:
+            # the catalog is still usable, it is downloaded again on the next start
+            log.warning(f"Cannot save server catalog: {e}")
+        self.update.parsed.emit(catalog)
+
+
+class CatalogUpdate(QObject):
+    """
+    Downloads the server list and builds the catalog off the GUI thread. The url may point to a local file.
+    """
+    parsed = Signal(object)
+    failed = Signal(str)
+
+    on_finish: Optional[Callable[[ServerCatalog], None]]
+    on_error: Optional[Callable[[str], None]]
+
+    def __init__(self, on_finish: Optional[Callable[[ServerCatalog], None]] = None,
+                 on_error: Optional[Callable[[str], None]] = None, parent=None):
+        super().__init__(parent)
+        self.on_finish = on_finish
+        self.on_error = on_error
+        self.manager = QNetworkAccessManager(self)
+        self.parsed.connect(self._parsed)
+        self.failed.connect(self._failed)
+
+    def run(self, url: str = SERVERS_URL):
+        reply = self.manager.get(QNetworkRequest(QUrl(url)))
+        reply.finished.connect(lambda: self._downloaded(reply))
+        return self
+
+    def _downloaded(self, reply: QNetworkReply):
+        reply.deleteLater()
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            self._failed(f"Download server list failed: {reply.errorString()}")
+            return
+        QThreadPool.globalInstance().start(_ParseTask(self, bytes(reply.readAll())))
+
+    def _parsed(self, catalog: ServerCatalog):
+        global _catalog
+        _catalog = catalog
+        if self.on_finish:
+            self.on_finish(catalog)
+
+    def _failed(self, msg: str):
+        if self.on_error:
+            self.on_error(msg)
+
+
+_catalog: Optional[ServerCatalog] = None
+
+
+def catalog_path() -> str:
+    return os.path.join(user_data_dir(), 'servers.json')
+
+
+def server_catalog() -> ServerCatalog:
+    global _catalog
+    if _catalog is None:
+        _catalog = ServerCatalog.load(catalog_path())
+    return _catalog
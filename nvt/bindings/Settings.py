@@ -1,7 +1,12 @@
+import re
 from typing import Optional
 from dataclasses import dataclass
-from .utils import parse_options_list
+from .utils import OptionsParser
 from .Process import Process
+from .Cache import settings_cache
+
+# attribute names which differ from `nordvpn set` option names
+SET_OPTIONS = {'tplite': 'threatprotectionlite'}
 
 
 @dataclass
@@ -22,24 +27,63 @@ class NVSettings:
 
 
 class SettingsProcess(Process[NVSettings]):
+    timeout = 10
+    retries = 2
+    parser = OptionsParser({
+        'autoconnect': 'Auto-connect',
+        'technology': 'Technology',
+        'protocol': 'Protocol',
+        'firewall': 'Firewall',
+        'fwmark': 'Firewall Mark',
+        'routing': 'Routing',
+        'analytics': 'Analytics',
+        'killswitch': 'Kill Switch',
+        'tplite': 'Threat Protection Lite',
+        'notify': 'Notify',
+        'ipv6': 'IPv6',
+        'meshnet': 'Meshnet',
+        'dns': 'DNS',
+    })
+
     def run(self):
         return super()._start_process(['settings'])
 
+    @staticmethod
+    def cached() -> Optional[NVSettings]:
+        """
+        Returns: Settings from the last successful run or None, see `is_fresh` for expiration
+        """
+        lines = settings_cache.get()
+        if lines is None:
+            return None
+        return SettingsProcess.parser.parse('\n'.join(lines), NVSettings())
+
+    @staticmethod
+    def is_fresh() -> bool:
+        return settings_cache.is_fresh()
+
+    @staticmethod
+    def invalidate():
+        settings_cache.invalidate()
+
     def _parse_output(self, data: str) -> NVSettings:
-        attr_map = {
-            'autoconnect': 'Auto-connect',
-            'technology': 'Technology',
-            'protocol': 'Protocol',
-            'firewall': 'Firewall',
-            'fwmark': 'Firewall Mark',
-            'routing': 'Routing',
-            'analytics': 'Analytics',
-            'killswitch': 'Kill Switch',
-            'tplite': 'Threat Protection Lite',
-            'notify': 'Notify',
-            'ipv6': 'IPv6',
-            'meshnet': 'Meshnet',
-            'dns': 'DNS',
-        }
-
-        return parse_options_list(data, attr_map, NVSettings())
+        return self.parser.parse(data, NVSettings())
+
+    def _store_result(self, data: str, result: NVSettings):
+        settings_cache.put('', data.splitlines())
+
+
+def set_args(value: str) -> list[str]:
+    """
+    Returns: `nordvpn set` arguments for a value as shown by `nordvpn settings`
+    """
+    if value.strip().lower() == 'enabled':
+        return ['on']
+    if value.strip().lower() == 'disabled':
+        return ['off']
+    return [part for part in re.split(r"[,\s]+", value.strip()) if part]
+
+
+class SetProcess(Process[None]):
+    def run(self, key: str, value: str):
+        return super()._start_process(['set', SET_OPTIONS.get(key, key), *set_args(value)])
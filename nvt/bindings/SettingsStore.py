@@ -0,0 +1,179 @@
+import os
+import logging
+from typing import Callable, Optional
+from PySide6.QtCore import QObject, QFileSystemWatcher, Signal
+from .Settings import SettingsProcess, SetProcess, NVSettings
+from . import Tasks
+
+log = logging.getLogger(__name__)
+
+# written by nordvpnd on every settings change
+NORDVPN_SETTINGS_PATH = '/var/lib/nordvpn/data/settings.dat'
+# disabled before enabled in this order, enabled in the reverse order
+DISABLE_ORDER = ['autoconnect', 'killswitch', 'meshnet', 'tplite', 'dns', 'notify', 'analytics', 'ipv6', 'routing',
+                 'fwmark', 'firewall']
+
+
+def normalize(value: Optional[str]) -> str:
+    return (value or '').strip().lower()
+
+
+def plan(current: NVSettings, target: dict[str, str]) -> list[tuple[str, str]]:
+    """
+    Returns: (key, value) of the settings which differ from current, ordered so each command is valid when it runs:
+    technology before protocol, which is skipped unless the technology is OpenVPN, options turned off before
+    options turned on (kill switch off before firewall off, firewall on before kill switch on)
+    """
+    changes = {key: value for key, value in target.items() if normalize(getattr(current, key)) != normalize(value)}
+    if 'protocol' in changes and normalize(changes.get('technology', current.technology)) != 'openvpn':
+        del changes['protocol']
+
+    def order(key: str) -> tuple[int, int]:
+        if key == 'technology':
+            return 0, 0
+        if key == 'protocol':
+            return 1, 0
+        idx = DISABLE_ORDER.index(key) if key in DISABLE_ORDER else len(DISABLE_ORDER)
+        if normalize(changes[key]) == 'disabled':
+            return 2, idx
+        return 3, -idx
+
+    return [(key, changes[key]) for key in sorted(changes, key=order)]
+
+
+class SettingsStore(QObject):
+    """
+    NVSettings served from cache. Settings are loaded again only after a change made by the app, a change
+    of the nordvpn settings file or when the cache expires.
+
+    Changes are applied as an ordered sequence of `nordvpn set` commands (see `plan`), the already applied ones
+    are rolled back in reverse order when a command fails.
+    """
+    changed = Signal(object)
+    error = Signal(str)
+
+    settings: Optional[NVSettings]
+    load_future: Optional[Tasks.Future[NVSettings]]
+    set_process: Optional[SetProcess]
+    applying: bool
+    watcher: QFileSystemWatcher
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.settings = None
+        self.load_future = None
+        self.set_process = None
+        self.applying = False
+
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._file_changed)
+        self._watch()
+
+    def load(self) -> Tasks.Future[NVSettings]:
+        """
+        Returns: Future of the current settings, resolved immediately from fresh cache
+        """
+        if self.settings is None:
+            cached = SettingsProcess.cached()
+            if cached:
+                self._set_settings(cached)
+        if self.settings and SettingsProcess.is_fresh():
+            return Tasks.resolved(self.settings)
+
+        future = Tasks.command(SettingsProcess)
+        if future is not self.load_future:
+            self.load_future = future
+            future.add_done_callback(self._loaded)
+        return future
+
+    def _loaded(self, future: Tasks.Future[NVSettings]):
+        if future.exception() is not None:
+            self.error.emit(str(future.exception()))
+        else:
+            self._set_settings(future.result())
+
+    def invalidate(self):
+        SettingsProcess.invalidate()
+
+    def apply(self, target: dict[str, str], on_finish: Callable[[], None], on_error: Callable[[str], None]):
+        if self.applying:
+            on_error("Settings are being applied already")
+            return
+        if self.settings is None:
+            on_error("Settings are not loaded yet")
+            return
+
+        previous = self.settings
+        steps = plan(previous, target)
+        applied: list[str] = []
+        self.applying = True
+        log.info(f"Applying settings {steps}")
+
+        def finish(e: Optional[str] = None):
+            self.applying = False
+            self.set_process = None
+            self.invalidate()
+            self.load()
+            if e:
+                on_error(e)
+            else:
+                on_finish()
+
+        def rollback(e: str):
+            undo = [(key, getattr(previous, key)) for key in reversed(applied) if getattr(previous, key) is not None]
+            log.warning(f"Setting failed, rolling back {undo}: {e}")
+
+            def undo_next():
+                if not undo:
+                    finish(e)
+                    return
+                key, value = undo.pop(0)
+
+                def undo_error(undo_e):
+                    log.error(f"Rollback of {key} failed: {undo_e}")
+                    undo_next()
+
+                self.set_process = SetProcess(on_finish=undo_next, on_error=undo_error).run(key, value)
+
+            undo_next()
+
+        def run_next():
+            if len(applied) == len(steps):
+                finish()
+                return
+            key, value = steps[len(applied)]
+
+            def done():
+                applied.append(key)
+                run_next()
+
+            self.set_process = SetProcess(on_finish=done, on_error=rollback).run(key, value)
+
+        run_next()
+
+    def _set_settings(self, settings: NVSettings):
+        if settings != self.settings:
+            self.settings = settings
+            self.changed.emit(settings)
+
+    def _watch(self):
+        if os.path.exists(NORDVPN_SETTINGS_PATH) and not self.watcher.addPath(NORDVPN_SETTINGS_PATH):
+            log.info(f"Cannot watch {NORDVPN_SETTINGS_PATH}, settings are reloaded when the cache expires")
+
+    def _file_changed(self):
+        self.invalidate()
+        # the file is replaced on write which drops the watch
+        if NORDVPN_SETTINGS_PATH not in self.watcher.files():
+            self._watch()
+        if not self.applying:
+            self.load()
+
+
+_settings_store: Optional[SettingsStore] = None
+
+
+def settings_store() -> SettingsStore:
+    global _settings_store
+    if _settings_store is None:
+        _settings_store = SettingsStore()
+    return _settings_store
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import logging
+from typing import Optional
+from PySide6.QtCore import QObject, Signal, SignalInstance
+from PySide6.QtNetwork import QLocalSocket
+from nvt.utils import user_data_dir
+from .Process import Process, Transport, CliTransport
+
+log = logging.getLogger(__name__)
+
+SHARED_COMMANDS = ('status', 'settings', 'countries')
+READ_COMMANDS = ('account', 'cities', 'countries', 'settings', 'status')
+RECONNECT_INTERVAL = 30
+
+
+def socket_path() -> str:
+    return os.path.join(os.environ.get('XDG_RUNTIME_DIR') or user_data_dir(), 'nordvpn-tray.sock')
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode('utf8') + b'\n'
+
+
+class LineReader:
+    """
+    Splits the socket stream into newline delimited json messages.
+    """
+    buffer: bytes
+
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data: bytes) -> list[dict]:
+        *lines, self.buffer = (self.buffer + data).split(b'\n')
+        messages = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                messages.append(json.loads(line))
+            except ValueError as e:
+                log.warning(f"Invalid message: {e}")
+        return messages
+
+
+class SharedEvents(QObject):
+    changed = Signal(str)
+
+
+class SharedTransport(Transport):
+    """
+    Reads status, settings and countries from the headless daemon (`main.py --headless`) instead of spawning
+    nordvpn. Other commands, and all commands while the daemon is not running, go to the fallback transport.
+    `changed` is emitted with the command name when the daemon pushes a new result.
+    """
+    changed: SignalInstance
+
+    path: str
+    events: SharedEvents
+    fallback: Transport
+    socket: QLocalSocket
+    reader: LineReader
+    pending: dict[int, Process]
+    # requests made while the socket is still connecting
+    queued: list[bytes]
+    next_id: int
+    stale: set[str]
+    connect_attempt: float
+
+    def __init__(self, path: Optional[str] = None, fallback: Optional[Transport] = None, parent=None):
+        self.path = path or socket_path()
+        self.fallback = fallback or CliTransport()
+        # signals need a QObject, which cannot be combined with the abstract Transport base
+        self.events = SharedEvents(parent)
+        self.changed = self.events.changed
+        self.socket = QLocalSocket(parent)
+        self.socket.connected.connect(self._connected)
+        self.socket.readyRead.connect(self._read)
+        self.socket.disconnected.connect(self._disconnected)
+        self.socket.errorOccurred.connect(self._error)
+        self.reader = LineReader()
+        self.pending = dict()
+        self.queued = []
+        self.next_id = 1
+        self.stale = set()
+        self.connect_attempt = -RECONNECT_INTERVAL
+
+    def start(self, process: Process, params: list[str]):
+        command = params[0] if params else ''
+        if len(params) != 1 or command not in SHARED_COMMANDS or not self._ensure_connected():
+            # connect, set, ... change what the daemon has cached, next reads bypass its cache
+            if command not in READ_COMMANDS:
+                self.stale.update(('status', 'settings'))
+            self.fallback.start(process, params)
+            return
+
+        request_id = self.next_id
+        self.next_id += 1
+        self.pending[request_id] = process
+        self._write(encode({'id': request_id, 'method': 'get', 'key': command, 'fresh': command in self.stale}))
+        self.stale.discard(command)
+
+    def cancel(self, process: Process):
+        for request_id in [i for i, p in self.pending.items() if p is process]:
+            del self.pending[request_id]
+        self.fallback.cancel(process)
+
+    def _ensure_connected(self) -> bool:
+        """
+        Starts connecting to the daemon without waiting for it, requests are queued until it is connected.
+
+        Returns: True when requests can be sent to the daemon
+        """
+        state = self.socket.state()
+        if state in (QLocalSocket.LocalSocketState.ConnectedState, QLocalSocket.LocalSocketState.ConnectingState):
+            return True
+        if not os.path.exists(self.path) or time.monotonic() - self.connect_attempt < RECONNECT_INTERVAL:
+            return False
+
+        self.connect_attempt = time.monotonic()
+        self.reader = LineReader()
+        self.socket.connectToServer(self.path)
+        return self.socket.state() != QLocalSocket.LocalSocketState.UnconnectedState
+
+    def _write(self, data: bytes):
+        if self.socket.state() == QLocalSocket.LocalSocketState.ConnectedState:
+            self.socket.write(data)
+        else:
+            self.queued.append(data)
+
+    def _connected(self):
+        log.info(f"Using shared daemon {self.path}")
+        self.socket.write(encode({'id': 0, 'method': 'subscribe', 'keys': list(SHARED_COMMANDS)}))
+        queued = self.queued
+        self.queued = []
+        for data in queued:
+            self.socket.write(data)
+
+    def _read(self):
+        for message in self.reader.feed(bytes(self.socket.readAll())):
+            if not isinstance(message, dict):
+                continue
+            if 'event' in message:
+                self.changed.emit(message['event'])
+                continue
+            process = self.pending.pop(message.get('id'), None)
+            if process is None:
+                continue
+            if 'error' in message:
+                process._handle_result(1, '', message['error'])
+            else:
+                result = message['result']
+                process._handle_result(result['code'], result['stdout'], result['stderr'])
+
+    def _disconnected(self):
+        log.info(f"Shared daemon {self.path} disconnected")
+        self._fall_back()
+
+    def _error(self, error: QLocalSocket.LocalSocketError):
+        if self.socket.state() != QLocalSocket.LocalSocketState.ConnectedState:
+            log.info(f"Shared daemon {self.path} not available: {self.socket.errorString()}")
+            self._fall_back()
+
+    def _fall_back(self):
+        self.queued = []
+        pending = self.pending
+        self.pending = dict()
+        for process in pending.values():
+            self.fallback.start(process, process.params)
@@ -0,0 +1,187 @@
+import os
+import time
+import atexit
+import logging
+from array import array
+from bisect import bisect_left
+from typing import Optional
+from PySide6.QtCore import QTimer
+
+log = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536)
+TEXTFILE_INTERVAL = 10
+
+
+class Histogram:
+    """
+    Fixed bucket histogram, bucket `i` counts values <= buckets[i], the last one counts the rest.
+    """
+    buckets: tuple
+    counts: array
+    total: float
+    count: int
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = array('L', bytes(array('L').itemsize * (len(buckets) + 1)))
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns: Upper bound of the bucket containing the quantile, None without values
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for idx, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[idx] if idx < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+
+class CommandStats:
+    spawn: Histogram
+    exit: Histogram
+    parse: Histogram
+    output: Histogram
+    exit_codes: dict[int, int]
+
+    def __init__(self):
+        self.spawn = Histogram(DURATION_BUCKETS)
+        self.exit = Histogram(DURATION_BUCKETS)
+        self.parse = Histogram(DURATION_BUCKETS)
+        self.output = Histogram(SIZE_BUCKETS)
+        self.exit_codes = dict()
+
+    def failures(self) -> int:
+        return sum(count for code, count in self.exit_codes.items() if code != 0)
+
+
+stats: dict[str, CommandStats] = dict()
+textfile_path: Optional[str] = None
+textfile_written = 0.0
+# stats recorded since the last write, written by the trailing timer or at exit
+textfile_pending = False
+textfile_timer: Optional[QTimer] = None
+
+
+def command_stats(command: str) -> CommandStats:
+    command_data = stats.get(command)
+    if command_data is None:
+        command_data = stats[command] = CommandStats()
+    return command_data
+
+
+def record_spawn(command: str, duration: float):
+    command_stats(command).spawn.observe(duration)
+
+
+def record_exit(command: str, code: int, duration: float, output_size: int):
+    command_data = command_stats(command)
+    command_data.exit.observe(duration)
+    command_data.output.observe(output_size)
+    command_data.exit_codes[code] = command_data.exit_codes.get(code, 0) + 1
+    _export()
+
+
+def record_parse(command: str, duration: float):
+    command_stats(command).parse.observe(duration)
+
+
+def _export():
+    global textfile_pending, textfile_timer
+    if not textfile_path:
+        return
+    wait = TEXTFILE_INTERVAL - (time.monotonic() - textfile_written)
+    if wait <= 0:
+        flush_textfile()
+        return
+    textfile_pending = True
+    if textfile_timer is None:
+        textfile_timer = QTimer()
+        textfile_timer.setSingleShot(True)
+        textfile_timer.timeout.connect(_flush_pending)
+    if not textfile_timer.isActive():
+        textfile_timer.start(int(wait * 1000) + 1)
+
+
+def _flush_pending():
+    if textfile_pending:
+        flush_textfile()
+
+
+def flush_textfile():
+    """
+    Writes the textfile now when the export is enabled.
+    """
+    global textfile_written, textfile_pending
+    if not textfile_path:
+        return
+    textfile_written = time.monotonic()
+    textfile_pending = False
+    write_textfile(textfile_path)
+
+
+def set_textfile(path: Optional[str]):
+    """
+    Enables export of the stats as Prometheus textfile for node_exporter, written at most every TEXTFILE_INTERVAL
+    seconds when a command exits. Exits in between are written once the interval passed, and at exit.
+    """
+    global textfile_path
+    textfile_path = path
+
+
+def prometheus_text() -> str:
+    lines = []
+
+    def histogram(name: str, help_text: str, attr: str):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for command, command_data in stats.items():
+            h: Histogram = getattr(command_data, attr)
+            label_str = f'command="{command}"'
+            cumulative = 0
+            for bound, count in zip([*h.buckets, '+Inf'], h.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{label_str}}} {h.total}")
+            lines.append(f"{name}_count{{{label_str}}} {h.count}")
+
+    histogram('nordvpn_tray_command_spawn_seconds', 'Time from start to running nordvpn process.', 'spawn')
+    histogram('nordvpn_tray_command_exit_seconds', 'Time from start to exit of nordvpn process.', 'exit')
+    histogram('nordvpn_tray_command_parse_seconds', 'Time spent parsing nordvpn output.', 'parse')
+    histogram('nordvpn_tray_command_output_bytes', 'Size of nordvpn output.', 'output')
+
+    lines.append('# HELP nordvpn_tray_command_exit_total Finished nordvpn commands by exit code.')
+    lines.append('# TYPE nordvpn_tray_command_exit_total counter')
+    for command, command_data in stats.items():
+        for code, count in command_data.exit_codes.items():
+            lines.append(f'nordvpn_tray_command_exit_total{{command="{command}",code="{code}"}} {count}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_textfile(path: str):
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning(f"Cannot write metrics {path}: {e}")
+
+
+atexit.register(_flush_pending)
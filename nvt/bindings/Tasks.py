@@ -0,0 +1,241 @@
+import logging
+from collections import deque
+from typing import Any, Callable, Coroutine, Generic, Optional, TypeVar, Union
+from PySide6.QtCore import QTimer
+from .Process import Process
+
+log = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class CommandError(Exception):
+    """
+    Failed nordvpn command, the message is the command output.
+    """
+
+
+class Future(Generic[T]):
+    """
+    Result of an asynchronous operation. Everything runs on the Qt event loop thread, done callbacks are called
+    when the result is set.
+    """
+    _done: bool
+    _result: Optional[T]
+    _exception: Optional[BaseException]
+    _callbacks: list[Callable[['Future[T]'], None]]
+
+    def __init__(self):
+        self._done = False
+        self._result = None
+        self._exception = None
+        self._callbacks = []
+
+    def done(self) -> bool:
+        return self._done
+
+    def result(self) -> T:
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self) -> Optional[BaseException]:
+        return self._exception
+
+    def set_result(self, result: T):
+        self._result = result
+        self._finish()
+
+    def set_exception(self, exception: BaseException):
+        self._exception = exception
+        self._finish()
+
+    def add_done_callback(self, callback: Callable[['Future[T]'], None]):
+        if self._done:
+            callback(self)
+        else:
+            self._callbacks.append(callback)
+
+    def _finish(self):
+        if self._done:
+            raise RuntimeError('Future is already done')
+        self._done = True
+        callbacks = self._callbacks
+        self._callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+    def __await__(self):
+        if not self._done:
+            yield self
+        return self.result()
+
+
+class Task(Future[T]):
+    """
+    Drives a coroutine, every awaited Future resumes it from its done callback.
+    """
+    coro: Coroutine[Any, Any, T]
+
+    def __init__(self, coro: Coroutine[Any, Any, T]):
+        super().__init__()
+        self.coro = coro
+        self._step(None, None)
+
+    def _step(self, value, exception: Optional[BaseException]):
+        try:
+            if exception is not None:
+                awaited = self.coro.throw(exception)
+            else:
+                awaited = self.coro.send(value)
+        except StopIteration as e:
+            self.set_result(e.value)
+            return
+        except Exception as e:
+            self.set_exception(e)
+            return
+        if not isinstance(awaited, Future):
+            error = TypeError(f"Task awaited {awaited!r}, only Tasks.Future is supported on the Qt event loop")
+            self._step(None, error)
+            return
+        awaited.add_done_callback(self._wakeup)
+
+    def _wakeup(self, future: Future):
+        self._step(future._result, future._exception)
+
+
+class Limiter:
+    """
+    Caps the number of running commands, the others wait in a FIFO queue.
+    """
+    limit: int
+    active: int
+    waiting: deque[Callable[[], None]]
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.active = 0
+        self.waiting = deque()
+
+    def acquire(self, start: Callable[[], None]):
+        if self.active < self.limit:
+            self.active += 1
+            start()
+        else:
+            self.waiting.append(start)
+
+    def release(self):
+        self.active -= 1
+        if self.waiting and self.active < self.limit:
+            self.active += 1
+            self.waiting.popleft()()
+
+
+limiter = Limiter(4)
+inflight: dict[tuple, Future] = dict()
+running: set[Process] = set()
+
+
+def set_concurrency(limit: int):
+    limiter.limit = max(1, limit)
+
+
+def _log_failure(task: Future):
+    if task.exception() is not None:
+        log.error("Task failed", exc_info=task.exception())
+
+
+def run(coro: Coroutine[Any, Any, T]) -> Task[T]:
+    """
+    Starts the coroutine immediately, it runs until its first await which is not done yet.
+    """
+    task = Task(coro)
+    task.add_done_callback(_log_failure)
+    return task
+
+
+def ensure_future(awaitable: Union[Future[T], Coroutine[Any, Any, T]]) -> Future[T]:
+    if isinstance(awaitable, Future):
+        return awaitable
+    return Task(awaitable)
+
+
+def command(process_cls: type[Process[T]], *args) -> Future[T]:
+    """
+    Runs `process_cls().run(*args)` under the global concurrency limit. Identical commands which are in flight
+    share one run. Fails with CommandError.
+    """
+    key = (process_cls, args)
+    future = inflight.get(key)
+    if future is not None:
+        return future
+
+    future = Future()
+    inflight[key] = future
+
+    def start():
+        def finish():
+            running.discard(process)
+            inflight.pop(key, None)
+            limiter.release()
+
+        def done(result=None):
+            finish()
+            future.set_result(result)
+
+        def error(e: str):
+            finish()
+            future.set_exception(CommandError(e.strip()))
+
+        process = process_cls(on_finish=done, on_error=error)
+        running.add(process)
+        try:
+            process.run(*args)
+        except Exception as e:
+            # the limiter slot is released even when the command cannot be started
+            finish()
+            future.set_exception(e)
+
+    limiter.acquire(start)
+    return future
+
+
+def gather(*awaitables: Union[Future, Coroutine], return_exceptions: bool = False) -> Future[list]:
+    """
+    Returns: Future of all results in the given order. Fails with the first exception unless `return_exceptions`
+    is set, then exceptions are returned as results.
+    """
+    result: Future[list] = Future()
+    futures = [ensure_future(a) for a in awaitables]
+    values: list = [None] * len(futures)
+    remaining = [len(futures)]
+    if not futures:
+        result.set_result([])
+        return result
+
+    def on_done(idx: int, future: Future):
+        if result.done():
+            return
+        if future.exception() is not None and not return_exceptions:
+            result.set_exception(future.exception())
+            return
+        values[idx] = future.exception() if future.exception() is not None else future.result()
+        remaining[0] -= 1
+        if not remaining[0]:
+            result.set_result(values)
+
+    for i, f in enumerate(futures):
+        f.add_done_callback(lambda f, i=i: on_done(i, f))
+    return result
+
+
+def sleep(seconds: float) -> Future[None]:
+    future: Future[None] = Future()
+    QTimer.singleShot(int(seconds * 1000), lambda: future.set_result(None))
+    return future
+
+
+def resolved(value: T) -> Future[T]:
+    future: Future[T] = Future()
+    future.set_result(value)
+    return future
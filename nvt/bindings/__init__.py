@@ -1,5 +1,12 @@
+from .Process import Transport, CliTransport, set_transport
+from .Circuit import CircuitBreaker, breaker
 from .Account import AccountProcess
 from .Connection import StatusProcess, QuickConnectProcess, ConnectProcess, DisconnectProcess, NVStatus
+from .CountryRegistry import CountryRegistry, countries
 from .Countries import CountriesProcess
 from .Cities import CitiesProcess
-from .Settings import SettingsProcess, NVSettings
+from .Prefetch import CitiesPrefetch
+from .Settings import SettingsProcess, SetProcess, NVSettings
+from .SettingsStore import SettingsStore, settings_store
+from .Servers import ServerCatalog, Server, CatalogUpdate, server_catalog
+from .Shared import SharedTransport
@@ -1,11 +1,24 @@
 from typing import TypeVar
 import re
+import codecs
 
 T = TypeVar('T')
 
+NOISE_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|\r")
+ESCAPE_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+LINE_END_RE = re.compile(r"[\r\n]")
+SPINNER_RE = re.compile(r"^[-\\|/]$")
+
+
+def clean_output(data: str) -> str:
+    """
+    Removes ANSI escape sequences and carriage returns of the CLI spinner.
+    """
+    return NOISE_RE.sub("\n", data)
+
 
 def parse_string_list(data: str) -> list[str]:
-    lines = data.splitlines(False)
+    lines = clean_output(data).splitlines(False)
 
     content_line = lines.pop().strip()
     while not content_line:
@@ -19,14 +32,56 @@ def parse_string_list(data: str) -> list[str]:
     return items
 
 
-def parse_options_list(lines_str: str, attr_map: dict[str, str], obj: T) -> T:
-    lines = lines_str.splitlines(False)
-    for line in lines:
-        for attr, label in attr_map.items():
-            result = re.search(label + r":\s*(?P<value>.*)", line, re.IGNORECASE)
-            if result is not None:
-                value = result.groupdict()["value"].strip()
-                if value:
-                    setattr(obj, attr, value)
-                break
-    return obj
+class LineSplitter:
+    """
+    Incremental parser of output chunks into cleaned lines. Chunks may end in the middle of a line or of a UTF-8
+    character, the rest is kept until the next chunk. Spinner frames and empty lines are dropped.
+    """
+    decoder: codecs.IncrementalDecoder
+    rest: str
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder('utf8')(errors='replace')
+        self.rest = ''
+
+    def feed(self, data: bytes) -> list[str]:
+        text = self.rest + self.decoder.decode(data)
+        parts = LINE_END_RE.split(text)
+        self.rest = parts.pop()
+        return self._clean(parts)
+
+    def flush(self) -> list[str]:
+        parts = LINE_END_RE.split(self.rest + self.decoder.decode(b'', final=True))
+        self.rest = ''
+        return self._clean(parts)
+
+    @staticmethod
+    def _clean(parts: list[str]) -> list[str]:
+        lines = []
+        for part in parts:
+            line = ESCAPE_RE.sub('', part).strip()
+            if line and not SPINNER_RE.match(line):
+                lines.append(line)
+        return lines
+
+
+class OptionsParser:
+    """
+    Parser of `Label: value` lines compiled once for the given attr_map (attribute name -> label).
+    Output is scanned in a single pass, the first label on a line wins.
+    """
+    attrs: dict[str, str]
+    regex: re.Pattern
+
+    def __init__(self, attr_map: dict[str, str]):
+        self.attrs = {label.lower(): attr for attr, label in attr_map.items()}
+        labels = sorted(attr_map.values(), key=len, reverse=True)
+        self.regex = re.compile("(?P<label>" + "|".join(re.escape(label) for label in labels) + r"):[ \t]*(?P<value>.*)",
+                                re.IGNORECASE)
+
+    def parse(self, data: str, obj: T) -> T:
+        for result in self.regex.finditer(clean_output(data)):
+            value = result.group("value").strip()
+            if value:
+                setattr(obj, self.attrs[result.group("label").lower()], value)
+        return obj
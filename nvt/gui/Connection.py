@@ -1,36 +1,27 @@
 import logging
 from typing import Optional, Callable
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QIcon, QIntValidator
-from PySide6.QtWidgets import QWidget, QPushButton, QListWidget, QListWidgetItem, QGridLayout, QLabel, QHBoxLayout, \
-    QVBoxLayout, QLineEdit
-from nvt.bindings import NVStatus
+from PySide6.QtCore import Qt, QSortFilterProxyModel, QStringListModel
+from PySide6.QtGui import QIntValidator
+from PySide6.QtWidgets import QWidget, QPushButton, QListView, QGridLayout, QLabel, QHBoxLayout, QVBoxLayout, \
+    QLineEdit, QAbstractItemView, QCompleter
+from nvt.bindings import NVStatus, ServerCatalog, server_catalog
+from nvt import Config
+from nvt.Metrics import format_rate
+from nvt.SpeedTest import SpeedTest, SpeedTestRun, SpeedResult
+from nvt.SpeedResults import speed_results
 from nvt.utils import svg_icon
+from .ListModels import KEY_ROLE, CountryListModel, CityListModel
 
 log = logging.getLogger(__name__)
 
 
-class CountryListItem(QListWidgetItem):
-    country: str
-
-    def __init__(self, country: str, icon: Optional[QIcon]):
-        super().__init__(country.replace("_", " "))
-        self.country = country
-        if icon:
-            self.setIcon(icon)
-
-
-class CityListItem(QListWidgetItem):
-    city: str
-
-    def __init__(self, city: str):
-        super().__init__(city.replace("_", " "))
-        self.city = city
-
-
 class Connection(QWidget):
     connecting: bool
     selected_country: Optional[str]
+    server_valid: bool
+    catalog: ServerCatalog
+    status: Optional[NVStatus]
+    speed_test: Optional[SpeedTestRun]
 
     load_countries: Callable[[], None]
     load_cities: Callable[[str], None]
@@ -39,8 +30,20 @@ class Connection(QWidget):
     disconnect_vpn: Callable[[], None]
 
     status_text: QLabel
-    countries_list: QListWidget
-    cities_list: QListWidget
+    throughput_text: QLabel
+    speed_text: QLabel
+    speed_test_btn: QPushButton
+    search_input: QLineEdit
+    countries_model: CountryListModel
+    countries_proxy: QSortFilterProxyModel
+    countries_list: QListView
+    cities_model: CityListModel
+    cities_list: QListView
+    server_input: QLineEdit
+    server_numbers: QStringListModel
+    server_info: QLabel
+    least_loaded_btn: QPushButton
+    fastest_btn: QPushButton
     quick_connect_btn: QPushButton
     connect_btn: QPushButton
 
@@ -50,6 +53,10 @@ class Connection(QWidget):
         super().__init__(parent)
         self.connecting = False
         self.selected_country = None
+        self.server_valid = True
+        self.catalog = server_catalog()
+        self.status = None
+        self.speed_test = None
 
         self.load_countries = load_countries
         self.load_cities = load_cities
@@ -57,9 +64,13 @@ class Connection(QWidget):
         self.connect_vpn = connect_vpn
         self.disconnect_vpn = disconnect_vpn
 
-        self.cities_process = None
-
         self.status_text = QLabel("Status")
+        self.throughput_text = QLabel("")
+        self.speed_text = QLabel("")
+
+        self.speed_test_btn = QPushButton("Speed test")
+        self.speed_test_btn.setDisabled(True)
+        self.speed_test_btn.clicked.connect(self._on_speed_test_click)
 
         self.quick_connect_btn = QPushButton(svg_icon('reconnect'), "Quick Connect")
         self.quick_connect_btn.clicked.connect(self.quick_connect_vpn)
@@ -71,16 +82,44 @@ class Connection(QWidget):
         self.disconnect_btn = QPushButton(svg_icon('disconnect'), "Disconnect")
         self.disconnect_btn.clicked.connect(self.disconnect_vpn)
 
-        self.countries_list = QListWidget(self)
-        self.countries_list.setSelectionMode(QListWidget.SelectionMode.NoSelection)
-        self.countries_list.itemSelectionChanged.connect(self._on_country_selected)
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("Search country")
+        self.search_input.setClearButtonEnabled(True)
+
+        self.countries_model = CountryListModel(self)
+        self.countries_proxy = QSortFilterProxyModel(self)
+        self.countries_proxy.setSourceModel(self.countries_model)
+        self.countries_proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.search_input.textChanged.connect(self.countries_proxy.setFilterFixedString)
 
-        self.cities_list = QListWidget(self)
-        self.cities_list.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+        self.countries_list = QListView(self)
+        self.countries_list.setUniformItemSizes(True)
+        self.countries_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.countries_list.setModel(self.countries_proxy)
+        self.countries_list.selectionModel().selectionChanged.connect(self._on_country_selected)
+
+        self.cities_model = CityListModel(self)
+        self.cities_list = QListView(self)
+        self.cities_list.setUniformItemSizes(True)
+        self.cities_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.cities_list.setModel(self.cities_model)
 
         self.server_input = QLineEdit(self)
         self.server_input.setPlaceholderText("123")
         self.server_input.setValidator(QIntValidator(bottom=0))
+        self.server_numbers = QStringListModel(self)
+        self.server_input.setCompleter(QCompleter(self.server_numbers, self))
+        self.server_input.textChanged.connect(self._on_server_changed)
+
+        self.server_info = QLabel(self)
+
+        self.least_loaded_btn = QPushButton("Least loaded")
+        self.least_loaded_btn.setDisabled(True)
+        self.least_loaded_btn.clicked.connect(self._on_least_loaded_click)
+
+        self.fastest_btn = QPushButton("Fastest tested")
+        self.fastest_btn.setDisabled(True)
+        self.fastest_btn.clicked.connect(self._on_fastest_click)
 
         # LAYOUTS
         main_layout = QGridLayout(self)
@@ -89,11 +128,17 @@ class Connection(QWidget):
 
         top_panel = QVBoxLayout()
         top_panel.addWidget(self.status_text)
+        top_panel.addWidget(self.throughput_text)
+        speed_layout = QHBoxLayout()
+        speed_layout.addWidget(self.speed_text, 1)
+        speed_layout.addWidget(self.speed_test_btn)
+        top_panel.addLayout(speed_layout)
         top_panel.addWidget(self.quick_connect_btn, 0, Qt.AlignmentFlag.AlignRight)
         top_panel.setSpacing(10)
         top_panel.setContentsMargins(5, 5, 5, 5)
         main_layout.addLayout(top_panel, 0, 0, 1, 2)
 
+        main_layout.addWidget(self.search_input, 1, 0)
         main_layout.addWidget(self.countries_list, 2, 0)
         main_layout.addWidget(self.cities_list, 2, 1)
 
@@ -101,6 +146,9 @@ class Connection(QWidget):
         input_layout.addWidget(QLabel("Server #"))
         input_layout.addSpacing(10)
         input_layout.addWidget(self.server_input)
+        input_layout.addWidget(self.server_info, 1)
+        input_layout.addWidget(self.least_loaded_btn)
+        input_layout.addWidget(self.fastest_btn)
         main_layout.addLayout(input_layout, 3, 0, 1, 2)
 
         bottom_panel = QHBoxLayout()
@@ -113,13 +161,12 @@ class Connection(QWidget):
 
         self.setLayout(main_layout)
 
-        self.load_countries()
-
     def set_connecting(self, connecting: bool):
         self.connecting = connecting
         self._update_disabled_buttons()
 
     def set_status(self, status: NVStatus):
+        self.status = status
         if status is None:
             status_text = "Loading..."
         elif status.status.lower() == "connected":
@@ -130,53 +177,163 @@ Connected {status.uptime}, {status.transfer}"""
             status_text = f"{status.status}\n\n"
 
         self.status_text.setText(status_text)
+        if status is None or status.status.lower() != "connected":
+            self.throughput_text.setText("")
+        self._update_disabled_buttons()
+
+    def set_throughput(self, summary: str):
+        self.throughput_text.setText(summary)
 
-    def set_countries(self, countries: list[tuple[str, Optional[str], Optional[QIcon]]]):
-        self.countries_list.setSelectionMode(QListWidget.SelectionMode.NoSelection)
-        self.countries_list.clear()
-        for country, code, icon in countries:
-            row = CountryListItem(country, icon)
-            self.countries_list.addItem(row)
-        self.countries_list.setSelectionMode(QListWidget.SelectionMode.SingleSelection)
+    def set_countries(self, countries: list[tuple[str, Optional[str]]]):
+        self.countries_model.set_countries(countries)
 
     def set_cities(self, cities: list[str]):
-        self.cities_list.clear()
-        self.cities_list.addItem(QListWidgetItem('# fastest'))
-        for city in cities:
-            row = CityListItem(city)
-            self.cities_list.addItem(row)
+        self.cities_model.set_cities(cities)
+
+    def set_catalog(self, catalog: ServerCatalog):
+        self.catalog = catalog
+        self._update_server_numbers()
+        self._on_server_changed()
 
     def _on_country_selected(self):
-        self.cities_list.clear()
-        if self.countries_list.selectedItems():
-            self.selected_country = self.countries_list.selectedItems()[0].country
+        self.cities_model.set_items([])
+        selected = self.countries_list.selectionModel().selectedIndexes()
+        if selected:
+            self.selected_country = selected[0].data(KEY_ROLE)
             self.load_cities(self.selected_country)
         else:
             self.selected_country = None
 
-        self._update_disabled_buttons()
+        self._update_server_numbers()
+        self._on_server_changed()
 
     def _on_connect_click(self):
-        selected_countries = self.countries_list.selectedItems()
-        selected_cities = self.cities_list.selectedItems()
-
-        if not selected_countries:
+        if not self.selected_country:
             return
 
-        country = selected_countries[0].country
         city = None
-        if selected_cities and isinstance(selected_cities[0], CityListItem):
-            city = selected_cities[0].city
+        selected_cities = self.cities_list.selectionModel().selectedIndexes()
+        if selected_cities:
+            city = selected_cities[0].data(KEY_ROLE)
         server_number = self.server_input.text()
-        self.connect_vpn(country, city, server_number)
+        self.connect_vpn(self.selected_country, city, server_number)
+
+    def _selected_code(self) -> Optional[str]:
+        if not self.selected_country:
+            return None
+        return self.countries_model.codes.get(self.selected_country)
+
+    def _update_server_numbers(self):
+        code = self._selected_code()
+        numbers = self.catalog.server_numbers(code) if code else []
+        # servers with the best speed test results are offered first
+        tested = [number for _, number, _ in self._ranked_servers(code)] if code else []
+        tested_set = set(tested)
+        self.server_numbers.setStringList(tested + [number for number in numbers if number not in tested_set])
+
+    def _ranked_servers(self, code: str) -> list[tuple[str, str, float]]:
+        """
+        Returns: (host, number, download rate) of the tested servers of country, fastest first. Only results
+        of the current technology and protocol count while connected.
+        """
+        numbers = self.catalog.numbers_by_host(code)
+        connected = self._is_connected()
+        ranked = speed_results().ranked(numbers, self.status.technology if connected else None,
+                                        self.status.protocol if connected else None)
+        return [(host, numbers[host], score) for host, score in ranked if host in numbers]
+
+    def _on_server_changed(self):
+        number = self.server_input.text()
+        code = self._selected_code()
+        self.server_valid = True
+        self.server_info.setText('')
+        if number and code and len(self.catalog):
+            server = self.catalog.find(code, number)
+            if server:
+                info = f"{server.city.replace('_', ' ')}, load {server.load}%"
+                score = speed_results().score(server.host)
+                if score is not None:
+                    info += f", tested {format_rate(score)}"
+                self.server_info.setText(info)
+            else:
+                self.server_valid = False
+                self.server_info.setText("Unknown server")
+        self._update_disabled_buttons()
+
+    def _on_least_loaded_click(self):
+        code = self._selected_code()
+        if not code:
+            return
+        city = None
+        selected_cities = self.cities_list.selectionModel().selectedIndexes()
+        if selected_cities:
+            city = selected_cities[0].data(KEY_ROLE)
+        server = self.catalog.least_loaded(code, city)
+        if server:
+            self.server_input.setText(server.number)
+
+    def _on_fastest_click(self):
+        code = self._selected_code()
+        ranked = self._ranked_servers(code) if code else []
+        if ranked:
+            self.server_input.setText(ranked[0][1])
+
+    def _is_connected(self) -> bool:
+        return self.status is not None and self.status.status.lower() == 'connected'
+
+    def _on_speed_test_click(self):
+        if self.speed_test or not self._is_connected():
+            return
+        status = self.status
+
+        def done(result: SpeedResult):
+            self._speed_test_finished()
+            self._update_disabled_buttons()
+            # the tunnel may have been changed from the tray or by auto reconnect while testing
+            if not self._is_connected() or self._tunnel(self.status) != self._tunnel(status):
+                self.speed_text.setText(f"Speed test of {status.host} discarded, the connection changed")
+                return
+            try:
+                speed_results().add(status, result)
+            except OSError as e:
+                # the result is still ranked until the application exits
+                log.warning(f"Cannot save speed test results: {e}")
+            upload = f", upload {format_rate(result.upload)}" if result.upload is not None else ''
+            self.speed_text.setText(f"{status.host}: download {format_rate(result.download)}{upload}")
+            self._update_server_numbers()
+            self._on_server_changed()
+
+        def error(e: str):
+            self._speed_test_finished()
+            self.speed_text.setText(f"Speed test failed: {e}")
+            self._update_disabled_buttons()
+
+        test = SpeedTest(*Config.get_speedtest_urls(), *Config.get_speedtest_options())
+        self.speed_text.setText(f"Testing {status.host}...")
+        self.speed_test = SpeedTestRun(test, on_finish=done, on_error=error, parent=self).run()
+        self._update_disabled_buttons()
+
+    @staticmethod
+    def _tunnel(status: NVStatus) -> tuple[Optional[str], Optional[str], Optional[str]]:
+        return status.host, status.technology, status.protocol
+
+    def _speed_test_finished(self):
+        self.speed_test.deleteLater()
+        self.speed_test = None
 
     def _update_disabled_buttons(self):
-        if self.selected_country and not self.connecting:
+        self.least_loaded_btn.setDisabled(not self._selected_code() or not len(self.catalog))
+        self.fastest_btn.setDisabled(not self._selected_code() or not len(self.catalog))
+        self.speed_test_btn.setDisabled(bool(self.speed_test) or self.connecting or not self._is_connected())
+
+        # connection changes wait for a running speed test, its result belongs to the current server
+        busy = self.connecting or bool(self.speed_test)
+        if self.selected_country and self.server_valid and not busy:
             self.connect_btn.setDisabled(False)
         else:
             self.connect_btn.setDisabled(True)
 
-        if not self.connecting:
+        if not busy:
             self.disconnect_btn.setDisabled(False)
             self.quick_connect_btn.setDisabled(False)
         else:
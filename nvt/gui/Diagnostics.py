@@ -0,0 +1,74 @@
+from typing import Optional
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QShowEvent, QHideEvent
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+from nvt.bindings import Stats
+
+COLUMNS = ['Command', 'Runs', 'Failed', 'Exit codes', 'Spawn p50', 'Exit p50', 'Exit p90', 'Parse p50', 'Output']
+REFRESH_INTERVAL = 2000
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return '-'
+    if seconds == float('inf'):
+        return f"> {Stats.DURATION_BUCKETS[-1]} s"
+    if seconds < 1:
+        return f"≤ {seconds * 1000:.0f} ms"
+    return f"≤ {seconds:g} s"
+
+
+class Diagnostics(QWidget):
+    """
+    Per-command stats of nordvpn processes, refreshed while visible.
+    """
+    table: QTableWidget
+    timer: QTimer
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        self.table = QTableWidget(0, len(COLUMNS))
+        self.table.setHorizontalHeaderLabels(COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.table)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event: QShowEvent) -> None:
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        self.timer.stop()
+
+    def refresh(self):
+        commands = sorted(Stats.stats)
+        self.table.setRowCount(len(commands))
+        for row, command in enumerate(commands):
+            data = Stats.stats[command]
+            output = data.output.mean()
+            values = [
+                command,
+                str(data.exit.count),
+                str(data.failures()),
+                ', '.join(f"{code}: {count}" for code, count in sorted(data.exit_codes.items())),
+                format_duration(data.spawn.quantile(0.5)),
+                format_duration(data.exit.quantile(0.5)),
+                format_duration(data.exit.quantile(0.9)),
+                format_duration(data.parse.quantile(0.5)),
+                '-' if output is None else f"{output:.0f} B",
+            ]
+            for column, value in enumerate(values):
+                item = self.table.item(row, column)
+                if item is None:
+                    self.table.setItem(row, column, QTableWidgetItem(value))
+                elif item.text() != value:
+                    item.setText(value)
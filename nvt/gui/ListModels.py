@@ -0,0 +1,103 @@
+import difflib
+from typing import Optional, Hashable
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex
+from nvt.FlagAtlas import flag_icons
+
+KEY_ROLE = Qt.ItemDataRole.UserRole
+
+
+class ListModel(QAbstractListModel):
+    """
+    Flat list model of hashable keys. `set_items` applies the difference to the current rows,
+    only inserted and removed rows are announced to the views.
+    """
+    items: list[Hashable]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.items = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.items)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.items):
+            return None
+        item = self.items[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._label(item)
+        if role == KEY_ROLE:
+            return item
+        return None
+
+    def set_items(self, items: list[Hashable]):
+        root = QModelIndex()
+        offset = 0
+        matcher = difflib.SequenceMatcher(None, self.items, items, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            start = i1 + offset
+            if i2 > i1:
+                self.beginRemoveRows(root, start, start + i2 - i1 - 1)
+                del self.items[start:start + i2 - i1]
+                self.endRemoveRows()
+            if j2 > j1:
+                self.beginInsertRows(root, start, start + j2 - j1 - 1)
+                self.items[start:start] = items[j1:j2]
+                self.endInsertRows()
+            offset += (j2 - j1) - (i2 - i1)
+
+    def _label(self, item: Hashable) -> str:
+        return str(item).replace("_", " ")
+
+
+class CountryListModel(ListModel):
+    codes: dict[str, Optional[str]]
+    # rows by country code, built on the first loaded flag after the rows changed
+    rows: Optional[dict[str, list[int]]]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.codes = dict()
+        self.rows = None
+        flag_icons().loaded.connect(self._flag_loaded)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        # flags are requested only for visible rows and decoded off the GUI thread
+        if role == Qt.ItemDataRole.DecorationRole and index.isValid() and index.row() < len(self.items):
+            return flag_icons().icon(self.codes.get(self.items[index.row()]))
+        return super().data(index, role)
+
+    def set_items(self, items: list[Hashable]):
+        super().set_items(items)
+        self.rows = None
+
+    def set_countries(self, countries: list[tuple[str, Optional[str]]]):
+        self.codes = dict(countries)
+        self.set_items([country for country, code in countries])
+
+    def _flag_loaded(self, code: str):
+        if self.rows is None:
+            self.rows = dict()
+            for row, country in enumerate(self.items):
+                self.rows.setdefault(self.codes.get(country), []).append(row)
+        for row in self.rows.get(code, []):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+
+class CityListModel(ListModel):
+    """
+    Cities of a country, the first row with None key stands for the fastest server.
+    """
+
+    def set_cities(self, cities: list[str]):
+        self.set_items([None, *cities])
+
+    def _label(self, item: Optional[str]) -> str:
+        if item is None:
+            return '# fastest'
+        return super()._label(item)
@@ -1,10 +1,13 @@
 import contextlib
 import logging
 from typing import Optional, Callable
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QGraphicsOpacityEffect, QComboBox
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtGui import QIcon
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QGraphicsOpacityEffect, QComboBox, \
+    QCheckBox, QLineEdit, QPushButton
 from nvt.Config import get_quick_connect, save_quick_connect
-from nvt.bindings import SettingsProcess, NVSettings
+from nvt.bindings import NVSettings, Tasks, settings_store
+from nvt.FlagAtlas import flag_icons
 from .ErrorRow import ErrorRow
 
 log = logging.getLogger(__name__)
@@ -22,13 +25,22 @@ class DefaultCountry(QWidget):
         layout.addWidget(self.countries)
         self.setLayout(layout)
 
-    def set_countries(self, countries: list[tuple[str, str]]):
+        self.codes = dict()
+        flag_icons().loaded.connect(self._icon_loaded)
+
+    def set_countries(self, countries: list[tuple[str, Optional[str]]]):
         with contextlib.suppress(RuntimeError):
             self.countries.currentIndexChanged.disconnect(self._value_changed)
         self.countries.clear()
+        self.codes.clear()
         self.countries.addItem('# fastest')
-        for country, code, icon in countries:
-            self.countries.addItem(icon, country.replace("_", " "), userData=country)
+        for country, code in countries:
+            icon = flag_icons().icon(code)
+            if icon:
+                self.codes[code.lower()] = self.countries.count()
+                self.countries.addItem(icon, country.replace("_", " "), userData=country)
+            else:
+                self.countries.addItem(country.replace("_", " "), userData=country)
 
         saved = get_quick_connect()
         if saved:
@@ -42,30 +54,77 @@ class DefaultCountry(QWidget):
     def _value_changed(self):
         save_quick_connect(self.countries.currentData())
 
+    def _icon_loaded(self, code: str):
+        idx = self.codes.get(code)
+        if idx is not None:
+            self.countries.setItemIcon(idx, flag_icons().icons[code] or QIcon())
+
 
 class OptionRow(QWidget):
-    def __init__(self, label: str):
+    """
+    Editable `nordvpn set` option: a checkbox for enabled/disabled options, a combo box when `choices` are given,
+    a line edit otherwise. An emptied line edit disables the option unless it is `required`.
+    """
+    edited = Signal()
+
+    value: Optional[str]
+    required: bool
+    input: QWidget
+
+    def __init__(self, label: str, choices: Optional[list[str]] = None, text: bool = False, required: bool = False):
         super().__init__()
+        self.value = None
+        self.required = required
 
         layout = QHBoxLayout()
         layout.setSpacing(0)
         layout.setContentsMargins(5, 0, 5, 0)
         layout.addWidget(QLabel(label))
         layout.addStretch()
-        self.value_label = QLabel('')
-        layout.addWidget(self.value_label)
+        if choices:
+            self.input = QComboBox()
+            self.input.addItems(choices)
+            self.input.setCurrentIndex(-1)
+            self.input.currentIndexChanged.connect(lambda: self.edited.emit())
+        elif text:
+            self.input = QLineEdit()
+            self.input.textEdited.connect(lambda: self.edited.emit())
+        else:
+            self.input = QCheckBox()
+            self.input.toggled.connect(lambda: self.edited.emit())
+        self.input.setDisabled(True)
+        layout.addWidget(self.input)
         self.setLayout(layout)
 
     def set_value(self, value: Optional[str]):
-        self.value_label.setStyleSheet('font-weight: 500;')
-        if value:
-            if value.lower() == 'enabled':
-                self.value_label.setStyleSheet('font-weight: 500; color: palette(highlight);')
-            if value.lower() == 'disabled':
-                self.value_label.setStyleSheet('font-weight: 200;')
-            self.value_label.setText(value)
+        self.value = value
+        self.input.blockSignals(True)
+        if isinstance(self.input, QComboBox):
+            idx = self.input.findText(value or '', Qt.MatchFlag.MatchFixedString)
+            if idx < 0 and value:
+                self.input.addItem(value.upper())
+                idx = self.input.count() - 1
+            self.input.setCurrentIndex(idx)
+        elif isinstance(self.input, QLineEdit):
+            self.input.setText(value or '')
         else:
-            self.value_label.setText('')
+            self.input.setChecked((value or '').lower() == 'enabled')
+        self.input.blockSignals(False)
+        self.input.setDisabled(value is None)
+
+    def edited_value(self) -> Optional[str]:
+        if isinstance(self.input, QComboBox):
+            # an option the cli does not print stays unset until a choice is picked
+            return self.input.currentText() or self.value
+        if self.value is None:
+            return None
+        if isinstance(self.input, QLineEdit):
+            return self.input.text().strip() or (self.value if self.required else 'disabled')
+        return 'enabled' if self.input.isChecked() else 'disabled'
+
+    def is_modified(self) -> bool:
+        edited = self.edited_value()
+        return edited is not None and edited.lower() != (self.value or '').strip().lower()
 
 
 class Separator(QFrame):
@@ -84,6 +143,8 @@ class Settings(QWidget):
     load_countries: Callable[[], None]
     default_country: DefaultCountry
     option_rows: dict[str, OptionRow]
+    apply_btn: QPushButton
+    reset_btn: QPushButton
     error_row: ErrorRow
 
     def __init__(self, load_countries: Callable[[], None], parent=None):
@@ -92,8 +153,6 @@ class Settings(QWidget):
 
         self.inputs = dict()
         self.option_rows = dict()
-        self.load_process = None
-        self.set_setting_process = None
 
         self.layout = QVBoxLayout()
         self.layout.setAlignment(Qt.AlignmentFlag.AlignTop)
@@ -105,13 +164,15 @@ class Settings(QWidget):
         self.layout.addSpacing(16)
 
         # cli option
-        def create_option_row(key: str, label: str):
-            self.option_rows[key] = OptionRow(label)
+        def create_option_row(key: str, label: str, choices: Optional[list[str]] = None, text: bool = False,
+                              required: bool = False):
+            self.option_rows[key] = OptionRow(label, choices, text, required)
+            self.option_rows[key].edited.connect(self._update_buttons)
             self.layout.addWidget(self.option_rows[key])
             self.layout.addWidget(Separator())
 
-        create_option_row('technology', 'Technology')
-        create_option_row('protocol', 'Protocol')
+        create_option_row('technology', 'Technology', ['NORDLYNX', 'OPENVPN', 'NORDWHISPER'])
+        create_option_row('protocol', 'Protocol', ['UDP', 'TCP'])
         create_option_row('autoconnect', 'Auto-connect')
         create_option_row('killswitch', 'Kill Switch')
         create_option_row('routing', 'Routing')
@@ -120,12 +181,20 @@ class Settings(QWidget):
         create_option_row('notify', 'Notify')
         create_option_row('ipv6', 'IPv6')
         create_option_row('meshnet', 'Meshnet')
-        create_option_row('dns', 'DNS')
+        create_option_row('dns', 'DNS', text=True)
         create_option_row('firewall', 'Firewall')
-        create_option_row('fwmark', 'Firewall Mark')
+        create_option_row('fwmark', 'Firewall Mark', text=True, required=True)
 
         self.layout.addSpacing(10)
-        self.layout.addWidget(QLabel('Run `nordvpn set --help` in a terminal to learn how to change settings.'))
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.reset_btn = QPushButton("Reset")
+        self.reset_btn.clicked.connect(self._reset)
+        buttons.addWidget(self.reset_btn)
+        self.apply_btn = QPushButton("Apply")
+        self.apply_btn.clicked.connect(self._apply)
+        buttons.addWidget(self.apply_btn)
+        self.layout.addLayout(buttons)
 
         self.layout.addStretch()
 
@@ -133,27 +202,68 @@ class Settings(QWidget):
         self.layout.addWidget(self.error_row)
 
         self.setLayout(self.layout)
-        self.load_settings()
+        self._update_buttons()
+
+        settings_store().changed.connect(self._set_settings)
+        settings_store().error.connect(self._load_error)
+        if settings_store().settings:
+            self._set_settings(settings_store().settings)
 
-    def set_countries(self, countries: list[tuple[str, str]]):
+    def set_countries(self, countries: list[tuple[str, Optional[str]]]):
         self.default_country.set_countries(countries)
 
-    def load_settings(self):
-        if self.load_process:
-            return
+    def load_settings(self) -> Tasks.Future[NVSettings]:
+        """
+        Shows cached settings, they are loaded again only when the cache was invalidated or expired.
+        """
+        return settings_store().load()
+
+    def _set_settings(self, settings: NVSettings):
+        self._set_error()
+        for key, row in self.option_rows.items():
+            # keep edits which were not applied yet
+            if not row.is_modified():
+                row.set_value(getattr(settings, key))
+        self._update_buttons()
+
+    def _load_error(self, e: str):
+        log.error(e)
+        self._set_error(e)
+
+    def _modified(self) -> dict[str, str]:
+        return {key: row.edited_value() for key, row in self.option_rows.items() if row.is_modified()}
+
+    def _update_protocol(self):
+        # the protocol is an OpenVPN option only, the cli does not print it for other technologies
+        protocol = self.option_rows['protocol']
+        openvpn = (self.option_rows['technology'].edited_value() or '').upper() == 'OPENVPN'
+        if not openvpn and protocol.is_modified():
+            protocol.set_value(protocol.value)
+        protocol.input.setDisabled(not openvpn)
+
+    def _update_buttons(self):
+        self._update_protocol()
+        modified = bool(self._modified()) and not settings_store().applying
+        self.apply_btn.setDisabled(not modified)
+        self.reset_btn.setDisabled(not modified)
+
+    def _reset(self):
+        for row in self.option_rows.values():
+            row.set_value(row.value)
+        self._update_buttons()
+
+    def _apply(self):
         self._set_error()
 
-        def done(settings: NVSettings):
-            self.load_process = None
-            for key, value in self.option_rows.items():
-                value.set_value(getattr(settings, key))
+        def done():
+            self._reset()
 
         def error(e):
-            self.load_process = None
-            log.error(e)
-            self._set_error(e)
+            self._reset()
+            self._set_error(f"Applying settings failed, changes were rolled back: {e}")
 
-        self.load_process = SettingsProcess(on_finish=done, on_error=error).run()
+        settings_store().apply(self._modified(), done, error)
+        self._update_buttons()
 
     def _set_error(self, msg: Optional[str] = None):
         if msg:
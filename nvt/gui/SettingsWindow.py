@@ -6,8 +6,12 @@ from PySide6.QtGui import QIcon, QCloseEvent, QShowEvent
 from PySide6.QtWidgets import QMainWindow, QLabel, QTabWidget, QVBoxLayout, QWidget
 from nvt import Config
 from nvt.utils import icons_dir, svg_icon
-from nvt.bindings import AccountProcess, NVStatus, CountriesProcess, CitiesProcess
+from nvt.bindings import Tasks, AccountProcess, NVStatus, CountriesProcess, CitiesProcess, \
+    CitiesPrefetch, CatalogUpdate, server_catalog
+from nvt.bindings.Cache import DAY
+from nvt.bindings.Servers import SERVERS_URL
 from .Connection import Connection
+from .Diagnostics import Diagnostics
 from .ErrorRow import ErrorRow
 from .Settings import Settings
 
@@ -19,15 +23,19 @@ class SettingsWindow(QMainWindow):
     account_label: QLabel
     connect_tab: Connection
     settings_tab: Settings
+    diagnostics_tab: Diagnostics
 
     def __init__(self, quick_connect_vpn: Callable[[], None],
-                 connect_vpn: Callable[[str, Optional[str], Optional[str]], None], disconnect_vpn: Callable[[], None]):
+                 connect_vpn: Callable[[str, Optional[str], Optional[str]], None], disconnect_vpn: Callable[[], None],
+                 load_status: Callable[[], None]):
         super().__init__(None)
         # self.setAttribute(Qt.WA_DeleteOnClose, True)
 
-        self.account_process = None
-        self.countries_process = None
-        self.cities_process = None
+        self.load_status = load_status
+        self.catalog_update = None
+        self.country_names = []
+        self.city_names = []
+        self.prefetch = CitiesPrefetch(Config.get_prefetch_concurrency(), self._on_cities_prefetched, self)
 
         self.setWindowTitle("NordVPN tray")
         self.setWindowIcon(QIcon(os.path.join(icons_dir(), 'icon.png')))
@@ -45,10 +53,12 @@ class SettingsWindow(QMainWindow):
         self.connect_tab = Connection(self, self._load_countries, self._load_cities, quick_connect_vpn, connect_vpn,
                                       disconnect_vpn)
         self.settings_tab = Settings(self._load_countries, self)
+        self.diagnostics_tab = Diagnostics(self)
 
         tabs = QTabWidget()
         tabs.addTab(self.connect_tab, svg_icon('connect'), "Connect")
         tabs.addTab(self.settings_tab, svg_icon('settings'), "Settings")
+        tabs.addTab(self.diagnostics_tab, svg_icon('diagnostics'), "Diagnostics")
 
         main_widget = QWidget()
         main_layout = QVBoxLayout()
@@ -60,7 +70,8 @@ class SettingsWindow(QMainWindow):
         main_layout.addWidget(self.error_row)
 
         self.setCentralWidget(main_widget)
-        self._load_account()
+        Tasks.run(self._load_all())
+        self._update_catalog()
 
     def showEvent(self, event: QShowEvent) -> None:
         self.settings_tab.load_settings()
@@ -78,52 +89,103 @@ class SettingsWindow(QMainWindow):
     def set_status(self, status: NVStatus):
         self.connect_tab.set_status(status)
 
-    def _load_account(self):
-        if self.account_process:
+    def set_throughput(self, summary: str):
+        self.connect_tab.set_throughput(summary)
+
+    async def _load_all(self):
+        """
+        Loads everything shown by the window at once. Commands already in flight are shared, the status is
+        loaded by the tray which passes it on with `set_status`.
+        """
+        self.load_status()
+        await Tasks.gather(self._fetch_account(), self._fetch_countries(), self.settings_tab.load_settings(),
+                           return_exceptions=True)
+
+    async def _fetch_account(self):
+        try:
+            account = await Tasks.command(AccountProcess)
+        except Tasks.CommandError as e:
+            self._set_error(f"Load account failed: {e}")
             return
+        self.account_label.setText(f"{account.email} - {account.status}")
 
-        def done(account):
-            self.account_process = None
-            self.account_label.setText(f"{account.email} - {account.status}")
-
-        def error(e):
-            self.account_process = None
-            self._set_error(f"Load account failed: {e}")
+    def _load_countries(self):
+        Tasks.run(self._fetch_countries())
 
-        self.account_process = AccountProcess(on_finish=done, on_error=error).run()
+    async def _fetch_countries(self):
+        self._set_error()
 
-    def _load_countries(self):
-        if self.countries_process:
+        cached = CountriesProcess.cached()
+        if cached:
+            self._set_countries(cached)
+            if CountriesProcess.is_fresh():
+                self.prefetch.start(self.country_names)
+                return
+
+        try:
+            countries = await Tasks.command(CountriesProcess)
+        except Tasks.CommandError as e:
+            if not cached:
+                self._set_error(f"Load countries failed: {e}")
             return
+        if countries and [c[0] for c in countries] != self.country_names:
+            self._set_countries(countries)
+        self.prefetch.start(self.country_names)
+
+    def _set_countries(self, countries):
+        self.country_names = [c[0] for c in countries]
+        self.connect_tab.set_countries(countries)
+        self.settings_tab.set_countries(countries)
+
+    def _load_cities(self, country: str):
         self._set_error()
+        self.city_names = []
+        self.prefetch.user_active()
 
-        def done(countries):
-            self.countries_process = None
-            if countries:
-                self.connect_tab.set_countries(countries)
-                self.settings_tab.set_countries(countries)
+        cached = CitiesProcess.cached(country)
+        if cached:
+            self._set_cities(cached)
+            if CitiesProcess.is_fresh(country):
+                return
 
-        def error(e):
-            self.countries_process = None
-            self._set_error(f"Load countries failed: {e}")
+        if self.prefetch.prioritize(country):
+            return
 
-        self.countries_process = CountriesProcess(on_finish=done, on_error=error).run()
+        Tasks.run(self._fetch_cities(country, bool(cached)))
 
-    def _load_cities(self, country: str):
-        if self.cities_process:
-            self.cities_process.close()
-        self._set_error()
+    async def _fetch_cities(self, country: str, cached: bool):
+        try:
+            cities = await Tasks.command(CitiesProcess, country)
+        except Tasks.CommandError as e:
+            if not cached and country == self.connect_tab.selected_country:
+                self._set_error(f"Load cities failed: {e}")
+            return
+        # results of a country which is no longer selected are only cached
+        if country == self.connect_tab.selected_country and cities and cities != self.city_names:
+            self._set_cities(cities)
+
+    def _set_cities(self, cities: list[str]):
+        self.city_names = cities
+        self.connect_tab.set_cities(cities)
+
+    def _on_cities_prefetched(self, country: str, cities: list[str]):
+        if country == self.connect_tab.selected_country and cities and cities != self.city_names:
+            self._set_cities(cities)
+
+    def _update_catalog(self):
+        if self.catalog_update or server_catalog().is_fresh(DAY):
+            return
 
-        def done(cities):
-            self.cities_process = None
-            if cities:
-                self.connect_tab.set_cities(cities)
+        def done(catalog):
+            self.catalog_update = None
+            self.connect_tab.set_catalog(catalog)
 
         def error(e):
-            self.cities_process = None
-            self._set_error(f"Load cities failed: {e}")
+            self.catalog_update = None
+            log.warning(e)
 
-        self.cities_process = CitiesProcess(on_finish=done, on_error=error).run(country)
+        self.catalog_update = CatalogUpdate(on_finish=done, on_error=error, parent=self).run(
+            Config.get_servers_url() or SERVERS_URL)
 
     def _set_error(self, msg: Optional[str] = None):
         if msg:
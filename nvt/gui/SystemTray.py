@@ -1,14 +1,26 @@
 import logging
-from typing import Optional
-from PySide6.QtCore import QCoreApplication, QTimer
+from typing import Optional, TYPE_CHECKING
+from PySide6.QtCore import QCoreApplication
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QSystemTrayIcon, QMenu
 from nvt import Config
-from nvt.utils import country_icon, svg_icon, png_icon
+from nvt.StatusScheduler import StatusScheduler
+from nvt.NetWatcher import NetWatcher
+from nvt.Supervisor import ConnectionSupervisor, Incident
+from nvt.Probe import FastestServer, latency_probe
+from nvt.Metrics import MetricsRecorder
+from nvt.utils import svg_icon
+from nvt.FlagAtlas import flag_icons
 from nvt.Config import get_quick_connect
-from nvt.bindings import StatusProcess, QuickConnectProcess, NVStatus, DisconnectProcess, ConnectProcess
-from nvt.bindings.Countries import NV_COUNTRIES
-from .SettingsWindow import SettingsWindow
+from nvt.bindings import Tasks, StatusProcess, QuickConnectProcess, NVStatus, DisconnectProcess, ConnectProcess, \
+    server_catalog
+from nvt.bindings.CountryRegistry import countries
+from nvt.bindings.Circuit import breaker
+from nvt.Startup import profile
+from .TrayView import TrayView
+
+if TYPE_CHECKING:
+    from .SettingsWindow import SettingsWindow
 
 log = logging.getLogger(__name__)
 
@@ -17,18 +29,23 @@ class SystemTray(QSystemTrayIcon):
     loading: bool
     connecting: bool
     status: NVStatus
-    main_window: Optional[SettingsWindow]
+    main_window: Optional['SettingsWindow']
+    view: TrayView
     error_action: Optional[QAction]
     status_action: QAction
     quick_connect_action: QAction
     disconnect_action: QAction
     last_connected_menu: QMenu
-    timer: QTimer
+    last_connected_actions: dict[str, QAction]
+    metrics: MetricsRecorder
+    scheduler: StatusScheduler
+    net_watcher: NetWatcher
+    supervisor: ConnectionSupervisor
 
     def __init__(self, parent):
-        QSystemTrayIcon.__init__(self, png_icon('icon'), parent)
-        self.status_process = None
+        QSystemTrayIcon.__init__(self, parent)
         self.qc_process = None
+        self.qc_probe = None
         self.c_process = None
         self.d_process = None
 
@@ -36,13 +53,16 @@ class SystemTray(QSystemTrayIcon):
         self.connecting = False
         self.status = NVStatus()
         self.main_window = None
-
-        self.setToolTip("NordVPN")
+        self.metrics = MetricsRecorder()
 
         self.menu = QMenu(parent)
 
         self.error_action = None
-        self.status_action = self.menu.addAction("Loading...")
+        self.status_action = self.menu.addAction("")
+        self.view = TrayView(self, self.status_action)
+        self.view.set_icon('icon')
+        self.view.set_tooltip("NordVPN")
+        self.view.set_status_text("Loading...")
         self.status_action.setDisabled(True)
 
         self.menu.addSeparator()
@@ -52,6 +72,7 @@ class SystemTray(QSystemTrayIcon):
         self.disconnect_action = self.menu.addAction(svg_icon('disconnect'), "Disconnect")
         self.disconnect_action.triggered.connect(self._disconnect_vpn)
         self.last_connected_menu = self.menu.addMenu("Last connected")
+        self.last_connected_actions = dict()
         self._render_last_connected()
 
         self.menu.addSeparator()
@@ -64,32 +85,87 @@ class SystemTray(QSystemTrayIcon):
         self.activated.connect(self._open_settings)
         self.setContextMenu(self.menu)
 
+        breaker.state_changed.connect(self._on_circuit_changed)
+
+        self.scheduler = StatusScheduler(self._load_status, *Config.get_status_interval(), self)
+        self.supervisor = ConnectionSupervisor(self._load_status, self)
+        self.supervisor.reconnecting.connect(self._on_reconnecting)
+        self.supervisor.attempt_finished.connect(lambda: self._set_connecting(False))
+        self.supervisor.gave_up.connect(self._on_reconnect_gave_up)
         self._load_status()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self._load_status)
-        self.timer.start(1000 * 60)
+        self.net_watcher = NetWatcher(self)
+        self.net_watcher.changed.connect(self._load_status)
+        self.net_watcher.start()
 
-    def _render_last_connected(self):
-        items = Config.get_last_connected()
+    def on_shared_changed(self, key: str):
+        """
+        Called when the shared daemon pushes a new result, the status is then read from its cache.
+        """
+        if key == 'status':
+            self._load_status()
+
+    def _on_circuit_changed(self, is_open: bool):
+        if is_open:
+            self.view.set_icon('icon')
+            self.view.set_tooltip("NordVPN\nDaemon is not responding")
+            self.view.set_status_text("NordVPN daemon is not responding")
+        else:
+            self.view.set_tooltip("NordVPN")
+            self._set_error()
+            self._load_status()
 
-        self.last_connected_menu.clear()
+    def _on_reconnecting(self, attempt: int, max_attempts: int):
+        # connect actions are blocked while the supervisor connects
+        self._set_connecting(True)
+        self._set_status(NVStatus("Reconnecting"))
+        self.view.set_icon('icon')
+        self.view.set_status_text(f"Connection lost, reconnecting ({attempt}/{max_attempts})...")
+
+    def _on_reconnect_gave_up(self, incident: Incident):
+        self._set_error(f"Reconnect failed after {incident.attempts} attempts")
+        self._load_status()
 
-        def create_cb(country: str, city: Optional[str], node: Optional[str]):
-            return lambda: self._connect_vpn(country, city, node)
+    def _render_last_connected(self):
+        items = Config.get_last_connected()
+        keys = [':'.join(item) for item in items]
+
+        for key in set(self.last_connected_actions) - set(keys):
+            action = self.last_connected_actions.pop(key)
+            self.last_connected_menu.removeAction(action)
+            action.deleteLater()
+
+        # move or insert only actions which are not on their position yet
+        for idx, (key, (country, city, node)) in enumerate(zip(keys, items)):
+            actions = self.last_connected_menu.actions()
+            action = self.last_connected_actions.get(key)
+            if action is None:
+                action = self._create_last_connected_action(country, city, node)
+                self.last_connected_actions[key] = action
+            elif idx < len(actions) and actions[idx] == action:
+                continue
+            else:
+                self.last_connected_menu.removeAction(action)
+                actions = self.last_connected_menu.actions()
 
-        for country, city, node in items:
-            code = NV_COUNTRIES.get(country)
-            label = country.replace('_', ' ')
-            if node:
-                label += f"#{node}"
-            elif city:
-                label += ' (' + city.replace('_', ' ') + ')'
-            action = self.last_connected_menu.addAction(label)
-            icon = country_icon(code)
-            if icon:
-                action.setIcon(icon)
-            action.triggered.connect(create_cb(country, city, node))
+            if idx < len(actions):
+                self.last_connected_menu.insertAction(actions[idx], action)
+            else:
+                self.last_connected_menu.addAction(action)
+
+    def _create_last_connected_action(self, country: str, city: Optional[str], node: Optional[str]) -> QAction:
+        label = country.replace('_', ' ')
+        if node:
+            label += f"#{node}"
+        elif city:
+            label += ' (' + city.replace('_', ' ') + ')'
+        action = QAction(label, self.last_connected_menu)
+        icon = flag_icons().load(countries.code(country))
+        if icon:
+            action.setIcon(icon)
+        action.setDisabled(self.connecting)
+        action.triggered.connect(lambda: self._connect_vpn(country, city, node))
+        return action
 
     def _update_disabled_items(self):
         self.quick_connect_action.setDisabled(self.connecting)
@@ -108,9 +184,17 @@ class SystemTray(QSystemTrayIcon):
 
     def _set_status(self, status: NVStatus):
         self.status = status
-        if self.main_window:
+        if self.view.update_status(status) and self.main_window:
             self.main_window.set_status(self.status)
 
+    def _set_progress(self, line: str):
+        self.view.set_status_text(line)
+
+    def _set_throughput(self, summary: str):
+        self.view.set_tooltip(f"NordVPN\n{summary}" if summary else "NordVPN")
+        if self.view.update_throughput(summary) and self.main_window:
+            self.main_window.set_throughput(summary)
+
     def _set_error(self, msg: Optional[str] = None):
         if self.error_action:
             self.menu.removeAction(self.error_action)
@@ -125,51 +209,67 @@ class SystemTray(QSystemTrayIcon):
     def _load_status(self):
         if self.loading:
             return
-
-        def done(status: NVStatus):
-            self.status_process = None
-            self._set_status(status)
-            self._set_loading(False)
-
-            if status.status.lower() == 'connected':
-                status_text = "Connected to:\n{} ({})\n{} ({})\n{} ({})\n{}\n{}".format(
-                    status.country,
-                    status.city,
-                    status.host,
-                    status.ip,
-                    status.technology,
-                    status.protocol,
-                    status.uptime,
-                    status.transfer,
-                )
-                self.setIcon(png_icon('icon_connected'))
-            elif status.status.lower() == 'disconnected':
-                status_text = status.status
-                self.setIcon(png_icon('icon_disconnected'))
-            else:
-                status_text = status.status
-                self.setIcon(png_icon('icon'))
-            self.status_action.setText(status_text)
-
-        def error(e):
-            self.status_process = None
+        self._set_loading(True)
+        if self.view.status is None:
+            self.view.set_status_text('Loading...')
+        Tasks.run(self._refresh_status())
+
+    async def _refresh_status(self):
+        try:
+            # shared with the settings window when it asks at the same time
+            status = await Tasks.command(StatusProcess)
+        except Tasks.CommandError as e:
             self._set_loading(False)
-            self.status_action.setText('')
+            self.scheduler.report(None)
+            self.supervisor.report(None)
+            profile.mark('first status')
+            profile.report()
+            self.view.set_status_text('')
             self._set_error(f"Load status failed: {e}")
+            return
 
-        self._set_loading(True)
-        self.status_action.setText('Loading...')
-        self.status_process = StatusProcess(on_finish=done, on_error=error).run()
+        self._set_status(status)
+        self._set_loading(False)
+        self.scheduler.report(status.status)
+        self.supervisor.report(status.status)
+        profile.mark('first status')
+        profile.report()
+
+        if status.status.lower() == 'connected':
+            status_text = "Connected to:\n{} ({})\n{} ({})\n{} ({})\n{}\n{}".format(
+                status.country,
+                status.city,
+                status.host,
+                status.ip,
+                status.technology,
+                status.protocol,
+                status.uptime,
+                status.transfer,
+            )
+            self.view.set_icon('icon_connected')
+            self.metrics.record(status.transfer, status.uptime)
+            self._set_throughput(self.metrics.summary())
+        elif status.status.lower() == 'disconnected':
+            status_text = status.status
+            self.view.set_icon('icon_disconnected')
+            self._set_throughput('')
+        else:
+            status_text = status.status
+            self.view.set_icon('icon')
+        self.view.set_status_text(status_text)
 
     def _quick_connect_vpn(self):
-        if self.connecting:
+        if self.connecting or self.supervisor.process:
             return
+        self.supervisor.user_action()
+        country = get_quick_connect()
 
         def done():
             self.qc_process = None
             self._set_connecting(False)
             self._update_disabled_items()
             self._load_status()
+            Config.save_last_target(True, country)
 
         def error(e):
             self.qc_process = None
@@ -180,14 +280,27 @@ class SystemTray(QSystemTrayIcon):
 
         self._set_connecting(True)
         self._set_status(NVStatus("Connecting"))
-        self.status_action.setText("Connecting...")
+        self.view.set_status_text("Connecting...")
         self._update_disabled_items()
-        country = get_quick_connect()
-        self.qc_process = QuickConnectProcess(on_finish=done, on_error=error).run(country)
+
+        def run(server: Optional[str] = None):
+            self.qc_probe = None
+            self.qc_process = QuickConnectProcess(on_finish=done, on_error=error,
+                                                  on_progress=self._set_progress).run(country, server)
+
+        # without a preferred country the daemon's own recommendation is kept
+        code = countries.code(country) if country else None
+        candidates = server_catalog().servers(code)[:Config.get_probe_candidates()] if code else []
+        if candidates:
+            self.qc_probe = FastestServer(latency_probe, on_finish=lambda host: run(host.split('.')[0]),
+                                          on_error=lambda e: run(), parent=self).run([s.host for s in candidates])
+        else:
+            run()
 
     def _connect_vpn(self, country: str, city: Optional[str], server_number: Optional[str]):
-        if self.connecting:
+        if self.connecting or self.supervisor.process:
             return
+        self.supervisor.user_action()
 
         def done():
             self.c_process = None
@@ -195,6 +308,7 @@ class SystemTray(QSystemTrayIcon):
             self._update_disabled_items()
             self._load_status()
             Config.add_last_connected(country, city, server_number)
+            Config.save_last_target(False, country, city, server_number)
             self._render_last_connected()
 
         def error(e):
@@ -206,13 +320,15 @@ class SystemTray(QSystemTrayIcon):
 
         self._set_connecting(True)
         self._set_status(NVStatus("Connecting"))
-        self.status_action.setText("Connecting...")
+        self.view.set_status_text("Connecting...")
         self._update_disabled_items()
-        self.c_process = ConnectProcess(on_finish=done, on_error=error).run(country, city, server_number)
+        self.c_process = ConnectProcess(on_finish=done, on_error=error, on_progress=self._set_progress).run(
+            country, city, server_number)
 
     def _disconnect_vpn(self):
-        if self.connecting:
+        if self.connecting or self.supervisor.process:
             return
+        self.supervisor.user_action()
 
         def done():
             self.d_process = None
@@ -229,16 +345,22 @@ class SystemTray(QSystemTrayIcon):
 
         self._set_connecting(True)
         self._set_status(NVStatus("Disconnecting"))
-        self.status_action.setText("Disconnecting...")
+        self.view.set_status_text("Disconnecting...")
         self._update_disabled_items()
-        self.d_process = DisconnectProcess(on_finish=done, on_error=error).run()
+        self.d_process = DisconnectProcess(on_finish=done, on_error=error, on_progress=self._set_progress).run()
 
     def _open_settings(self):
         if not self.main_window:
-            self.main_window = SettingsWindow(self._quick_connect_vpn, self._connect_vpn, self._disconnect_vpn)
+            # window modules are imported on first use to keep them out of startup
+            from .SettingsWindow import SettingsWindow
+
+            self.main_window = SettingsWindow(self._quick_connect_vpn, self._connect_vpn, self._disconnect_vpn,
+                                              self._load_status)
 
         self.main_window.set_connecting(self.connecting)
         self.main_window.set_status(self.status)
+        if self.status.status.lower() == 'connected':
+            self.main_window.set_throughput(self.metrics.summary())
         self.main_window.show()
         self.main_window.activateWindow()
 
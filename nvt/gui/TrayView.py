@@ -0,0 +1,88 @@
+import logging
+from dataclasses import fields
+from typing import Optional
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QSystemTrayIcon
+from nvt.utils import png_icon
+from nvt.bindings import NVStatus
+
+log = logging.getLogger(__name__)
+
+
+def changed_fields(old: Optional[NVStatus], new: NVStatus) -> set[str]:
+    if old is None:
+        return {f.name for f in fields(NVStatus)}
+    return {f.name for f in fields(NVStatus) if getattr(old, f.name) != getattr(new, f.name)}
+
+
+class TrayView:
+    """
+    Last values shown by the tray icon, its status action and the settings window. Setters touch the widgets
+    only when the value differs, `skipped` counts the updates which were not needed per target.
+    """
+    tray: QSystemTrayIcon
+    status_action: QAction
+    icon: Optional[str]
+    status_text: Optional[str]
+    tooltip: Optional[str]
+    status: Optional[NVStatus]
+    throughput: Optional[str]
+    skipped: dict[str, int]
+    applied: dict[str, int]
+
+    def __init__(self, tray: QSystemTrayIcon, status_action: QAction):
+        self.tray = tray
+        self.status_action = status_action
+        self.icon = None
+        self.status_text = None
+        self.tooltip = None
+        self.status = None
+        self.throughput = None
+        self.skipped = {'icon': 0, 'status_text': 0, 'tooltip': 0, 'status': 0, 'throughput': 0}
+        self.applied = dict.fromkeys(self.skipped, 0)
+
+    def set_icon(self, name: str):
+        if self._changed('icon', self.icon, name):
+            self.icon = name
+            self.tray.setIcon(png_icon(name))
+
+    def set_status_text(self, text: str):
+        if self._changed('status_text', self.status_text, text):
+            self.status_text = text
+            self.status_action.setText(text)
+
+    def set_tooltip(self, text: str):
+        if self._changed('tooltip', self.tooltip, text):
+            self.tooltip = text
+            self.tray.setToolTip(text)
+
+    def update_status(self, status: NVStatus) -> set[str]:
+        """
+        Returns: Fields of status which differ from the previous one, the window needs an update when not empty
+        """
+        changed = changed_fields(self.status, status)
+        self._count('status', bool(changed))
+        self.status = status
+        return changed
+
+    def update_throughput(self, summary: str) -> bool:
+        changed = self._changed('throughput', self.throughput, summary)
+        self.throughput = summary
+        return changed
+
+    def summary(self) -> str:
+        return ', '.join(f"{target} {self.skipped[target]}/{self.skipped[target] + self.applied[target]}"
+                         for target in self.skipped)
+
+    def _changed(self, target: str, old, new) -> bool:
+        changed = old != new
+        self._count(target, changed)
+        return changed
+
+    def _count(self, target: str, changed: bool):
+        if changed:
+            self.applied[target] += 1
+        else:
+            self.skipped[target] += 1
+            if self.skipped[target] % 100 == 0:
+                log.info(f"Skipped tray updates: {self.summary()}")
@@ -22,20 +22,6 @@ def icons_dir() -> str:
 icons: dict[str, Optional[QIcon]] = dict()
 
 
-def country_icon(code: Optional[str]) -> Optional[QIcon]:
-    if not code:
-        return None
-    if code not in icons:
-        path = os.path.join(icons_dir(), 'flags', f"{code.lower()}.png")
-        if os.path.isfile(path):
-            ico = QIcon(path)
-            icons[code] = ico
-        else:
-            icons[code] = None
-
-    return icons[code]
-
-
 def png_icon(icon: str):
     name = f"{icon}.png"
     if name not in icons:
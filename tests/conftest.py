@@ -0,0 +1,33 @@
+import os
+import time
+from typing import Callable
+import pytest
+
+
+@pytest.fixture(scope='session')
+def app():
+    qt_widgets = pytest.importorskip('PySide6.QtWidgets')
+    # models and icons need a gui application, no display is required
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return qt_widgets.QApplication.instance() or qt_widgets.QApplication([])
+
+
+@pytest.fixture
+def wait(app) -> Callable[[Callable[[], bool], float], bool]:
+    """
+    Returns: Function running the Qt event loop until the condition holds or the timeout in seconds passed
+    """
+    from PySide6.QtCore import QEventLoop, QTimer
+
+    def wait_(condition: Callable[[], bool], timeout: float = 10) -> bool:
+        deadline = time.perf_counter() + timeout
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.timeout.connect(lambda: loop.quit() if condition() or time.perf_counter() > deadline else None)
+        timer.start(5)
+        if not condition():
+            loop.exec()
+        timer.stop()
+        return condition()
+
+    return wait_
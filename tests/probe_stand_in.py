@@ -0,0 +1,42 @@
+"""
+LatencyProbe with injected per-host latency against a local TCP listener, shared by the probe tests and
+bench.probe.
+"""
+import asyncio
+from typing import Optional
+from nvt.Probe import LatencyProbe
+
+
+class DelayedProbe(LatencyProbe):
+    """
+    Hosts are not resolved, `resolve_delays` stand in for DNS lookups and `delays` for the handshake latency.
+    """
+    delays: dict[str, float]
+    resolve_delays: dict[str, float]
+    connects: list[str]
+    active: int
+    max_active: int
+
+    def __init__(self, port: int, delays: dict[str, float], resolve_delays: Optional[dict[str, float]] = None,
+                 **kwargs):
+        super().__init__(port=port, **kwargs)
+        self.delays = delays
+        self.resolve_delays = resolve_delays or dict()
+        self.connects = []
+        self.active = 0
+        self.max_active = 0
+
+    async def _resolve(self, host: str) -> str:
+        await asyncio.sleep(self.resolve_delays.get(host, 0))
+        return host
+
+    async def _connect(self, address: str) -> asyncio.StreamWriter:
+        self.connects.append(address)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays[address])
+            _, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            return writer
+        finally:
+            self.active -= 1
@@ -0,0 +1,57 @@
+"""
+Request handling of the headless daemon with a stand-in client socket.
+"""
+import json
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.Daemon import Daemon  # noqa: E402
+from nvt.bindings.Shared import LineReader  # noqa: E402
+
+
+class ClientSocket:
+    def __init__(self):
+        self.reader = LineReader()
+        self.messages = []
+
+    def write(self, data: bytes):
+        self.messages.extend(self.reader.feed(data))
+
+
+@pytest.fixture
+def daemon(app, tmp_path):
+    daemon = Daemon(str(tmp_path / 'daemon.sock'))
+    yield daemon
+    daemon.deleteLater()
+
+
+def handle(daemon: Daemon, line: str) -> list:
+    socket = ClientSocket()
+    daemon.readers[socket] = LineReader()
+    daemon.subscriptions[socket] = set()
+    for message in daemon.readers[socket].feed(line.encode() + b'\n'):
+        daemon._handle(socket, message)
+    return socket.messages
+
+
+@pytest.mark.parametrize('line', ['[1, 2]', '"status"', '3', 'null'])
+def test_non_object_requests_get_an_error(daemon, line):
+    assert handle(daemon, line) == [{'id': None, 'error': "Invalid request, expected a json object"}]
+
+
+def test_invalid_keys_get_an_error(daemon):
+    assert handle(daemon, json.dumps({'id': 1, 'method': 'get', 'key': [1]})) == \
+        [{'id': 1, 'error': "Unknown key [1]"}]
+    assert handle(daemon, json.dumps({'id': 2, 'method': 'subscribe', 'keys': 'status'})) == \
+        [{'id': 2, 'error': "Invalid keys, expected a list"}]
+    assert handle(daemon, json.dumps({'id': 3, 'method': 'subscribe', 'keys': [['status'], {}, 'status']})) == \
+        [{'id': 3, 'result': ['status']}]
+
+
+def test_status_is_cached_for_the_scheduler_interval(daemon):
+    # a stable status backs the scheduler off, the cache lives as long
+    for _ in range(3):
+        daemon._report({'data': {'status': 'Connected'}})
+    assert daemon.scheduler.interval == 4 * daemon.scheduler.min_interval
+    assert daemon.commands['status'].ttl == daemon.scheduler.interval
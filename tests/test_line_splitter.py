@@ -0,0 +1,94 @@
+"""
+Streamed nordvpn output split into lines at arbitrary chunk boundaries, by LineSplitter and by a Process reading
+a script standing in for the CLI.
+"""
+import os
+import sys
+import time
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import QuickConnectProcess, DisconnectProcess  # noqa: E402
+from nvt.bindings.utils import LineSplitter  # noqa: E402
+
+
+def feed(chunks: list[bytes]) -> list[list[str]]:
+    splitter = LineSplitter()
+    return [splitter.feed(chunk) for chunk in chunks] + [splitter.flush()]
+
+
+def test_line_split_across_chunks():
+    assert feed([b'Connecting to Ger', b'many #1047 (de10', b'47.nordvpn.com)\nDone\n']) == [
+        [], [], ['Connecting to Germany #1047 (de1047.nordvpn.com)', 'Done'], []]
+    # a UTF-8 character split between chunks
+    assert feed([b'Z\xc3', b'\xbcrich\n']) == [[], ['Zürich'], []]
+
+
+def test_carriage_return_progress_lines():
+    # the spinner redraws with \r and escape sequences, frames are dropped
+    chunks = [b'\r-\r\\\r|\r/\r', b'\x1b[2KConnecting\r\x1b[2KStill connecting\r', b'\r\n']
+    assert feed(chunks) == [[], ['Connecting', 'Still connecting'], [], []]
+
+
+def test_success_line_mid_chunk():
+    lines = feed([b'Connecting\nYou are connected to Germany #1047 (de1047.nordvpn.com)!\nTip: use meshnet'])
+    assert lines[0] == ['Connecting', 'You are connected to Germany #1047 (de1047.nordvpn.com)!']
+    assert lines[1] == ['Tip: use meshnet']
+
+
+def test_eof_without_trailing_newline():
+    assert feed([b'Status: Connected\nHostname: de10', b'47.nordvpn.com']) == [
+        ['Status: Connected'], [], ['Hostname: de1047.nordvpn.com']]
+
+
+@pytest.fixture
+def fake_cli(tmp_path, monkeypatch):
+    """
+    Returns: Function installing a nordvpn script writing the given chunks with a pause in between,
+    then sleeping for `linger` seconds before it exits
+    """
+    def install(chunks: list[bytes], linger: float = 0):
+        script = tmp_path / 'nordvpn'
+        script.write_text(f"#!{sys.executable}\n"
+                          "import sys, time\n"
+                          f"for chunk in {chunks!r}:\n"
+                          "    sys.stdout.buffer.write(chunk)\n"
+                          "    sys.stdout.buffer.flush()\n"
+                          "    time.sleep(0.05)\n"
+                          f"time.sleep({linger})\n")
+        script.chmod(0o755)
+
+    monkeypatch.setenv('PATH', str(tmp_path), prepend=os.pathsep)
+    return install
+
+
+def test_process_finishes_on_success_line_mid_chunk(fake_cli, wait):
+    fake_cli([b'\r-\r\\\rConnecting to Ger', b'many #1047 (de1047.nordvpn.com)\r',
+              b'You are connected to Germany #1047 (de1047.nordvpn.com)!\nTip: use meshnet\n'], linger=5)
+    progress, finished = [], []
+    start = time.perf_counter()
+    process = QuickConnectProcess(on_finish=lambda: finished.append(True), on_error=finished.append,
+                                  on_progress=progress.append).run('Germany')
+    try:
+        assert wait(lambda: finished, 4)
+        # finished without waiting for the exit of the child
+        assert time.perf_counter() - start < 4
+        assert finished == [True]
+        assert progress == ['Connecting to Germany #1047 (de1047.nordvpn.com)',
+                            'You are connected to Germany #1047 (de1047.nordvpn.com)!']
+    finally:
+        process.kill()
+        process.waitForFinished(1000)
+
+
+def test_process_reads_last_line_without_newline(fake_cli, wait):
+    fake_cli([b'You are disconnected ', b'from NordVPN.'])
+    progress, finished = [], []
+    process = DisconnectProcess(on_finish=lambda: finished.append(True), on_error=finished.append,
+                                on_progress=progress.append).run()
+
+    assert wait(lambda: finished)
+    assert process.state() == process.ProcessState.NotRunning
+    assert finished == [True]
+    assert progress == ['You are disconnected from NordVPN.']
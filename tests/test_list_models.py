@@ -0,0 +1,41 @@
+"""
+Row updates announced by the list models.
+"""
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.gui.ListModels import CountryListModel, ListModel  # noqa: E402
+
+
+def recorder(model: ListModel) -> list:
+    events = []
+    model.rowsInserted.connect(lambda parent, first, last: events.append(('insert', first, last)))
+    model.rowsRemoved.connect(lambda parent, first, last: events.append(('remove', first, last)))
+    model.dataChanged.connect(lambda first, last, roles: events.append(('changed', first.row(), last.row())))
+    return events
+
+
+def test_set_items_announces_only_the_difference(app):
+    model = ListModel()
+    model.set_items(['a', 'b', 'c', 'd'])
+    events = recorder(model)
+    model.set_items(['a', 'c', 'd', 'e'])
+
+    assert model.items == ['a', 'c', 'd', 'e']
+    assert events == [('remove', 1, 1), ('insert', 3, 3)]
+
+
+def test_loaded_flag_updates_only_its_rows(app):
+    model = CountryListModel()
+    model.set_countries([('Germany', 'DE'), ('France', 'FR'), ('Italy', 'IT')])
+    events = recorder(model)
+    model._flag_loaded('FR')
+    model._flag_loaded('XX')
+    assert events == [('changed', 1, 1)]
+
+    # the row index follows changed rows
+    model.set_countries([('Austria', 'AT'), ('France', 'FR'), ('Germany', 'DE'), ('Italy', 'IT')])
+    events.clear()
+    model._flag_loaded('DE')
+    assert events == [('changed', 2, 2)]
@@ -0,0 +1,87 @@
+"""
+NetWatcher against a recorded rtnetlink stream: bench/fixtures/netlink_events.txt holds one received datagram
+per line (hex) of a tap device `lan9` and a tun device `tun7` being created, addressed (IPv4 and IPv6), brought up
+and deleted.
+"""
+import os
+import errno
+import socket
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.NetWatcher import NetlinkReader, parse_events, is_vpn_interface  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'bench', 'fixtures', 'netlink_events.txt')
+
+
+def recorded_events() -> list[bytes]:
+    with open(FIXTURE) as f:
+        return [bytes.fromhex(line.strip()) for line in f if line.strip()]
+
+
+def test_parse_recorded_events():
+    names = dict()
+    touched = [parse_events(data, names) for data in recorded_events()]
+
+    assert all(len(t) == 1 for t in touched)
+    vpn = [t[0] for t in touched if is_vpn_interface(t[0])]
+    # all link and address events of tun7, its IPv6 address messages have no label and resolve by index
+    assert vpn == ['tun7'] * 9
+    assert {t[0] for t in touched} == {'lan9', 'tun7'}
+    # deleted links are forgotten
+    assert names == {}
+
+
+def test_truncated_message_is_ignored():
+    data = recorded_events()[0]
+    assert parse_events(data[:len(data) - 4], dict()) == []
+
+
+class ReplaySocket:
+    """
+    Netlink socket stand-in which fails the first read with ENOBUFS, then returns the recorded datagrams and
+    finally asks the reader to stop.
+    """
+
+    def __init__(self, datagrams: list[bytes], reader: NetlinkReader):
+        self.datagrams = list(datagrams)
+        self.reader = reader
+        self.overrun = True
+        self.ready, self.signal = socket.socketpair()
+        self.signal.send(b'\0' * (len(self.datagrams) + 1))
+
+    def fileno(self) -> int:
+        return self.ready.fileno()
+
+    def recv(self, size: int) -> bytes:
+        self.ready.recv(1)
+        if self.overrun:
+            self.overrun = False
+            raise OSError(errno.ENOBUFS, os.strerror(errno.ENOBUFS))
+        data = self.datagrams.pop(0)
+        if not self.datagrams:
+            os.write(self.reader.stop_write, b'\0')
+        return data
+
+    def close(self):
+        self.ready.close()
+        self.signal.close()
+
+
+def test_reader_resyncs_after_overrun_and_stops_cleanly():
+    datagrams = recorded_events()
+    reader = NetlinkReader(socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM))
+    reader.sock.close()
+    reader.sock = ReplaySocket(datagrams, reader)
+    emitted = []
+    reader.changed.connect(lambda: emitted.append(True))
+
+    # run in this thread, the replay socket requests the stop after the last datagram
+    reader.run()
+
+    names = dict()
+    vpn_datagrams = sum(1 for data in datagrams if any(is_vpn_interface(n) for n in parse_events(data, names)))
+    # one resync for the overrun plus one per datagram touching tun7
+    assert len(emitted) == 1 + vpn_datagrams
+    reader.stop()
@@ -0,0 +1,80 @@
+"""
+LatencyProbe against a local TCP listener standing in for the servers, per-host latency is injected before
+the handshake.
+"""
+import time
+import asyncio
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.Probe import LatencyProbe, fastest  # noqa: E402
+from probe_stand_in import DelayedProbe  # noqa: E402
+
+
+def probe(probe_: LatencyProbe, hosts: list[str]) -> dict:
+    async def run():
+        server = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', probe_.port)
+        async with server:
+            return await probe_.probe_many(hosts)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def port() -> int:
+    async def free_port():
+        server = await asyncio.start_server(lambda r, w: w.close(), '127.0.0.1', 0)
+        port_ = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        return port_
+
+    return asyncio.run(free_port())
+
+
+def test_fastest_host_wins_and_slow_host_times_out(port):
+    delays = {'a': 0.15, 'b': 0.02, 'c': 0.08, 'slow': 2}
+    results = probe(DelayedProbe(port, delays, timeout=0.5), list(delays))
+
+    assert results['slow'] is None
+    assert results['b'] < results['c'] < results['a']
+    assert fastest(results) == 'b'
+
+
+def test_resolution_is_not_timed(port):
+    # a cold cache host resolving slowly still wins on handshake latency
+    results = probe(DelayedProbe(port, {'cold': 0.02, 'warm': 0.1}, resolve_delays={'cold': 0.3}, timeout=0.5),
+                    ['cold', 'warm'])
+    assert results['cold'] < results['warm']
+    assert fastest(results) == 'cold'
+
+
+def test_concurrency_cap_and_wall_clock(port):
+    delays = {f"h{i}": 0.1 for i in range(12)}
+    probe_ = DelayedProbe(port, delays, concurrency=4)
+    start = time.perf_counter()
+    results = probe(probe_, list(delays))
+    elapsed = time.perf_counter() - start
+
+    assert probe_.max_active == 4
+    assert all(latency is not None for latency in results.values())
+    # three waves of 0.1 s instead of twelve sequential probes
+    assert 0.3 <= elapsed < 1.0
+
+
+def test_results_are_cached_until_expired(port):
+    delays = {'a': 0.01, 'b': 0.01}
+    probe_ = DelayedProbe(port, delays, ttl=60)
+    probe(probe_, ['a', 'b'])
+    probe(probe_, ['a', 'b'])
+    assert sorted(probe_.connects) == ['a', 'b']
+
+    expiring = DelayedProbe(port, delays, ttl=0)
+    probe(expiring, ['a'])
+    probe(expiring, ['a'])
+    assert expiring.connects == ['a', 'a']
+
+
+def test_no_reachable_host():
+    assert fastest({'a': None, 'b': None}) is None
@@ -0,0 +1,89 @@
+"""
+Deadlines, retries and the circuit breaker of Process against the fake nordvpn CLI in bench/fake.
+"""
+import os
+import time
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import StatusProcess  # noqa: E402
+import nvt.bindings.Process as process_module  # noqa: E402
+from nvt.bindings.Circuit import CircuitBreaker  # noqa: E402
+
+FAKE_DIR = os.path.join(os.path.dirname(__file__), '..', 'bench', 'fake')
+
+
+@pytest.fixture
+def fake_cli(monkeypatch):
+    monkeypatch.setenv('PATH', os.path.abspath(FAKE_DIR) + os.pathsep + os.environ.get('PATH', ''))
+    monkeypatch.setenv('FAKE_NORDVPN_LATENCY', '0')
+    monkeypatch.setenv('FAKE_NORDVPN_FAIL', '0')
+    monkeypatch.setattr(process_module, 'RETRY_DELAY', 0.05)
+    breaker = CircuitBreaker(threshold=100, cooldown=0.5)
+    monkeypatch.setattr(process_module, 'breaker', breaker)
+    return breaker
+
+
+def status_call(wait, timeout: float = 5, retries: int = 0) -> tuple[str, int, float, StatusProcess]:
+    """
+    Returns: Outcome, number of started children, seconds to the callback and the process
+    """
+    results = []
+    spawns = []
+    process = StatusProcess(on_finish=lambda s: results.append(f"ok {s.status}"),
+                            on_error=lambda e: results.append(f"error {e.strip()}"))
+    process.timeout = timeout
+    process.retries = retries
+    process.started.connect(lambda: spawns.append(True))
+    start = time.perf_counter()
+    process.run()
+    assert wait(lambda: results, 30)
+    return results[0], len(spawns), time.perf_counter() - start, process
+
+
+def test_hanging_command_is_killed_at_timeout(fake_cli, wait, monkeypatch):
+    monkeypatch.setenv('FAKE_NORDVPN_LATENCY', 'status=30')
+    outcome, spawns, elapsed, process = status_call(wait, timeout=0.5)
+
+    assert outcome == 'error nordvpn status timed out after 0.5s'
+    # the deadline is a coarse QTimer, it may fire up to 5 % early
+    assert 0.45 <= elapsed < 2
+    assert wait(lambda: process.state() == process.ProcessState.NotRunning, 2)
+
+
+def test_failing_command_is_retried(fake_cli, wait, monkeypatch):
+    monkeypatch.setenv('FAKE_NORDVPN_FAIL', '1')
+    outcome, spawns, _, _ = status_call(wait, retries=2)
+
+    assert outcome == 'error Whoops! Cannot reach System Daemon.'
+    assert spawns == 3
+    assert fake_cli.failures == 3
+
+
+def test_breaker_opens_and_half_opens_after_cooldown(fake_cli, wait, monkeypatch):
+    fake_cli.threshold = 2
+    monkeypatch.setenv('FAKE_NORDVPN_FAIL', '1')
+    status_call(wait)
+    assert not fake_cli.is_open
+    status_call(wait)
+    assert fake_cli.is_open
+
+    # open: rejected without starting nordvpn
+    outcome, spawns, _, _ = status_call(wait)
+    assert outcome.startswith('error NordVPN daemon is not responding')
+    assert spawns == 0
+
+    # half open: one failing trial after the cooldown, then rejected again
+    time.sleep(fake_cli.cooldown)
+    _, spawns, _, _ = status_call(wait)
+    assert spawns == 1 and fake_cli.is_open
+    _, spawns, _, _ = status_call(wait)
+    assert spawns == 0
+
+    # a successful trial closes the circuit
+    time.sleep(fake_cli.cooldown)
+    monkeypatch.setenv('FAKE_NORDVPN_FAIL', '0')
+    outcome, spawns, _, _ = status_call(wait)
+    assert outcome == 'ok Connected'
+    assert spawns == 1 and not fake_cli.is_open
@@ -0,0 +1,67 @@
+"""
+ServerCatalog and CatalogUpdate against a recorded response of the servers API in bench/fixtures/servers.json.
+"""
+import os
+import json
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import Servers  # noqa: E402
+from nvt.bindings.Servers import ServerCatalog, CatalogUpdate  # noqa: E402
+
+SERVERS_PATH = os.path.join(os.path.dirname(__file__), '..', 'bench', 'fixtures', 'servers.json')
+
+
+@pytest.fixture
+def catalog() -> ServerCatalog:
+    with open(SERVERS_PATH) as f:
+        return ServerCatalog.from_api(json.load(f))
+
+
+def test_servers_without_number_are_skipped(catalog):
+    assert len(catalog) == 11
+    assert 'lb.nordvpn.com' not in catalog.hosts
+    assert catalog.server(catalog.hosts.index('us-ca12.nordvpn.com')).city == 'Los_Angeles'
+
+
+def test_find_by_number(catalog):
+    # the plain prefix of GB is uk
+    assert catalog.find('GB', '2201').host == 'uk2201.nordvpn.com'
+    assert catalog.find('de', '0507').host == 'de507.nordvpn.com'
+    assert catalog.find('DE', '2201') is None
+    # regional hosts are not reachable by number
+    assert catalog.find('US', '12') is None
+
+
+def test_least_loaded(catalog):
+    assert catalog.least_loaded('DE').host == 'de507.nordvpn.com'
+    assert catalog.least_loaded('DE', 'Berlin').host == 'de1009.nordvpn.com'
+    assert catalog.least_loaded('US').host == 'us5000.nordvpn.com'
+    assert catalog.least_loaded('FR') is None
+
+
+def test_server_numbers(catalog):
+    assert catalog.server_numbers('de') == ['507', '750', '1009', '1010']
+    assert catalog.server_numbers('US') == ['5000', '9440']
+    assert catalog.server_numbers('NL') == []
+
+
+def test_saved_catalog_is_loaded(catalog, tmp_path):
+    path = str(tmp_path / 'servers.json')
+    catalog.save(path)
+    loaded = ServerCatalog.load(path)
+    assert loaded.hosts == catalog.hosts
+    assert loaded.by_group == catalog.by_group
+    assert loaded.find('GB', '1800').host == 'uk1800.nordvpn.com'
+
+
+def test_update_is_delivered_when_save_fails(wait, tmp_path, monkeypatch):
+    monkeypatch.setattr(Servers, 'catalog_path', lambda: str(tmp_path / 'missing' / 'servers.json'))
+    monkeypatch.setattr(Servers, '_catalog', None)
+    results = []
+    CatalogUpdate(on_finish=results.append, on_error=results.append).run('file://' + os.path.abspath(SERVERS_PATH))
+
+    assert wait(lambda: results)
+    assert isinstance(results[0], ServerCatalog) and len(results[0]) == 11
+    assert Servers.server_catalog() is results[0]
@@ -0,0 +1,33 @@
+"""
+Protocol row and apply plan when switching from NordLynx, for which the cli prints no protocol, to OpenVPN.
+"""
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import NVSettings  # noqa: E402
+from nvt.bindings.SettingsStore import plan  # noqa: E402
+from nvt.gui.Settings import OptionRow  # noqa: E402
+
+
+def test_unset_choice_is_not_modified_until_picked(app):
+    row = OptionRow('Protocol', ['UDP', 'TCP'])
+    assert row.edited_value() is None and not row.is_modified()
+
+    row.set_value(None)
+    assert row.edited_value() is None and not row.is_modified()
+
+    row.input.setCurrentIndex(1)
+    assert row.edited_value() == 'TCP' and row.is_modified()
+
+    row.set_value('TCP')
+    assert not row.is_modified()
+
+
+def test_protocol_is_set_after_switching_to_openvpn():
+    current = NVSettings(technology='NORDLYNX', protocol=None, killswitch='disabled')
+    steps = plan(current, {'protocol': 'TCP', 'technology': 'OPENVPN'})
+    assert steps == [('technology', 'OPENVPN'), ('protocol', 'TCP')]
+
+    # the protocol is dropped when the technology stays NordLynx
+    assert plan(current, {'protocol': 'TCP'}) == []
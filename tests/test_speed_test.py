@@ -0,0 +1,107 @@
+"""
+SpeedTest and SpeedResults against local HTTP servers standing in for the speed test endpoint of a fast and
+a throttled server.
+"""
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import NVStatus  # noqa: E402
+from nvt.SpeedTest import SpeedTest, SpeedTestError  # noqa: E402
+from nvt.SpeedResults import SpeedResults  # noqa: E402
+
+
+CHUNK = bytes(1 << 16)
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    GET streams zeros, POST reads a chunked body.
+    """
+    protocol_version = 'HTTP/1.1'
+    size = 1 << 30
+    delay = 0.0
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', str(self.size))
+        self.end_headers()
+        try:
+            for _ in range(self.size // len(CHUNK)):
+                self.wfile.write(CHUNK)
+                if self.delay:
+                    time.sleep(self.delay)
+        except OSError:
+            pass
+
+    def do_POST(self):
+        try:
+            while size := int(self.rfile.readline().split(b';')[0], 16):
+                while size > 0:
+                    data = self.rfile.read(min(size, len(CHUNK)))
+                    if not data:
+                        return
+                    size -= len(data)
+                self.rfile.readline()
+            self.rfile.readline()
+        except (OSError, ValueError):
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class ThrottledHandler(Handler):
+    delay = 0.05
+
+
+def serve(handler: type[Handler]) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def servers():
+    fast, slow = serve(Handler), serve(ThrottledHandler)
+    yield [f"http://127.0.0.1:{s.server_address[1]}/" for s in (fast, slow)]
+    for server in (fast, slow):
+        server.shutdown()
+        server.server_close()
+
+
+def test_download_and_upload_are_measured(servers):
+    url = servers[0]
+    result = SpeedTest(url, url, streams=2, duration=0.4, warmup=0.1).run()
+    assert result.download > 0
+    assert result.upload > 0
+
+
+def test_unreachable_endpoint_fails():
+    with pytest.raises(SpeedTestError):
+        SpeedTest('http://127.0.0.1:1/', streams=1, duration=0.2, timeout=0.5).run()
+
+
+def test_results_rank_the_faster_server_first(servers, tmp_path):
+    results = SpeedResults(str(tmp_path / 'speed_results.json'))
+    for host, url in zip(('de1.nordvpn.com', 'de2.nordvpn.com'), servers):
+        status = NVStatus('Connected', host=host, technology='NORDLYNX', protocol='UDP')
+        for _ in range(2):
+            results.add(status, SpeedTest(url, streams=2, duration=0.3, warmup=0.05).run())
+
+    ranked = results.ranked(['de1.nordvpn.com', 'de2.nordvpn.com', 'de3.nordvpn.com'])
+    assert [host for host, _ in ranked] == ['de1.nordvpn.com', 'de2.nordvpn.com']
+    assert ranked[0][1] > ranked[1][1]
+
+    # samples survive a reload, an untested technology has no score
+    reloaded = SpeedResults(results.path)
+    reloaded.load()
+    assert reloaded.ranked(['de1.nordvpn.com']) == ranked[:1]
+    assert reloaded.score('de1.nordvpn.com', technology='OPENVPN') is None
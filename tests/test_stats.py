@@ -0,0 +1,48 @@
+"""
+Prometheus textfile export of the command stats.
+"""
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import Stats  # noqa: E402
+
+
+@pytest.fixture
+def textfile(tmp_path, monkeypatch):
+    monkeypatch.setattr(Stats, 'stats', dict())
+    monkeypatch.setattr(Stats, 'textfile_written', 0.0)
+    monkeypatch.setattr(Stats, 'TEXTFILE_INTERVAL', 0.2)
+    path = tmp_path / 'nordvpn_tray.prom'
+    Stats.set_textfile(str(path))
+    yield path
+    Stats.set_textfile(None)
+
+
+def exits(path) -> int:
+    line = 'nordvpn_tray_command_exit_total{command="status",code="0"}'
+    for text in path.read_text().splitlines():
+        if text.startswith(line):
+            return int(text.split()[-1])
+    return 0
+
+
+def test_exits_within_the_interval_are_written_by_the_trailing_timer(textfile, wait):
+    Stats.record_exit('status', 0, 0.01, 100)
+    assert exits(textfile) == 1
+    Stats.record_exit('status', 0, 0.01, 100)
+    Stats.record_exit('status', 0, 0.01, 100)
+    assert exits(textfile) == 1
+
+    assert wait(lambda: exits(textfile) == 3, 2)
+    assert not Stats.textfile_pending
+
+
+def test_pending_exits_are_written_at_exit(textfile):
+    Stats.record_exit('status', 0, 0.01, 100)
+    Stats.record_exit('status', 0, 0.01, 100)
+    assert exits(textfile) == 1
+
+    # registered with atexit
+    Stats._flush_pending()
+    assert exits(textfile) == 2
@@ -0,0 +1,25 @@
+"""
+Spawns saved by the status scheduler count every status spawn, not only the scheduled polls.
+"""
+import time
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt import StatusScheduler as scheduler_module  # noqa: E402
+from nvt.bindings import Stats  # noqa: E402
+
+
+def test_unscheduled_status_spawns_are_counted(app, monkeypatch):
+    monkeypatch.setattr(Stats, 'stats', dict())
+    Stats.record_spawn('status', 0.01)
+    scheduler = scheduler_module.StatusScheduler(lambda: None, 10, 300)
+    scheduler.started_at = time.monotonic() - scheduler_module.BASELINE_INTERVAL * 10
+    saved = scheduler.saved_per_hour()
+    assert saved == pytest.approx(60, rel=0.01)
+
+    # e.g. the loads after connect and disconnect, outside the scheduler
+    for _ in range(5):
+        Stats.record_spawn('status', 0.01)
+    Stats.record_spawn('settings', 0.01)
+    assert scheduler.saved_per_hour() == pytest.approx(saved - 30, rel=0.01)
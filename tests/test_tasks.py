@@ -0,0 +1,39 @@
+"""
+Tasks driving coroutines on the Qt event loop.
+"""
+import asyncio
+import pytest
+
+pytest.importorskip('PySide6')
+
+from nvt.bindings import Tasks  # noqa: E402
+
+
+def test_awaited_futures_resume_the_task():
+    future = Tasks.Future()
+
+    async def coro():
+        return await future + 1
+
+    task = Tasks.run(coro())
+    assert not task.done()
+    future.set_result(1)
+    assert task.result() == 2
+
+
+def test_awaiting_a_foreign_awaitable_fails_with_type_error():
+    async def coro():
+        await asyncio.sleep(0)
+
+    task = Tasks.run(coro())
+    assert isinstance(task.exception(), TypeError)
+    assert 'only Tasks.Future is supported' in str(task.exception())
+
+    # the error is raised inside the coroutine at the await
+    async def handled():
+        try:
+            await asyncio.sleep(0)
+        except TypeError:
+            return 'handled'
+
+    assert Tasks.run(handled()).result() == 'handled'